@@ -28,7 +28,7 @@ flights_agent_card = AgentCard(
     url='http://localhost:9999/',
     version='1.0.0',
     defaultInputModes=['text'],
-    defaultOutputModes=['text'],
+    defaultOutputModes=['text', 'data'],
     capabilities=AgentCapabilities(streaming=True),
     skills=[flights_skill1, flights_skill2]
 )
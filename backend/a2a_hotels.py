@@ -27,7 +27,7 @@ hotels_agent_card = AgentCard(
     url='http://localhost:9999/',
     version='1.0.0',
     defaultInputModes=['text'],
-    defaultOutputModes=['text'],
+    defaultOutputModes=['text', 'data'],
     capabilities=AgentCapabilities(streaming=True),
     skills=[hotels_skill1, hotels_skill2]
 )
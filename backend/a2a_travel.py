@@ -0,0 +1,22 @@
+from a2a.types import (
+    AgentCapabilities,
+    AgentCard,
+)
+
+from a2a_flights import flights_skill1, flights_skill2
+from a2a_hotels import hotels_skill1, hotels_skill2
+
+# =============================================================================
+# TRAVEL COORDINATOR CARD
+# =============================================================================
+
+travel_agent_card = AgentCard(
+    name='Travel Booking Agent',
+    description='Comprehensive AI travel agent that can handle both flight and hotel bookings. Routes each request to the flights or hotels agent and plans whole trips by asking both at once.',
+    url='http://localhost:9999/',
+    version='1.0.0',
+    defaultInputModes=['text'],
+    defaultOutputModes=['text', 'data'],
+    capabilities=AgentCapabilities(streaming=True),
+    skills=[flights_skill1, flights_skill2, hotels_skill1, hotels_skill2]
+)
@@ -0,0 +1,248 @@
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import List, Optional
+
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.utils import new_agent_text_message, new_task
+from langchain_core.rate_limiters import BaseRateLimiter
+
+from cancellation import RunningTasks
+from response_cache import BOOKING_INTENT
+from telemetry import metrics
+
+# Priority lanes, lower goes first: a booking holds a user at checkout, a search can wait
+PRIORITY_BOOKING = 0
+PRIORITY_SEARCH = 1
+
+ADMISSION_REJECTED = metrics.counter(
+    "travel_admission_rejected_total", "Requests rejected by admission control", ("agent", "reason")
+)
+ADMISSION_QUEUED = metrics.gauge("travel_admission_queued", "Requests waiting for an execution slot", ("agent",))
+ADMISSION_WAIT_SECONDS = metrics.histogram(
+    "travel_admission_wait_seconds", "Time requests waited for an execution slot", ("agent", "lane")
+)
+
+def request_priority(query: str) -> int:
+    return PRIORITY_BOOKING if BOOKING_INTENT.search(query or "") else PRIORITY_SEARCH
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot get an execution slot in time"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+# =============================================================================
+# ADMISSION CONTROL
+# =============================================================================
+
+class AdmissionController:
+    """Bounded concurrency with a bounded, prioritized wait queue.
+
+    At most `max_concurrent` requests run at once. Others wait in priority
+    order (FIFO within a lane), up to `max_queue` of them. A request is
+    rejected straight away when the queue is full or when the expected wait,
+    estimated from recent execution times, exceeds `max_wait` seconds, and
+    after `max_wait` seconds of waiting otherwise. A rejection costs
+    microseconds instead of a client timeout, so the latency of admitted
+    requests stays bounded under overload.
+    """
+
+    # Weight of the newest sample in the moving average of execution time
+    SERVICE_TIME_ALPHA = 0.2
+
+    def __init__(self, name: str, max_concurrent: int = 32, max_queue: int = 64, max_wait: float = 10.0):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.service_time = 0.0
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        # Heap of (priority, arrival, future); futures of abandoned waits are cancelled
+        self._waiters: List = []
+        self._arrivals = itertools.count()
+
+    @classmethod
+    def from_env(cls, name: str) -> "AdmissionController":
+        return cls(
+            name,
+            max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "32")),
+            max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+            max_wait=float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10")),
+        )
+
+    @property
+    def saturated(self) -> bool:
+        """Whether a new request would have to wait"""
+        return self.active >= self.max_concurrent or self.queued > 0
+
+    def expected_wait(self, priority: int) -> float:
+        """Seconds a new request of this priority would likely wait for a slot"""
+        ahead = sum(1 for p, _, waiter in self._waiters if p <= priority and not waiter.done())
+        return (ahead + 1) * self.service_time / self.max_concurrent
+
+    def _reject(self, reason: str, message: str) -> None:
+        self.rejected += 1
+        ADMISSION_REJECTED.inc(agent=self.name, reason=reason)
+        raise AdmissionRejected(reason, message)
+
+    async def acquire(self, priority: int = PRIORITY_SEARCH) -> None:
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return
+        if self.queued >= self.max_queue:
+            self._reject("queue_full", "The server is at capacity, please retry shortly.")
+        expected = self.expected_wait(priority)
+        if expected > self.max_wait:
+            self._reject("deadline", f"Expected wait of {expected:.1f}s exceeds {self.max_wait:g}s, please retry shortly.")
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._arrivals), waiter))
+        self.queued += 1
+        ADMISSION_QUEUED.inc(agent=self.name)
+        start = time.monotonic()
+        try:
+            async with asyncio.timeout(self.max_wait):
+                await waiter
+        except (TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # A slot was handed over just as we gave up, pass it on
+                self.release()
+            else:
+                waiter.cancel()
+            if isinstance(e, TimeoutError):
+                self._reject("timeout", f"No capacity within {self.max_wait:g}s, please retry shortly.")
+            raise
+        finally:
+            self.queued -= 1
+            ADMISSION_QUEUED.dec(agent=self.name)
+        self.admitted += 1
+        ADMISSION_WAIT_SECONDS.observe(
+            time.monotonic() - start, agent=self.name, lane="booking" if priority == PRIORITY_BOOKING else "search"
+        )
+
+    def release(self) -> None:
+        """Hand the slot to the next live waiter, or free it"""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def observe(self, seconds: float) -> None:
+        if self.service_time == 0.0:
+            self.service_time = seconds
+        else:
+            self.service_time += self.SERVICE_TIME_ALPHA * (seconds - self.service_time)
+
+class AdmissionControlledExecutor(AgentExecutor):
+    """Runs another executor behind an AdmissionController.
+
+    Rejected requests get a final TaskState.rejected status with a retry
+    message instead of queueing until the client times out. Requests
+    canceled while still queued never reach the wrapped executor.
+    """
+
+    def __init__(self, executor: AgentExecutor, controller: AdmissionController):
+        self.executor = executor
+        self.controller = controller
+        self.waiting = RunningTasks()
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        if self.controller.saturated and not context.current_task:
+            # Publish the task before queueing, so the client has an id to cancel it with
+            context.current_task = new_task(context.message)
+            await event_queue.enqueue_event(context.current_task)
+
+        admitted = False
+        try:
+            async with self.waiting.track(context.task_id, context.context_id, event_queue):
+                await self.controller.acquire(request_priority(context.get_user_input()))
+                admitted = True
+        except AdmissionRejected as e:
+            task = context.current_task
+            if not task:
+                task = new_task(context.message)
+                await event_queue.enqueue_event(task)
+            await TaskUpdater(event_queue, task.id, task.contextId).reject(
+                new_agent_text_message(str(e), task.contextId, task.id)
+            )
+            return
+        if not admitted:
+            return
+
+        start = time.monotonic()
+        try:
+            await self.executor.execute(context, event_queue)
+        finally:
+            self.controller.observe(time.monotonic() - start)
+            self.controller.release()
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        if context.task_id in self.waiting:
+            await self.waiting.cancel(context, event_queue)
+        else:
+            await self.executor.cancel(context, event_queue)
+
+# =============================================================================
+# OUTGOING LLM RATE LIMITS
+# =============================================================================
+
+class TokenBucket(BaseRateLimiter):
+    """Token bucket for outgoing model requests, usable as a chat model's rate_limiter.
+
+    Allows bursts of `capacity` requests and `rate` requests per second on
+    average. Callers reserve a token and sleep exactly until it is available,
+    so waiting requests are served in arrival order without polling.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, blocking: bool) -> Optional[float]:
+        """Take a token and return how long to wait for it, None if not blocking and none is free"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1 and not blocking:
+                return None
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        wait = self._reserve(blocking)
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        wait = self._reserve(blocking)
+        if wait is None:
+            return False
+        if wait:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # The request was abandoned before it went out, give its token back
+                with self._lock:
+                    self.tokens += 1
+                raise
+        return True
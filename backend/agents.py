@@ -1,62 +1,705 @@
 
-from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_openai import ChatOpenAI
+import asyncio
+import importlib.util
+import os
+from dataclasses import replace
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import uuid4
+
+import httpx
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
 
 from a2a_flights import flights_agent_card
 from a2a_hotels import hotels_agent_card
 from a2a.types import AgentCard
+from admission import TokenBucket
+from availability import get_availability
+from booking import BookingPipeline, BookingRequest, FakeSupplier, idempotency_key
+from checkpointer import BoundedMemorySaver
+from fast_path import plan_flight_search, plan_hotel_search, render_flights, render_hotels
+from history import HistoryCompactor
+from inventory import get_inventory, normalize_room_type, parse_day
+from itineraries import search_itineraries as plan_itineraries
+from normalize import normalize_city_code, normalize_city_name, normalize_date
+from records import Hotel, as_data, compact
+from response_cache import BOOKING_TOOLS, ResponseCache, thread_fingerprint
+from slots import extract_flight_slots, extract_hotel_slots
+from telemetry import langchain_callbacks, metrics, span
+from tool_cache import ToolCache, cached_tool
+
+# Search results are deterministic for their (normalized) arguments, so popular
+# routes are served from memory instead of hitting the supplier again
+search_cache = ToolCache(
+    max_size=int(os.getenv("TOOL_CACHE_MAX_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("TOOL_CACHE_TTL_SECONDS", "300")),
+)
+
+# Hotels listed per search
+HOTEL_RESULTS = 5
+
+# Bounds on the itinerary search space a single tool call may ask for
+MAX_FLEXIBLE_DAYS = 7
+MAX_STOPS = 2
+
+def normalize_flight_args(args: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "departure": normalize_city_code(args["departure"]),
+        "destination": normalize_city_code(args["destination"]),
+        "date": normalize_date(args["date"]),
+        "sort_by": "duration" if str(args["sort_by"]).strip().lower() == "duration" else "price",
+    }
+
+def normalize_itinerary_args(args: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        **normalize_flight_args(args),
+        "flexible_days": min(max(int(args["flexible_days"]), 0), MAX_FLEXIBLE_DAYS),
+        "max_stops": min(max(int(args["max_stops"]), 0), MAX_STOPS),
+    }
+
+def normalize_hotel_args(args: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "city": normalize_city_name(args["city"]),
+        "checkin": normalize_date(args["checkin"]),
+        "checkout": normalize_date(args["checkout"]),
+        "room_type": normalize_room_type(args["room_type"]),
+    }
+
+# Booking writes are batched per supplier and deduplicated by idempotency key,
+# so a retried request never books twice
+flight_bookings = BookingPipeline(
+    FakeSupplier("airline", prefix="FL"),
+    max_batch=int(os.getenv("BOOKING_BATCH_MAX_SIZE", "20")),
+    max_delay=float(os.getenv("BOOKING_BATCH_MAX_DELAY_MS", "10")) / 1000,
+)
+hotel_bookings = BookingPipeline(
+    FakeSupplier("hotel", prefix="HT"),
+    max_batch=int(os.getenv("BOOKING_BATCH_MAX_SIZE", "20")),
+    max_delay=float(os.getenv("BOOKING_BATCH_MAX_DELAY_MS", "10")) / 1000,
+)
+
+def booking_scope(config: Optional[RunnableConfig]) -> str:
+    """The A2A task a booking belongs to, or the conversation when run outside one"""
+    configurable = (config or {}).get("configurable", {})
+    return configurable.get("task_id") or configurable.get("thread_id") or ""
 
 # Define tools for Flights agent
-def get_flights(departure: str = "NYC", destination: str = "LAX", date: str = "2024-07-01") -> str:
-    """Get available flights between cities"""
-    flights = [
-        f"Flight AA101: {departure} to {destination} on {date} - $299",
-        f"Flight UA202: {departure} to {destination} on {date} - $315",
-        f"Flight DL303: {departure} to {destination} on {date} - $289"
-    ]
-    return f"Available flights: {', '.join(flights)}"
-
-def book_flight(flight_number: str, passenger_name: str = "John Doe") -> str:
+@tool(response_format="content_and_artifact")
+@cached_tool(search_cache, normalize=normalize_flight_args)
+def get_flights(
+    departure: str, destination: str, date: str, sort_by: str = "price"
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Get available flights between cities, best first by "price" or "duration". Returns a table of flights with prices in USD."""
+    day = parse_day(date)
+    if day is None:
+        return f"Could not understand the date '{date}', please give it as YYYY-MM-DD.", None
+    flights = get_inventory().search_flights(departure, destination, day, sort_by=sort_by)
+    return compact("flights", flights), as_data("flights", flights)
+
+async def book_flight(flight_number: str, passenger_name: str = "John Doe", config: RunnableConfig = None) -> str:
     """Book a specific flight"""
-    return f"Flight {flight_number} successfully booked for {passenger_name}. Confirmation: FL{flight_number[-3:]}{passenger_name[:2].upper()}123"
+    details = {"flight_number": flight_number, "passenger_name": passenger_name}
+    result = await flight_bookings.book(
+        BookingRequest(idempotency_key(booking_scope(config), "book_flight", details), details)
+    )
+    if not result.ok:
+        return f"Flight {flight_number} could not be booked: {result.error}"
+    return f"Flight {flight_number} successfully booked for {passenger_name}. Confirmation: {result.confirmation}"
+
+@tool(response_format="content_and_artifact")
+@cached_tool(search_cache, normalize=normalize_itinerary_args)
+def search_itineraries(
+    departure: str,
+    destination: str,
+    date: str,
+    flexible_days: int = 0,
+    max_stops: int = 1,
+    sort_by: str = "price",
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Find the best direct and connecting itineraries departing within flexible_days (up to 7) of the date,
+    with up to max_stops (up to 2) connections, best first by "price" or "duration". Use this instead of
+    repeated get_flights calls for flexible dates or routes without direct flights."""
+    day = parse_day(date)
+    if day is None:
+        return f"Could not understand the date '{date}', please give it as YYYY-MM-DD.", None
+    with span("itinerary_search", flexible_days=flexible_days, max_stops=max_stops):
+        itineraries = plan_itineraries(
+            get_inventory(), departure, destination, day,
+            flexible_days=flexible_days, max_stops=max_stops, sort_by=sort_by,
+        )
+    return compact("itineraries", itineraries), as_data("itineraries", itineraries)
 
 # Define tools for Hotels agent
-def get_hotels(city: str = "Los Angeles", checkin: str = "2024-07-01", checkout: str = "2024-07-03") -> str:
-    """Get available hotels in a city"""
-    hotels = [
-        f"Marriott Downtown {city}: ${150}/night ({checkin} to {checkout})",
-        f"Hilton Garden Inn {city}: ${120}/night ({checkin} to {checkout})",
-        f"Holiday Inn Express {city}: ${95}/night ({checkin} to {checkout})"
-    ]
-    return f"Available hotels: {', '.join(hotels)}"
-
-def book_hotel(hotel_name: str, guest_name: str = "John Doe", checkin: str = "2024-07-01", checkout: str = "2024-07-03") -> str:
-    """Book a specific hotel"""
-    return f"Hotel {hotel_name} successfully booked for {guest_name} from {checkin} to {checkout}. Confirmation: HT{hotel_name[:3].upper()}{guest_name[:2].upper()}456"
+STAY_ORDER_MESSAGE = "The checkout date must be after the checkin date, please check the stay dates."
+
+# Stay prices are cached, room availability changes with every booking and is applied per call
+@cached_tool(search_cache, normalize=normalize_hotel_args)
+def price_stays(
+    city: str, checkin: str, checkout: str, room_type: str = "standard"
+) -> List[Hotel]:
+    """Every hotel of a city with a rate for each night of the stay, cheapest first"""
+    first, last = parse_day(checkin), parse_day(checkout)
+    if first is None or last is None:
+        return []
+    return get_inventory().search_hotels(city, first, last, room_type=room_type, limit=None)
+
+@tool(response_format="content_and_artifact")
+async def get_hotels(
+    city: str, checkin: str, checkout: str, room_type: str = "standard"
+) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Get hotels in a city with rooms free for the whole stay, cheapest first. room_type is "standard" or "suite". Returns a table of hotels with prices in USD."""
+    args = normalize_hotel_args({"city": city, "checkin": checkin, "checkout": checkout, "room_type": room_type})
+    first, last = parse_day(args["checkin"]), parse_day(args["checkout"])
+    if first is None or last is None:
+        return "Could not understand the stay dates, please give them as YYYY-MM-DD.", None
+    if last <= first:
+        return STAY_ORDER_MESSAGE, None
+    stays = await price_stays(**args)
+    with span("availability_lookup"):
+        rooms_left = await get_availability().city_availability(args["city"], args["room_type"], first, last)
+    inventory = get_inventory()
+    hotels = []
+    for stay in stays:
+        rooms = rooms_left.get(inventory.hotel_id(stay.name), 0)
+        if rooms:
+            hotels.append(replace(stay, rooms_available=rooms))
+            if len(hotels) == HOTEL_RESULTS:
+                break
+    return compact("hotels", hotels), as_data("hotels", hotels)
+
+async def book_hotel(
+    hotel_name: str,
+    checkin: str,
+    checkout: str,
+    guest_name: str = "John Doe",
+    room_type: str = "standard",
+    config: RunnableConfig = None,
+) -> str:
+    """Book a room at a specific hotel"""
+    details = {
+        "hotel_name": hotel_name,
+        "guest_name": guest_name,
+        "checkin": normalize_date(checkin),
+        "checkout": normalize_date(checkout),
+        "room_type": normalize_room_type(room_type),
+    }
+    first, last = parse_day(details["checkin"]), parse_day(details["checkout"])
+    if first is None or last is None:
+        return "Could not understand the stay dates, please give them as YYYY-MM-DD."
+    if last <= first:
+        return STAY_ORDER_MESSAGE
+    hotel = get_inventory().hotel_id(hotel_name)
+    if hotel is None:
+        return f"Hotel {hotel_name} was not found, search with get_hotels first."
+
+    # The room is held before the supplier call and given back if the booking fails;
+    # a retry with the same key keeps the room it already holds, or its confirmation
+    key = idempotency_key(booking_scope(config), "book_hotel", details)
+    result = await hotel_bookings.recorded(key)
+    if result is None:
+        availability = get_availability()
+        if not await availability.reserve(key, hotel, details["room_type"], first, last):
+            return f"Hotel {hotel_name} has no {details['room_type']} rooms free from {checkin} to {checkout}."
+        try:
+            result = await hotel_bookings.book(BookingRequest(key, details))
+        except Exception:
+            await availability.release(key)
+            raise
+        if not result.ok:
+            await availability.release(key)
+            return f"Hotel {hotel_name} could not be booked: {result.error}"
+    return f"Hotel {hotel_name} successfully booked for {guest_name} from {checkin} to {checkout}. Confirmation: {result.confirmation}"
+
+# =============================================================================
+# MODEL / GRAPH REGISTRY
+# =============================================================================
+
+class ModelRegistry:
+    """Process-wide cache of chat models and compiled agent graphs.
+
+    Models share pooled async HTTP clients, one per named pool (a model
+    cascade keeps each tier in its own), so agents and executors living in
+    the same worker reuse keep-alive connections instead of each opening
+    their own pool. Compiled graphs are cached by (model, tools, prompt)
+    and each one owns a single checkpointer shared by every agent using it,
+    created by `checkpointer_factory(name)` where name identifies the graph
+    by its tools (stable across worker processes). Checkpointers with a
+    stats() method are reported as travel_checkpoint_* metrics.
+
+    Models are built by `model_factory`, which takes the ChatOpenAI keyword
+    arguments; benchmarks swap in a fake model there. It defaults to
+    ChatOpenAI, imported on the first model built, and graphs are compiled on
+    first use, so importing this module stays cheap for a fast startup. With
+    `requests_per_second`, models of the same name and API key share a token
+    bucket that paces their outgoing requests; a model can also be given
+    its own rate.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True,
+        checkpointer_factory: Callable[[str], BaseCheckpointSaver] = lambda name: BoundedMemorySaver(),
+        model_factory: Optional[Callable[..., BaseChatModel]] = None,
+        requests_per_second: Optional[float] = None,
+        request_burst: Optional[float] = None,
+    ):
+        self.checkpointer_factory = checkpointer_factory
+        self.model_factory = model_factory
+        self.requests_per_second = requests_per_second
+        self.request_burst = request_burst
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        # Clients dropped by configure() while no event loop was running, closed by aclose()
+        self._retired_clients: List[httpx.AsyncClient] = []
+        self._closing: Set[asyncio.Task] = set()
+        self._models: Dict[Tuple, BaseChatModel] = {}
+        self._graphs: Dict[Tuple, Any] = {}
+        self._rate_limiters: Dict[Tuple, TokenBucket] = {}
+        self.configure(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            http2=http2,
+        )
+
+    def configure(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        checkpointer_factory: Optional[Callable[[str], BaseCheckpointSaver]] = None,
+        model_factory: Optional[Callable[..., BaseChatModel]] = None,
+        requests_per_second: Optional[float] = None,
+        request_burst: Optional[float] = None,
+    ) -> None:
+        """Change the connection pool settings, the model class or where graphs keep their checkpoints.
+
+        Cached models and graphs are dropped so the next lookup is built on a
+        client with the new limits, and the old clients are closed. Agents
+        created earlier keep their old model on a closed client, so call this
+        at startup before constructing agents.
+        """
+        if checkpointer_factory is not None:
+            self.checkpointer_factory = checkpointer_factory
+        if model_factory is not None:
+            self.model_factory = model_factory
+        if requests_per_second is not None:
+            self.requests_per_second = requests_per_second or None
+        if request_burst is not None:
+            self.request_burst = request_burst
+        if max_connections is not None:
+            self.max_connections = max_connections
+        if max_keepalive_connections is not None:
+            self.max_keepalive_connections = max_keepalive_connections
+        if keepalive_expiry is not None:
+            self.keepalive_expiry = keepalive_expiry
+        if http2 is not None:
+            # HTTP/2 needs the optional h2 package, fall back to HTTP/1.1 without it
+            self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self._retire_http_clients()
+        self._models.clear()
+        self._graphs.clear()
+        self._rate_limiters.clear()
+
+    def _retire_http_clients(self) -> None:
+        """Drop the pooled clients, closing them on the running event loop or else in aclose()"""
+        clients, self._http_clients = list(self._http_clients.values()), {}
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._retired_clients += clients
+            return
+        for client in clients:
+            task = loop.create_task(client.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    def get_http_client(self, pool: str = "default") -> httpx.AsyncClient:
+        """Return the pooled async HTTP client named `pool`, creating it on first use"""
+        client = self._http_clients.get(pool)
+        if client is None or client.is_closed:
+            client = self._http_clients[pool] = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(60.0, connect=5.0),
+            )
+        return client
+
+    def get_rate_limiter(
+        self,
+        model: str,
+        api_key: Optional[str] = None,
+        requests_per_second: Optional[float] = None,
+        request_burst: Optional[float] = None,
+    ) -> Optional[TokenBucket]:
+        """Return the token bucket shared by requests to `model` with `api_key`, if rate limiting is on.
+
+        `requests_per_second` overrides the registry-wide rate for this model.
+        """
+        rate = requests_per_second or self.requests_per_second
+        if not rate:
+            return None
+        key = (model, api_key)
+        if key not in self._rate_limiters:
+            self._rate_limiters[key] = TokenBucket(rate, request_burst or self.request_burst)
+        return self._rate_limiters[key]
+
+    def get_model(
+        self,
+        model: str = "gpt-4o",
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        temperature: float = 0,
+        pool: str = "default",
+        requests_per_second: Optional[float] = None,
+        request_burst: Optional[float] = None,
+        **model_kwargs: Any,
+    ) -> BaseChatModel:
+        """Return a chat model bound to the HTTP client of `pool`, extra keyword arguments go to the model"""
+        key = (model, api_key, base_url, temperature, pool, tuple(sorted(model_kwargs.items())))
+        if key not in self._models:
+            if self.model_factory is None:
+                from langchain_openai import ChatOpenAI
+                self.model_factory = ChatOpenAI
+            self._models[key] = self.model_factory(
+                model=model,
+                api_key=api_key,
+                base_url=base_url,
+                temperature=temperature,
+                http_async_client=self.get_http_client(pool),
+                # Token usage on the last streamed chunk, for the token metrics
+                stream_usage=True,
+                rate_limiter=self.get_rate_limiter(model, api_key, requests_per_second, request_burst),
+                **model_kwargs,
+            )
+        return self._models[key]
+
+    def get_cascade(self, small: BaseChatModel, large: BaseChatModel, agent: str = "", min_confidence: float = 0.0) -> BaseChatModel:
+        """Return the model cascade from `small` to `large`, one per agent so graphs stay cached"""
+        key = ("cascade", id(small), id(large), agent, min_confidence)
+        if key not in self._models:
+            from cascade import CascadeChatModel
+            self._models[key] = CascadeChatModel(small=small, large=large, agent=agent, min_confidence=min_confidence)
+        return self._models[key]
+
+    def get_graph(
+        self,
+        model: BaseChatModel,
+        tools: Sequence[Callable],
+        prompt: str,
+        history_max_tokens: Optional[int] = None,
+        summarize_history: bool = False,
+    ):
+        """Return a compiled ReAct graph for (model, tools, prompt), compiling it once
+
+        With `history_max_tokens`, a HistoryCompactor trims (and optionally
+        summarizes) the conversation before every model call.
+        """
+        key = (id(model), tuple(id(t) for t in tools), prompt, history_max_tokens, summarize_history)
+        if key not in self._graphs:
+            from langgraph.prebuilt import create_react_agent
+
+            pre_model_hook = None
+            if history_max_tokens is not None:
+                pre_model_hook = HistoryCompactor(
+                    max_tokens=history_max_tokens,
+                    summary_model=model if summarize_history else None,
+                )
+            name = "+".join(getattr(t, "name", None) or t.__name__ for t in tools)
+            checkpointer = self.checkpointer_factory(name)
+            if hasattr(checkpointer, "stats"):
+                # Conversation memory per graph, measured at scrape time
+                metrics.add_checkpointer(name, checkpointer.stats)
+            self._graphs[key] = create_react_agent(
+                model,
+                tools=list(tools),
+                checkpointer=checkpointer,
+                prompt=prompt,
+                pre_model_hook=pre_model_hook,
+            )
+        return self._graphs[key]
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP clients, including those dropped by configure()"""
+        clients = list(self._http_clients.values()) + self._retired_clients
+        self._http_clients, self._retired_clients = {}, []
+        for client in clients:
+            await client.aclose()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+# Pool limits can be tuned per deployment through the environment
+registry = ModelRegistry(
+    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20")),
+    keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+    http2=os.getenv("LLM_HTTP2", "true").lower() == "true",
+    # Outgoing model requests per second per model and API key, 0 means unlimited
+    requests_per_second=float(os.getenv("LLM_REQUESTS_PER_SECOND", "0")),
+    request_burst=float(os.getenv("LLM_REQUEST_BURST")) if os.getenv("LLM_REQUEST_BURST") else None,
+    # Conversation memory stays bounded no matter how many threads go through a worker
+    checkpointer_factory=lambda name: BoundedMemorySaver(
+        max_threads=int(os.getenv("CHECKPOINT_MAX_THREADS", "1000")),
+        ttl_seconds=float(os.getenv("CHECKPOINT_TTL_SECONDS", "3600")),
+        keep_checkpoints=int(os.getenv("CHECKPOINT_KEEP", "2")),
+    ),
+)
+
+# LLM_BACKEND=fake serves every agent from a scripted local model, for load tests without an API key
+if os.getenv("LLM_BACKEND", "openai").lower() == "fake":
+    from fake_llm import fake_model_factory_from_env
+    registry.configure(model_factory=fake_model_factory_from_env())
+
+# Per-conversation prompt budget, older turns are trimmed or summarized away
+HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "3000"))
+HISTORY_SUMMARIZE = os.getenv("HISTORY_SUMMARIZE", "false").lower() == "true"
+
+# =============================================================================
+# MODEL CASCADE
+# =============================================================================
+
+def agent_model(agent: str, openai_api_key: str, base_url: Optional[str] = None) -> BaseChatModel:
+    """The model an agent runs on: gpt-4o, or a cascade to it from a small model.
+
+    FLIGHTS_SMALL_MODEL / HOTELS_SMALL_MODEL (or LLM_SMALL_MODEL for every
+    agent) turn the cascade on. The small tier may be served elsewhere, e.g.
+    a local OpenAI-compatible server (LLM_SMALL_BASE_URL, LLM_SMALL_API_KEY),
+    and has its own connection pool and rate limit
+    (LLM_SMALL_REQUESTS_PER_SECOND, LLM_SMALL_REQUEST_BURST). Text replies
+    whose mean token probability is under LLM_CASCADE_MIN_CONFIDENCE go to
+    the large model, 0 judges them by their wording only.
+    """
+    large = registry.get_model(model="gpt-4o", api_key=openai_api_key, base_url=base_url, temperature=0)
+    small_model = os.getenv(f"{agent.upper()}_SMALL_MODEL") or os.getenv("LLM_SMALL_MODEL")
+    if not small_model:
+        return large
+    min_confidence = float(os.getenv("LLM_CASCADE_MIN_CONFIDENCE", "0.8"))
+    small_burst = os.getenv("LLM_SMALL_REQUEST_BURST")
+    small = registry.get_model(
+        model=small_model,
+        api_key=os.getenv("LLM_SMALL_API_KEY") or openai_api_key,
+        base_url=os.getenv("LLM_SMALL_BASE_URL") or base_url,
+        temperature=0,
+        pool="small",
+        requests_per_second=float(os.getenv("LLM_SMALL_REQUESTS_PER_SECOND", "0")) or None,
+        request_burst=float(small_burst) if small_burst else None,
+        # Token probabilities are what the confidence check reads
+        **({"logprobs": True} if min_confidence > 0 else {}),
+    )
+    return registry.get_cascade(small, large, agent=agent, min_confidence=min_confidence)
+
+# Opt-in cache of final answers for repeated search queries
+response_cache = ResponseCache(
+    max_size=int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "512")),
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600")),
+    similarity_threshold=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.85")),
+) if os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true" else None
+
+# =============================================================================
+# SPECULATIVE PREFETCH
+# =============================================================================
+
+PREFETCH_ENABLED = os.getenv("TOOL_PREFETCH_ENABLED", "true").lower() == "true"
+
+TOOL_PREFETCHES = metrics.counter(
+    "travel_tool_prefetch_total", "Searches started from the user query before the model asked for them", ("tool",)
+)
+
+_prefetches: Set[asyncio.Task] = set()
+
+def prefetch_search(namespace: str, query: str) -> None:
+    """Start the search a query most likely leads to, concurrently with the first model call.
+
+    The arguments are parsed from the query locally, and nothing is started
+    unless all of them are there. The search goes through the tool cache, so
+    when the model asks for it the call joins the one in flight or finds the
+    result, instead of starting after the model's answer.
+    """
+    if namespace == "flights":
+        name, search, args = "get_flights", get_flights.coroutine, extract_flight_slots(query)
+    elif namespace == "hotels":
+        name, search, args = "get_hotels", price_stays, extract_hotel_slots(query)
+    else:
+        return
+    if args is None:
+        return
+    TOOL_PREFETCHES.inc(tool=name)
+    task = asyncio.create_task(search(**args))
+    _prefetches.add(task)
+    task.add_done_callback(_prefetch_done)
+
+def _prefetch_done(task: asyncio.Task) -> None:
+    _prefetches.discard(task)
+    # A failed prefetch is reported by the model's own call, if it makes one
+    if not task.cancelled():
+        task.exception()
+
+# =============================================================================
+# FAST PATH
+# =============================================================================
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+
+FAST_PATH_ANSWERS = metrics.counter(
+    "travel_fast_path_answers_total", "Search queries answered from a template without calling the model", ("agent",)
+)
+
+def plan_search(namespace: str, query: str) -> Optional[Tuple[Any, Dict[str, str], Callable[..., str]]]:
+    """(tool, arguments, answer template) for a query that is a plain, fully specified search, else None"""
+    if namespace == "flights":
+        search, args, render = get_flights, plan_flight_search(query), render_flights
+    elif namespace == "hotels":
+        search, args, render = get_hotels, plan_hotel_search(query), render_hotels
+    else:
+        return None
+    return None if args is None else (search, args, render)
+
+async def answer_search(agent, query: str, config: RunnableConfig, plan) -> AsyncIterator[Dict[str, Any]]:
+    """Run a planned search and answer from its template, yielding the events stream_agent would.
+
+    The turn is written to the thread's checkpoint as if the model had made
+    the tool call and given the answer, so a follow-up ("book the second
+    one for Jane") goes to the model with the search results in context.
+    """
+    search, args, render = plan
+    call = {"name": search.name, "args": args, "id": f"call_{uuid4().hex}", "type": "tool_call"}
+    yield {"type": "tool_call", "name": search.name, "args": args}
+    result: ToolMessage = await search.ainvoke(call, config)
+    event = {"type": "tool_result", "name": search.name, "content": result.content}
+    if isinstance(result.artifact, dict):
+        event["data"] = result.artifact
+    yield event
+
+    records = next(iter(result.artifact.values()), []) if isinstance(result.artifact, dict) else []
+    answer = render(args, records)
+    await agent.aupdate_state(
+        config,
+        {"messages": [HumanMessage(content=query), AIMessage(content="", tool_calls=[call]), result, AIMessage(content=answer)]},
+        as_node="agent",
+    )
+    yield {"type": "token", "content": answer}
+    yield {"type": "done", "content": answer, "fast_path": True}
+
+# =============================================================================
+# STREAMING
+# =============================================================================
+
+async def stream_agent(
+    agent,
+    query: str,
+    thread_id: str,
+    response_cache: Optional[ResponseCache] = None,
+    namespace: str = "",
+    task_id: Optional[str] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Run a compiled ReAct agent and yield its progress as it happens.
+
+    Yields dicts with a "type" key:
+      - "token": a chunk of model output text ("content")
+      - "tool_call": the model asked for a tool ("name", "args")
+      - "tool_result": a tool finished ("name", "content", and "data" for structured results)
+      - "done": the run finished, "content" holds the full final answer
+
+    Plain, fully specified searches are answered without the model (see
+    answer_search). With a response cache, answers to repeated search queries
+    in the same conversation state are replayed without running the agent. `task_id`
+    scopes the idempotency keys of bookings made during the run.
+    """
+    configurable = {"thread_id": thread_id}
+    if task_id:
+        configurable["task_id"] = task_id
+    config = {"configurable": configurable, "callbacks": langchain_callbacks()}
+    final_content = ""
+
+    if FAST_PATH_ENABLED:
+        with span("fast_path_plan"):
+            plan = plan_search(namespace, query)
+        if plan is not None:
+            FAST_PATH_ANSWERS.inc(agent=namespace)
+            async for event in answer_search(agent, query, config, plan):
+                yield event
+            return
+
+    if response_cache is not None:
+        with span("response_cache_lookup"):
+            state = await agent.aget_state(config)
+            state_key = thread_fingerprint(state.values.get("messages", []))
+            cached = response_cache.lookup(namespace, query, state_key)
+        if cached is not None:
+            # Record the turn so follow-up questions still see it
+            await agent.aupdate_state(
+                config,
+                {"messages": [HumanMessage(content=query), AIMessage(content=cached)]},
+                as_node="agent",
+            )
+            yield {"type": "token", "content": cached}
+            yield {"type": "done", "content": cached, "cached": True}
+            return
+    if PREFETCH_ENABLED:
+        prefetch_search(namespace, query)
+    used_tools = set()
+
+    async for mode, chunk in agent.astream(
+        {"messages": [("user", query)]},
+        config=config,
+        stream_mode=["messages", "updates"],
+    ):
+        if mode == "messages":
+            message, metadata = chunk
+            # Token chunks from the model node only; tool outputs arrive via "updates"
+            if metadata.get("langgraph_node") != "agent":
+                continue
+            if isinstance(message, (AIMessageChunk, AIMessage)) and isinstance(message.content, str) and message.content:
+                yield {"type": "token", "content": message.content}
+        else:
+            for node, update in chunk.items():
+                # Skip the history hook, which may re-emit earlier messages when compacting
+                if node not in ("agent", "tools"):
+                    continue
+                for message in (update or {}).get("messages", []):
+                    if isinstance(message, AIMessage):
+                        for tool_call in message.tool_calls:
+                            used_tools.add(tool_call["name"])
+                            yield {"type": "tool_call", "name": tool_call["name"], "args": tool_call["args"]}
+                        if not message.tool_calls:
+                            final_content = message.content
+                    elif isinstance(message, ToolMessage):
+                        result = {"type": "tool_result", "name": message.name, "content": message.content}
+                        if isinstance(message.artifact, dict):
+                            result["data"] = message.artifact
+                        yield result
+
+    if response_cache is not None and not used_tools & BOOKING_TOOLS:
+        response_cache.store(namespace, query, final_content, state_key)
+    yield {"type": "done", "content": final_content}
 
 # =============================================================================
 # AGENT CLASSES
 # =============================================================================
 
 class FlightsAgent:
-    def __init__(self, openai_api_key: str):
+    def __init__(self, openai_api_key: str, base_url: str = None, cache: Optional[ResponseCache] = response_cache):
         self.agent_card = flights_agent_card
+        self.response_cache = cache
         
-        # Initialize OpenAI model
-        self.model = ChatOpenAI(
-            model="gpt-4o",
-            api_key=openai_api_key,
-            temperature=0
-        )
-        
-        # Initialize memory
-        self.memory = MemorySaver()
+        # Shared OpenAI model (or model cascade) from the process-wide registry
+        self.model = agent_model("flights", openai_api_key, base_url)
         
         # System instruction for flights agent
         system_instruction = """You are a helpful flight booking assistant with the following capabilities:
         1. Flight Search: Search for available flights between cities on specific dates
-        2. Flight Booking: Book flights for passengers with confirmation details
+        2. Itinerary Search: Find connecting itineraries and the best options across flexible dates in one search
+        3. Flight Booking: Book flights for passengers with confirmation details
         
         Always be helpful and provide clear information about flight options and booking confirmations.
         When searching flights, ask for departure city, destination city, and travel date if not provided.
@@ -64,45 +707,44 @@ class FlightsAgent:
         
         You are part of the Agent 2 Agent protocol and can collaborate with other agents for comprehensive travel planning."""
         
-        # Create the agent with tools
-        self.agent = create_react_agent(
+        # Compiled agent graph, shared with every agent built from the same model/tools/prompt
+        self.agent = registry.get_graph(
             self.model,
-            tools=[get_flights, book_flight],
-            checkpointer=self.memory,
-            prompt=system_instruction
+            tools=[get_flights, search_itineraries, book_flight],
+            prompt=system_instruction,
+            history_max_tokens=HISTORY_MAX_TOKENS,
+            summarize_history=HISTORY_SUMMARIZE
         )
+        self.memory = self.agent.checkpointer
         
     async def run(self, query: str, thread_id: str = "flights_thread") -> str:
         """Execute the agent with the given query"""
         try:
-            config = {"configurable": {"thread_id": thread_id}}
-            response = await self.agent.ainvoke({"messages": [("user", query)]}, config=config)
-            return response["messages"][-1].content
+            async for event in self.stream(query, thread_id):
+                if event["type"] == "done":
+                    return event["content"]
         except Exception as e:
             return f"Error processing query: {str(e)}"
+
+    def stream(self, query: str, thread_id: str = "flights_thread", task_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Execute the agent with the given query, yielding tokens and tool calls as they arrive"""
+        return stream_agent(self.agent, query, thread_id, self.response_cache, namespace="flights", task_id=task_id)
     
     def get_agent_card(self) -> AgentCard:
         """Return the agent card for A2A protocol"""
         return self.agent_card
 
 class HotelsAgent:
-    def __init__(self, openai_api_key: str, base_url: str = None):
+    def __init__(self, openai_api_key: str, base_url: str = None, cache: Optional[ResponseCache] = response_cache):
         self.agent_card = hotels_agent_card
+        self.response_cache = cache
         
-        # Initialize OpenAI model
-        self.model = ChatOpenAI(
-            model="gpt-4o",
-            api_key=openai_api_key,
-            base_url=base_url,
-            temperature=0
-        )
-        
-        # Initialize memory
-        self.memory = MemorySaver()
+        # Shared OpenAI model (or model cascade) from the process-wide registry
+        self.model = agent_model("hotels", openai_api_key, base_url)
         
         # System instruction for hotels agent
         system_instruction = """You are a helpful hotel booking assistant with the following capabilities:
-        1. Hotel Search: Search for available hotels in cities based on dates
+        1. Hotel Search: Search for hotels with standard rooms or suites free for the requested dates
         2. Hotel Booking: Book hotel reservations for guests with confirmation details
         
         Always be helpful and provide clear information about hotel options and booking confirmations.
@@ -111,61 +753,29 @@ class HotelsAgent:
         
         You are part of the Agent 2 Agent protocol and can collaborate with other agents for comprehensive travel planning."""
         
-        # Create the agent with tools
-        self.agent = create_react_agent(
+        # Compiled agent graph, shared with every agent built from the same model/tools/prompt
+        self.agent = registry.get_graph(
             self.model,
             tools=[get_hotels, book_hotel],
-            checkpointer=self.memory,
-            prompt=system_instruction
+            prompt=system_instruction,
+            history_max_tokens=HISTORY_MAX_TOKENS,
+            summarize_history=HISTORY_SUMMARIZE
         )
+        self.memory = self.agent.checkpointer
         
     async def run(self, query: str, thread_id: str = "hotels_thread") -> str:
         """Execute the agent with the given query"""
         try:
-            config = {"configurable": {"thread_id": thread_id}}
-            response = await self.agent.ainvoke({"messages": [("user", query)]}, config=config)
-            return response["messages"][-1].content
+            async for event in self.stream(query, thread_id):
+                if event["type"] == "done":
+                    return event["content"]
         except Exception as e:
             return f"Error processing query: {str(e)}"
+
+    def stream(self, query: str, thread_id: str = "hotels_thread", task_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Execute the agent with the given query, yielding tokens and tool calls as they arrive"""
+        return stream_agent(self.agent, query, thread_id, self.response_cache, namespace="hotels", task_id=task_id)
     
     def get_agent_card(self) -> AgentCard:
         """Return the agent card for A2A protocol"""
         return self.agent_card
-
-# =============================================================================
-# COMBINED TRAVEL AGENT CARD (PUBLIC CARD)
-# =============================================================================
-
-# Combined skills for the public agent card
-# combined_skills = [flights_skill1, flights_skill2, hotels_skill1, hotels_skill2]
-
-# # Public agent card that represents the combined travel agent system
-# public_agent_card = AgentCard(
-#     name='Travel Booking Agent',
-#     description='Comprehensive AI travel agent that can handle both flight and hotel bookings. Specialized in searching for and booking flights and accommodations with complete confirmation services.',
-#     url='http://localhost:9999/',
-#     version='1.0.0',
-#     defaultInputModes=['text'],
-#     defaultOutputModes=['text'],
-#     capabilities=AgentCapabilities(streaming=True),
-#     skills=combined_skills
-# )
-
-# # Extended agent card with additional metadata
-# specific_extended_agent_card = {
-#     "agents": {
-#         "flights": flights_agent_card.dict(),
-#         "hotels": hotels_agent_card.dict()
-#     },
-#     "coordination": {
-#         "can_collaborate": True,
-#         "supports_multi_step_planning": True,
-#         "cross_agent_communication": True
-#     },
-#     "specializations": [
-#         "flight_search_and_booking",
-#         "hotel_search_and_booking", 
-#         "travel_planning",
-#         "reservation_management"
-#     ]
-# }
\ No newline at end of file
@@ -0,0 +1,129 @@
+from typing import Any, AsyncIterator, Dict, Optional
+from uuid import uuid4
+
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import Artifact, DataPart, Part, TaskArtifactUpdateEvent, TaskState, TextPart
+from a2a.utils import new_agent_text_message
+from telemetry import timed
+
+class ArtifactStreamer:
+    """Streams text into a single task artifact as appended chunks.
+
+    One chunk is held back so the last one can be flagged with lastChunk=True.
+    """
+
+    def __init__(
+        self,
+        event_queue: EventQueue,
+        task_id: str,
+        context_id: str,
+        name: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ):
+        self.event_queue = event_queue
+        self.task_id = task_id
+        self.context_id = context_id
+        self.name = name
+        self.metadata = metadata
+        self.artifact_id = str(uuid4())
+        self._pending: Optional[str] = None
+        self._sent = False
+
+    @property
+    def written(self) -> bool:
+        return self._sent or self._pending is not None
+
+    async def write(self, text: str) -> None:
+        if self._pending is not None:
+            await self._send(self._pending, last=False)
+        self._pending = text
+
+    async def close(self, text_if_empty: str = "") -> None:
+        """Send the held back chunk as the last one, or `text_if_empty` if nothing was written"""
+        if not self.written:
+            self._pending = text_if_empty
+        await self._send(self._pending or "", last=True)
+        self._pending = None
+
+    async def _send(self, text: str, last: bool) -> None:
+        with timed("enqueue"):
+            await self.event_queue.enqueue_event(
+                TaskArtifactUpdateEvent(
+                    taskId=self.task_id,
+                    contextId=self.context_id,
+                    artifact=Artifact(
+                        artifactId=self.artifact_id,
+                        name=self.name,
+                        parts=[Part(root=TextPart(text=text))],
+                        metadata=self.metadata,
+                    ),
+                    append=self._sent,
+                    lastChunk=last,
+                )
+            )
+        self._sent = True
+
+async def send_data_artifact(
+    event_queue: EventQueue,
+    task_id: str,
+    context_id: str,
+    name: str,
+    data: Dict[str, Any],
+    metadata: Optional[Dict[str, Any]] = None,
+) -> None:
+    """Send structured results as a complete artifact with a single DataPart"""
+    with timed("enqueue"):
+        await event_queue.enqueue_event(
+            TaskArtifactUpdateEvent(
+                taskId=task_id,
+                contextId=context_id,
+                artifact=Artifact(
+                    artifactId=str(uuid4()),
+                    name=name,
+                    parts=[Part(root=DataPart(data=data))],
+                    metadata=metadata,
+                ),
+                lastChunk=True,
+            )
+        )
+
+async def relay_agent_stream(
+    events: AsyncIterator[Dict[str, Any]],
+    updater: TaskUpdater,
+    streamer: ArtifactStreamer,
+    label: str = "",
+) -> str:
+    """Forward agent.stream() events to a task: tokens go to the artifact, tool calls
+    and remote progress become working status updates and structured tool results become data artifacts.
+    Closes the artifact and returns the final answer."""
+    final_content = ""
+    async for event in events:
+        if event["type"] == "token":
+            await streamer.write(event["content"])
+        elif event["type"] in ("tool_call", "status"):
+            prefix = f"[{label}] " if label else ""
+            # "status" is progress text relayed from a remote agent
+            text = event["content"] if event["type"] == "status" else f"Calling {event['name']}..."
+            with timed("enqueue"):
+                await updater.update_status(
+                    TaskState.working,
+                    new_agent_text_message(f"{prefix}{text}", updater.context_id, updater.task_id),
+                )
+        elif event["type"] == "tool_result" and event.get("data"):
+            metadata = {"tool": event["name"]}
+            if label:
+                metadata["agent_used"] = label
+            await send_data_artifact(
+                streamer.event_queue,
+                updater.task_id,
+                updater.context_id,
+                f"{event['name']}_results",
+                event["data"],
+                metadata,
+            )
+        elif event["type"] == "done":
+            final_content = event["content"]
+    # The model may not have streamed tokens, then the whole answer is sent at once
+    await streamer.close(final_content)
+    return final_content
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import threading
+from datetime import date
+from typing import Dict, Optional, Sequence, Tuple
+
+from inventory import Inventory, get_inventory
+from storage import KeyValueStore, store_lock
+
+class RangeMaxTree:
+    """Segment tree over days with range add and range max, both O(log n).
+
+    Holds the number of rooms booked each night: a stay fits if the maximum
+    over its nights is below the room count, and reserving adds one to every
+    night of it. Each node keeps the maximum of its subtree including the
+    adds made on whole subtree ranges, so nothing needs pushing down.
+    """
+
+    __slots__ = ("size", "max", "add")
+
+    def __init__(self, days: int):
+        size = 1
+        while size < days:
+            size *= 2
+        self.size = size
+        self.max = [0] * (2 * size)
+        self.add = [0] * (2 * size)
+
+    def update(self, lo: int, hi: int, delta: int, node: int = 1, left: int = 0, right: Optional[int] = None) -> None:
+        """Add `delta` to days [lo, hi)"""
+        right = self.size if right is None else right
+        if hi <= left or right <= lo:
+            return
+        if lo <= left and right <= hi:
+            self.add[node] += delta
+            self.max[node] += delta
+            return
+        middle = (left + right) // 2
+        self.update(lo, hi, delta, 2 * node, left, middle)
+        self.update(lo, hi, delta, 2 * node + 1, middle, right)
+        self.max[node] = max(self.max[2 * node], self.max[2 * node + 1]) + self.add[node]
+
+    def query(self, lo: int, hi: int, node: int = 1, left: int = 0, right: Optional[int] = None) -> int:
+        """Maximum over days [lo, hi)"""
+        right = self.size if right is None else right
+        if hi <= left or right <= lo:
+            return 0
+        if lo <= left and right <= hi:
+            return self.max[node]
+        middle = (left + right) // 2
+        # Only children overlapping the range count, a subtree's maximum may be below zero
+        if hi <= middle:
+            best = self.query(lo, hi, 2 * node, left, middle)
+        elif lo >= middle:
+            best = self.query(lo, hi, 2 * node + 1, middle, right)
+        else:
+            best = max(self.query(lo, hi, 2 * node, left, middle), self.query(lo, hi, 2 * node + 1, middle, right))
+        return self.add[node] + best
+
+class AvailabilityStore:
+    """Room availability per hotel and room type over the inventory's dates.
+
+    Room counts come from the inventory, bookings are held here as one
+    RangeMaxTree per hotel and room type, created on its first reservation.
+    Reservations are keyed by the booking's idempotency key, so a retried
+    booking holds its rooms once, and can be released if the booking fails.
+    Every check-and-update runs under one lock without awaiting, so it is
+    atomic for concurrent coroutines as well as for tools run in threads.
+
+    With a shared `store` the holds of every worker live there, one entry per
+    hotel and room type, changed under a store_lock. Each worker rebuilds its
+    trees from those entries when they change, so all workers see the same
+    calendar. Stays that have ended are dropped from those entries whenever
+    they are rewritten, and each hold's own entry expires after
+    `retention_seconds`, so neither grows with every past booking.
+    """
+
+    def __init__(self, inventory: Inventory, store: Optional[KeyValueStore] = None, retention_seconds: float = 86400.0):
+        self.inventory = inventory
+        self.store = store
+        self.retention_seconds = retention_seconds
+        self._booked: Dict[Tuple[int, str], RangeMaxTree] = {}
+        # idempotency key -> (hotel, room type, first night, end)
+        self._reservations: Dict[str, Tuple[int, str, int, int]] = {}
+        # Stored holds each tree was last built from, with a shared store
+        self._synced: Dict[Tuple[int, str], Optional[bytes]] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, store: Optional[KeyValueStore] = None) -> None:
+        """Share room holds with the other workers through a store"""
+        with self._lock:
+            self.store = store
+            self._booked.clear()
+            self._reservations.clear()
+            self._synced.clear()
+
+    def _nights(self, checkin: date, checkout: date) -> Optional[Tuple[int, int]]:
+        """Offsets of the stay's nights in the inventory horizon, None if outside it or empty"""
+        first = (checkin - self.inventory.start).days
+        end = (checkout - self.inventory.start).days
+        if first < 0 or end <= first or end > self.inventory.days:
+            return None
+        return first, end
+
+    def _rooms_left(self, hotel: int, room_type: str, first: int, end: int) -> int:
+        rooms = self.inventory.rooms(hotel, room_type)
+        booked = self._booked.get((hotel, room_type))
+        return rooms - booked.query(first, end) if booked is not None else rooms
+
+    @staticmethod
+    def _holds_key(hotel: int, room_type: str) -> str:
+        return f"holds|{hotel}|{room_type}"
+
+    def _sync(self, hotel: int, room_type: str, data: Optional[bytes]) -> None:
+        """Rebuild a tree from the stored holds of its hotel and room type if they changed"""
+        if self._synced.get((hotel, room_type)) == data:
+            return
+        self._synced[(hotel, room_type)] = data
+        if data is None:
+            self._booked.pop((hotel, room_type), None)
+            return
+        booked = self._booked[(hotel, room_type)] = RangeMaxTree(self.inventory.days)
+        for first, end in json.loads(data).values():
+            booked.update(first, end, 1)
+
+    def _current_holds(self, data: Optional[bytes]) -> Dict[str, list]:
+        """Stored holds of a hotel and room type without the stays that have ended"""
+        if data is None:
+            return {}
+        today = (date.today() - self.inventory.start).days
+        return {key: nights for key, nights in json.loads(data).items() if nights[1] > today}
+
+    async def _fetch(self, hotels: Sequence[int], room_type: str) -> None:
+        """Bring the trees of these hotels up to date with the shared store"""
+        if self.store is None:
+            return
+        data = await asyncio.gather(*(self.store.get(self._holds_key(hotel, room_type)) for hotel in hotels))
+        with self._lock:
+            for hotel, held in zip(hotels, data):
+                self._sync(hotel, room_type, held)
+
+    async def rooms_left(self, hotel: int, room_type: str, checkin: date, checkout: date) -> int:
+        """Rooms of a type free on every night of the stay"""
+        nights = self._nights(checkin, checkout)
+        if nights is None:
+            return 0
+        await self._fetch([hotel], room_type)
+        with self._lock:
+            return self._rooms_left(hotel, room_type, *nights)
+
+    async def city_availability(self, city: str, room_type: str, checkin: date, checkout: date) -> Dict[int, int]:
+        """Rooms of a type free for the stay at every hotel of a city with any, by hotel id"""
+        nights = self._nights(checkin, checkout)
+        if nights is None:
+            return {}
+        hotels = self.inventory.hotels_in(city)
+        await self._fetch(hotels, room_type)
+        with self._lock:
+            available = {hotel: self._rooms_left(hotel, room_type, *nights) for hotel in hotels}
+        return {hotel: rooms for hotel, rooms in available.items() if rooms > 0}
+
+    async def reserve(self, key: str, hotel: int, room_type: str, checkin: date, checkout: date) -> bool:
+        """Hold a room for the stay unless the key already holds one, False if none is free"""
+        nights = self._nights(checkin, checkout)
+        if nights is None:
+            return False
+        if self.store is not None:
+            return await self._reserve_shared(key, hotel, room_type, *nights)
+        with self._lock:
+            if key in self._reservations:
+                return True
+            if self._rooms_left(hotel, room_type, *nights) <= 0:
+                return False
+            booked = self._booked.get((hotel, room_type))
+            if booked is None:
+                booked = self._booked[(hotel, room_type)] = RangeMaxTree(self.inventory.days)
+            booked.update(*nights, 1)
+            self._reservations[key] = (hotel, room_type, *nights)
+            return True
+
+    async def _reserve_shared(self, key: str, hotel: int, room_type: str, first: int, end: int) -> bool:
+        holds_key = self._holds_key(hotel, room_type)
+        async with store_lock(self.store, holds_key):
+            data = await self.store.get(holds_key)
+            holds = self._current_holds(data)
+            if key in holds:
+                return True
+            with self._lock:
+                self._sync(hotel, room_type, data)
+                if self._rooms_left(hotel, room_type, first, end) <= 0:
+                    return False
+            holds[key] = [first, end]
+            data = json.dumps(holds).encode()
+            # The hold's own entry lets whichever worker retries the booking release it
+            await self.store.set(f"hold|{key}", json.dumps([hotel, room_type]).encode(), ttl=self.retention_seconds)
+            await self.store.set(holds_key, data)
+        with self._lock:
+            self._sync(hotel, room_type, data)
+        return True
+
+    async def release(self, key: str) -> bool:
+        """Give back the room held by `key`, False if it holds none"""
+        if self.store is not None:
+            return await self._release_shared(key)
+        with self._lock:
+            reservation = self._reservations.pop(key, None)
+            if reservation is None:
+                return False
+            hotel, room_type, first, end = reservation
+            self._booked[(hotel, room_type)].update(first, end, -1)
+            return True
+
+    async def _release_shared(self, key: str) -> bool:
+        hold = await self.store.get(f"hold|{key}")
+        if hold is None:
+            return False
+        hotel, room_type = json.loads(hold)
+        holds_key = self._holds_key(hotel, room_type)
+        async with store_lock(self.store, holds_key):
+            data = await self.store.get(holds_key)
+            holds = self._current_holds(data)
+            if holds.pop(key, None) is None:
+                return False
+            data = json.dumps(holds).encode()
+            await self.store.set(holds_key, data)
+            await self.store.delete(f"hold|{key}")
+        with self._lock:
+            self._sync(hotel, room_type, data)
+        return True
+
+_availability: Optional[AvailabilityStore] = None
+_availability_lock = threading.Lock()
+
+def get_availability() -> AvailabilityStore:
+    """The availability calendar for the process-wide inventory"""
+    global _availability
+    if _availability is None:
+        with _availability_lock:
+            if _availability is None:
+                _availability = AvailabilityStore(get_inventory())
+    return _availability
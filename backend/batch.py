@@ -0,0 +1,171 @@
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from a2a.types import DataPart, Message, Task, TaskState, TextPart
+from telemetry import metrics
+
+# Runs one query: (agent, query, context id) -> the finished task, or a direct reply
+SendFunction = Callable[[str, str, Optional[str]], Awaitable[Union[Task, Message]]]
+
+BATCH_ITEMS = metrics.counter("travel_batch_items_total", "Batch items by outcome", ("agent", "status"))
+BATCH_RUNNING = metrics.gauge("travel_batch_running", "Batch queries currently running")
+
+class BatchError(ValueError):
+    """The batch request itself is malformed"""
+
+@dataclass
+class BatchItem:
+    index: int
+    query: str
+    agent: str
+    id: Optional[str] = None
+    context_id: Optional[str] = None
+
+    @property
+    def key(self) -> Tuple[str, Optional[str], str]:
+        """Items with the same key run once and share the result"""
+        return self.agent, self.context_id, " ".join(self.query.split()).casefold()
+
+@dataclass
+class _Job:
+    items: List[BatchItem] = field(default_factory=list)
+
+def parse_batch(body: Any, agents: List[str], default_agent: str, max_items: int) -> Tuple[List[BatchItem], Optional[int]]:
+    """Items and requested concurrency of a batch request body.
+
+    The body is {"queries": [...], "agent": "...", "concurrency": n}; each
+    query is a string or {"query", "id", "agent", "context_id"}.
+    """
+    if not isinstance(body, dict) or not isinstance(body.get("queries"), list):
+        raise BatchError('Expected a JSON object with a "queries" list')
+    queries = body["queries"]
+    if not queries:
+        raise BatchError("The batch is empty")
+    if len(queries) > max_items:
+        raise BatchError(f"A batch holds at most {max_items} queries, got {len(queries)}")
+    batch_agent = body.get("agent", default_agent)
+    items = []
+    for index, entry in enumerate(queries):
+        if isinstance(entry, str):
+            entry = {"query": entry}
+        if not isinstance(entry, dict) or not isinstance(entry.get("query"), str) or not entry["query"].strip():
+            raise BatchError(f"Query {index} needs a non-empty query string")
+        agent = entry.get("agent", batch_agent)
+        if agent not in agents:
+            raise BatchError(f"Query {index}: unknown agent {agent!r}, expected one of {', '.join(agents)}")
+        items.append(BatchItem(index, entry["query"], agent, entry.get("id"), entry.get("context_id")))
+    concurrency = body.get("concurrency")
+    # bool is an int subclass, but true is not a concurrency
+    if concurrency is not None and (isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1):
+        raise BatchError('"concurrency" must be a positive integer')
+    return items, concurrency
+
+def _outcome(result: Union[Task, Message]) -> Dict[str, Any]:
+    """Status, answer text and structured results of a finished task"""
+    if isinstance(result, Message):
+        return {"status": TaskState.completed.value, "text": "".join(p.root.text for p in result.parts if isinstance(p.root, TextPart))}
+    text, data = [], []
+    for artifact in result.artifacts or []:
+        for part in artifact.parts:
+            if isinstance(part.root, TextPart):
+                text.append(part.root.text)
+            elif isinstance(part.root, DataPart):
+                data.append({"name": artifact.name, "metadata": artifact.metadata, "data": part.root.data})
+    outcome = {"status": result.status.state.value, "task_id": result.id, "context_id": result.contextId, "text": "".join(text)}
+    if data:
+        outcome["data"] = data
+    if result.status.message:
+        outcome["message"] = "".join(p.root.text for p in result.status.message.parts if isinstance(p.root, TextPart))
+    return outcome
+
+class BatchRunner:
+    """Runs batches of queries through the agents and reports each as it finishes.
+
+    Identical queries (same agent, conversation and words) in a batch run
+    once. A batch runs at most `concurrency` queries at a time, and all
+    batches together at most `max_running`: a large batch keeps a steady,
+    bounded share of admission slots and model rate budget, and concurrent
+    batches take turns for them, instead of one batch flooding the queue
+    and starving interactive requests. Queries shed by admission control
+    are retried with backoff up to `max_attempts` times.
+    """
+
+    def __init__(self, send: SendFunction, max_running: int = 16, max_attempts: int = 3, retry_delay: float = 0.5):
+        self.send = send
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._running = asyncio.Semaphore(max_running)
+
+    @classmethod
+    def from_env(cls, send: SendFunction) -> "BatchRunner":
+        return cls(
+            send,
+            max_running=int(os.getenv("BATCH_MAX_RUNNING", "16")),
+            max_attempts=int(os.getenv("BATCH_MAX_ATTEMPTS", "3")),
+            retry_delay=float(os.getenv("BATCH_RETRY_DELAY_SECONDS", "0.5")),
+        )
+
+    async def _run_one(self, item: BatchItem, slots: asyncio.Semaphore) -> Dict[str, Any]:
+        attempt = 0
+        while True:
+            attempt += 1
+            async with slots, self._running:
+                BATCH_RUNNING.inc()
+                try:
+                    outcome = _outcome(await self.send(item.agent, item.query, item.context_id))
+                except Exception as e:
+                    outcome = {"status": "error", "error": str(e) or type(e).__name__}
+                finally:
+                    BATCH_RUNNING.dec()
+            if outcome["status"] != TaskState.rejected.value or attempt >= self.max_attempts:
+                outcome["attempts"] = attempt
+                return outcome
+            await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    async def run(self, items: List[BatchItem], concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+        """Yield one result per item in completion order, then a summary with "done": true"""
+        start = time.monotonic()
+        jobs: Dict[Tuple, _Job] = {}
+        for item in items:
+            jobs.setdefault(item.key, _Job()).items.append(item)
+        slots = asyncio.Semaphore(concurrency)
+        pending = {asyncio.ensure_future(self._run_one(job.items[0], slots)): job for job in jobs.values()}
+        counts: Dict[str, int] = {}
+        try:
+            while pending:
+                finished, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    job = pending.pop(future)
+                    outcome = future.result()
+                    for item in job.items:
+                        counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+                        BATCH_ITEMS.inc(agent=item.agent, status=outcome["status"])
+                        result = {"index": item.index, "agent": item.agent, "query": item.query, **outcome}
+                        if item.id is not None:
+                            result["id"] = item.id
+                        if item is not job.items[0]:
+                            result["duplicate_of"] = job.items[0].index
+                        yield result
+        finally:
+            # The client went away: stop the queries nobody will read
+            for future in pending:
+                future.cancel()
+        yield {
+            "done": True,
+            "items": len(items),
+            "unique": len(jobs),
+            "statuses": counts,
+            "seconds": round(time.monotonic() - start, 3),
+        }
+
+async def ndjson_lines(results: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    async for result in results:
+        yield json.dumps(result) + "\n"
+
+async def sse_events(results: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    async for result in results:
+        yield f"event: {'done' if result.get('done') else 'result'}\ndata: {json.dumps(result)}\n\n"
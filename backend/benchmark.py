@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Offline load test for the A2A server
+
+Starts main.create_server in-process on a local port with a scripted fake chat
+model (no API key or network needed), drives concurrent message/send and
+message/stream clients against one agent and reports latency percentiles,
+time-to-first-chunk, throughput and memory. Results are saved as JSON, and
+can be compared against an earlier run to catch regressions:
+
+    python benchmark.py --agent flights --requests 200 --concurrency 20
+    python benchmark.py --baseline benchmark_results.json --tolerance 0.2
+    python benchmark.py --agent travel --remote
+    python benchmark.py --agent travel --mode all
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import socket
+import sys
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from a2a.client import A2AClient
+from a2a.types import (
+    JSONRPCErrorResponse,
+    MessageSendParams,
+    SendMessageRequest,
+    SendStreamingMessageRequest,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatusUpdateEvent,
+)
+
+import agents
+from agents import registry
+from fake_llm import fake_model_factory
+from inventory import inventory_day
+
+# Searches a week into the inventory, so they find results whatever day it is
+DEFAULT_QUERIES = {
+    "flights": "Find flights from New York to Los Angeles on {checkin}",
+    "hotels": "Find hotels in Los Angeles from {checkin} to {checkout}",
+    "travel": "Plan a trip to Los Angeles on {checkin}, I need a flight and a hotel",
+}
+
+def default_query(agent: str) -> str:
+    return DEFAULT_QUERIES[agent].format(checkin=inventory_day(7), checkout=inventory_day(9))
+
+# Reported metrics where a higher value is worse, used by --baseline
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "ttfc_p50_ms", "ttfc_p95_ms")
+HIGHER_IS_BETTER = ("requests_per_sec",)
+
+# =============================================================================
+# MEASUREMENT HELPERS
+# =============================================================================
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, q in [0, 100]"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+def rss_mb() -> Dict[str, float]:
+    """Current and peak resident set size of this process, in MiB"""
+    current = None
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak_mb = peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    if current is None:
+        return {"current": None, "peak": round(peak_mb, 1)}
+    return {"current": round(current, 1), "peak": round(max(peak_mb, current), 1)}
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def summarize(latencies: List[float], ttfc: List[float], errors: int, rejected: int, wall: float) -> Dict[str, Any]:
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    summary = {
+        "requests": len(latencies) + errors + rejected,
+        "errors": errors,
+        "rejected": rejected,
+        "wall_seconds": round(wall, 3),
+        "requests_per_sec": round(len(latencies) / wall, 2) if wall > 0 else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(max(latencies, default=None)),
+    }
+    if ttfc:
+        summary.update({
+            "ttfc_p50_ms": ms(percentile(ttfc, 50)),
+            "ttfc_p95_ms": ms(percentile(ttfc, 95)),
+            "ttfc_p99_ms": ms(percentile(ttfc, 99)),
+        })
+    return summary
+
+# =============================================================================
+# CLIENTS
+# =============================================================================
+
+def message_params(query: str) -> MessageSendParams:
+    # No contextId, so every request is a new conversation
+    return MessageSendParams(
+        message={
+            "role": "user",
+            "parts": [{"kind": "text", "text": query}],
+            "messageId": uuid4().hex,
+        }
+    )
+
+async def send_once(client: A2AClient, query: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    response = await client.send_message(SendMessageRequest(id=uuid4().hex, params=message_params(query)))
+    latency = time.perf_counter() - start
+    result = response.root
+    state = None
+    if not isinstance(result, JSONRPCErrorResponse) and isinstance(result.result, Task):
+        state = result.result.status.state
+    return {"state": state, "latency": latency, "ttfc": None}
+
+async def stream_once(client: A2AClient, query: str) -> Dict[str, Any]:
+    start = time.perf_counter()
+    first_chunk = None
+    state = None
+    async for response in client.send_message_streaming(
+        SendStreamingMessageRequest(id=uuid4().hex, params=message_params(query))
+    ):
+        event = response.root
+        if isinstance(event, JSONRPCErrorResponse):
+            break
+        event = event.result
+        if isinstance(event, TaskArtifactUpdateEvent) and first_chunk is None:
+            first_chunk = time.perf_counter() - start
+        elif isinstance(event, TaskStatusUpdateEvent):
+            state = event.status.state
+    latency = time.perf_counter() - start
+    return {"state": state, "latency": latency, "ttfc": first_chunk}
+
+async def run_phase(client: A2AClient, mode: str, query: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Issue `requests` calls from `concurrency` concurrent clients"""
+    call = send_once if mode == "send" else stream_once
+    latencies: List[float] = []
+    ttfc: List[float] = []
+    errors = 0
+    rejected = 0
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining, errors, rejected
+        while remaining > 0:
+            remaining -= 1
+            try:
+                outcome = await call(client, query)
+            except Exception:
+                errors += 1
+                continue
+            # Rejections by admission control are load shedding, not failures
+            if outcome["state"] == TaskState.rejected:
+                rejected += 1
+                continue
+            if outcome["state"] != TaskState.completed:
+                errors += 1
+                continue
+            latencies.append(outcome["latency"])
+            if outcome["ttfc"] is not None:
+                ttfc.append(outcome["ttfc"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    return summarize(latencies, ttfc, errors, rejected, time.perf_counter() - start)
+
+async def run_batch_phase(http: httpx.AsyncClient, base_url: str, agent: str, query: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Send `requests` queries as one batch request, timing each result line from the start"""
+    # A conversation each, so the batch does the same work as separate requests instead of de-duplicating it
+    body = {
+        "agent": agent,
+        "concurrency": concurrency,
+        "queries": [{"query": query, "context_id": uuid4().hex} for _ in range(requests)],
+    }
+    latencies: List[float] = []
+    errors = 0
+    rejected = 0
+    start = time.perf_counter()
+    async with http.stream("POST", f"{base_url}/a2a/batch", json=body) as response:
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            result = json.loads(line)
+            if result.get("done"):
+                break
+            if result["status"] == TaskState.rejected.value:
+                rejected += 1
+            elif result["status"] != TaskState.completed.value:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - start)
+    if response.status_code != 200:
+        errors = requests
+    return summarize(latencies, [], errors, rejected, time.perf_counter() - start)
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    # The fake model has to be in place before create_server builds the agents
+    registry.configure(model_factory=fake_model_factory(latency=args.llm_latency, token_delay=args.token_delay))
+    # Without this, fully specified search queries are answered without the model
+    agents.FAST_PATH_ENABLED = args.fast_path
+    from main import create_server
+
+    stand_ins = AsyncExitStack()
+    if args.remote:
+        # The travel agent delegates over A2A to specialists served on another port
+        from remote_agents import stand_in_server
+        for name, url in (await stand_ins.enter_async_context(stand_in_server())).items():
+            os.environ[f"{name.upper()}_AGENT_URL"] = url
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(uvicorn.Config(create_server(base_url), host="127.0.0.1", port=port, log_level="warning"))
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        if serve.done():
+            serve.result()
+        await asyncio.sleep(0.01)
+
+    query = args.query or default_query(args.agent)
+    modes = {"both": ["send", "stream"], "all": ["send", "stream", "batch"]}.get(args.mode, [args.mode])
+    results: Dict[str, Any] = {}
+    rss_before = rss_mb()
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(120.0)) as http:
+            client = A2AClient(httpx_client=http, url=f"{base_url}/agents/{args.agent}/")
+            for mode in modes:
+                if mode == "batch":
+                    if args.warmup:
+                        await run_batch_phase(http, base_url, args.agent, query, args.warmup, min(args.warmup, args.concurrency))
+                    results[mode] = await run_batch_phase(http, base_url, args.agent, query, args.requests, args.concurrency)
+                    print_phase(mode, results[mode])
+                    continue
+                if args.warmup:
+                    await run_phase(client, mode, query, args.warmup, min(args.warmup, args.concurrency))
+                results[mode] = await run_phase(client, mode, query, args.requests, args.concurrency)
+                print_phase(mode, results[mode])
+    finally:
+        server.should_exit = True
+        await serve
+        await stand_ins.aclose()
+        await registry.aclose()
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "agent": args.agent,
+            "query": query,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "llm_latency": args.llm_latency,
+            "token_delay": args.token_delay,
+            "remote": args.remote,
+            "fast_path": args.fast_path,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+        "rss_mb": {"before": rss_before, "after": rss_mb()},
+    }
+
+def print_phase(mode: str, summary: Dict[str, Any]) -> None:
+    line = (
+        f"{mode:>6}: {summary['requests']} requests, {summary['errors']} errors, {summary['rejected']} rejected, "
+        f"{summary['requests_per_sec']} req/s, p50 {summary['p50_ms']} ms, "
+        f"p95 {summary['p95_ms']} ms, p99 {summary['p99_ms']} ms"
+    )
+    if "ttfc_p50_ms" in summary:
+        line += f", first chunk p50 {summary['ttfc_p50_ms']} ms / p95 {summary['ttfc_p95_ms']} ms"
+    print(line)
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Metrics that got worse than the baseline by more than `tolerance` (a fraction)"""
+    regressions = []
+    for mode, summary in report["results"].items():
+        old = baseline.get("results", {}).get(mode, {})
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            new_value, old_value = summary.get(metric), old.get(metric)
+            if not new_value or not old_value:
+                continue
+            change = (new_value - old_value) / old_value
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > tolerance:
+                regressions.append(f"{mode} {metric}: {old_value} -> {new_value} ({change:+.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the Travel Booking Agent Server")
+    parser.add_argument("--agent", choices=sorted(DEFAULT_QUERIES), default="flights", help="agent to load")
+    parser.add_argument("--mode", choices=["send", "stream", "both", "batch", "all"], default="both",
+                        help="A2A methods to drive, or the /a2a/batch endpoint")
+    parser.add_argument("--requests", type=int, default=200, help="requests per mode")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent clients")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests per mode before measuring")
+    parser.add_argument("--query", help="message to send (defaults to a search for the agent)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake model seconds before each reply")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="fake model seconds between streamed words")
+    parser.add_argument("--remote", action="store_true",
+                        help="serve flights and hotels from a stand-in server the travel agent delegates to")
+    parser.add_argument("--no-fast-path", dest="fast_path", action="store_false",
+                        help="send every query through the model, even plain searches")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write the JSON report")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown vs. the baseline")
+    args = parser.parse_args()
+
+    # Read the baseline first, --output may point at the same file
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = asyncio.run(run_benchmark(args))
+    print(f"RSS: {report['rss_mb']['after']['current']} MiB (peak {report['rss_mb']['after']['peak']} MiB)")
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        if baseline.get("config") != report["config"]:
+            print("Warning: the baseline was run with a different configuration")
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from storage import KeyValueStore
+from telemetry import metrics
+
+BOOKING_BATCH_SIZE = metrics.histogram(
+    "travel_booking_batch_size", "Bookings per supplier call", ("supplier",),
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+BOOKING_REPLAYS = metrics.counter(
+    "travel_booking_replays_total", "Bookings answered from an earlier attempt with the same idempotency key", ("supplier",)
+)
+
+def idempotency_key(scope: str, operation: str, args: Dict[str, Any]) -> str:
+    """Key identifying one booking: the A2A task (or conversation) plus the normalized arguments.
+
+    A retried request, or the model calling the tool again in the same task,
+    produces the same key and so the same booking.
+    """
+    normalized = {k: v.strip().casefold() if isinstance(v, str) else v for k, v in sorted(args.items())}
+    payload = json.dumps([scope, operation, normalized], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+@dataclass
+class BookingRequest:
+    idempotency_key: str
+    details: Dict[str, Any]
+
+@dataclass
+class BookingResult:
+    confirmation: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class BookingError(Exception):
+    """The supplier declined or failed a booking"""
+
+# =============================================================================
+# SUPPLIERS
+# =============================================================================
+
+class Supplier(ABC):
+    """A booking backend taking bulk writes, results in request order"""
+
+    name: str
+
+    @abstractmethod
+    async def book_many(self, requests: List[BookingRequest]) -> List[BookingResult]:
+        """Book every request in one call; per-item failures are reported in the results"""
+
+class FakeSupplier(Supplier):
+    """Local stand-in for an airline or hotel booking API, for development and tests.
+
+    Like real supplier APIs it honours idempotency keys, so a repeated key
+    returns the original confirmation. Each call costs `latency` plus
+    `per_item_latency` per booking, which is what batching amortizes.
+    """
+
+    def __init__(self, name: str, prefix: str, latency: float = 0.05, per_item_latency: float = 0.001):
+        self.name = name
+        self.prefix = prefix
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.bookings: Dict[str, str] = {}
+        self.calls: List[int] = []
+        self._numbers = itertools.count(100001)
+
+    async def book_many(self, requests: List[BookingRequest]) -> List[BookingResult]:
+        self.calls.append(len(requests))
+        await asyncio.sleep(self.latency + self.per_item_latency * len(requests))
+        results = []
+        for request in requests:
+            if request.idempotency_key not in self.bookings:
+                self.bookings[request.idempotency_key] = f"{self.prefix}{next(self._numbers)}"
+            results.append(BookingResult(confirmation=self.bookings[request.idempotency_key]))
+        return results
+
+# =============================================================================
+# BATCHING PIPELINE
+# =============================================================================
+
+class BookingPipeline:
+    """Idempotent, micro-batched booking writes to one supplier.
+
+    Concurrent bookings are queued and sent as one bulk call once `max_batch`
+    are waiting or `max_delay` seconds after the first one. Each idempotency
+    key is booked at most once: a key already in flight joins that booking
+    and a completed key returns its recorded confirmation, from memory or
+    from the shared `store` when several workers are running. A caller that
+    gives up does not abort its booking, so a retry finds the result.
+    """
+
+    def __init__(
+        self,
+        supplier: Supplier,
+        max_batch: int = 20,
+        max_delay: float = 0.01,
+        store: Optional[KeyValueStore] = None,
+        retention_seconds: float = 86400.0,
+        max_completed: int = 10000,
+    ):
+        self.supplier = supplier
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.store = store
+        self.retention_seconds = retention_seconds
+        self.max_completed = max_completed
+        self._pending: List[Tuple[BookingRequest, asyncio.Future]] = []
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # key -> (expires_at, result), oldest first
+        self._completed: "OrderedDict[str, Tuple[float, BookingResult]]" = OrderedDict()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    def configure(self, store: Optional[KeyValueStore] = None) -> None:
+        """Record completed bookings in a store shared between workers"""
+        self.store = store
+
+    def _store_key(self, key: str) -> str:
+        return f"booking|{self.supplier.name}|{key}"
+
+    async def recorded(self, key: str) -> Optional[BookingResult]:
+        """The result of a completed booking with this key, None if there is none"""
+        entry = self._completed.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                return entry[1]
+            del self._completed[key]
+        if self.store is not None:
+            data = await self.store.get(self._store_key(key))
+            if data is not None:
+                return BookingResult(**json.loads(data))
+        return None
+
+    async def book(self, request: BookingRequest) -> BookingResult:
+        key = request.idempotency_key
+        future = self._in_flight.get(key)
+        if future is None:
+            recorded = await self.recorded(key)
+            if recorded is not None:
+                BOOKING_REPLAYS.inc(supplier=self.supplier.name)
+                return recorded
+            # The store lookup may have yielded to a concurrent booking of the same key
+            future = self._in_flight.get(key)
+        if future is not None:
+            BOOKING_REPLAYS.inc(supplier=self.supplier.name)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            self._pending.append((request, future))
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            task = asyncio.create_task(self._send(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _send(self, batch: List[Tuple[BookingRequest, asyncio.Future]]) -> None:
+        BOOKING_BATCH_SIZE.observe(len(batch), supplier=self.supplier.name)
+        try:
+            results = await self.supplier.book_many([request for request, _ in batch])
+        except Exception as e:
+            # Nothing is recorded, so a retry with the same key tries again
+            for request, future in batch:
+                self._in_flight.pop(request.idempotency_key, None)
+                if not future.done():
+                    future.set_exception(BookingError(f"{self.supplier.name} booking failed: {e}"))
+            return
+
+        for (request, future), result in zip(batch, results):
+            try:
+                if result.ok:
+                    await self._record(request.idempotency_key, result)
+            except Exception as e:
+                # Booked, and remembered by this worker, but not shared: tell the caller
+                if not future.done():
+                    future.set_exception(
+                        BookingError(f"{self.supplier.name} booking {result.confirmation} could not be recorded: {e}")
+                    )
+            finally:
+                self._in_flight.pop(request.idempotency_key, None)
+                if not future.done():
+                    future.set_result(result)
+
+    async def _record(self, key: str, result: BookingResult) -> None:
+        self._completed[key] = (time.monotonic() + self.retention_seconds, result)
+        while len(self._completed) > self.max_completed:
+            self._completed.popitem(last=False)
+        if self.store is not None:
+            await self.store.set(
+                self._store_key(key),
+                json.dumps({"confirmation": result.confirmation, "error": result.error}).encode(),
+                self.retention_seconds,
+            )
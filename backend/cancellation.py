@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import TaskNotCancelableError, TaskState
+from a2a.utils import new_agent_text_message
+from a2a.utils.errors import ServerError
+
+from storage import KeyValueStore
+
+TERMINAL_STATES = {TaskState.completed, TaskState.canceled, TaskState.failed, TaskState.rejected}
+
+# Tasks in these states may be executing on some worker
+ACTIVE_STATES = {TaskState.submitted, TaskState.working}
+
+CANCELED_MESSAGE = "Request canceled."
+
+# Values of the cancel flag of a task in the shared store
+CANCEL_REQUESTED = b"requested"
+CANCEL_DONE = b"canceled"
+CANCEL_TOO_LATE = b"finished"
+
+class RunningTasks:
+    """The asyncio tasks currently executing A2A tasks, by task id, so tasks/cancel can stop them.
+
+    Cancelling the asyncio task unwinds the LangGraph run: the pending model
+    request is aborted, tool awaits are interrupted and admission slots and
+    rate-limit reservations are given back on the way out. The canceled
+    status is published on the executing request's own event queue, so both
+    a streaming client and the tasks/cancel caller see it.
+
+    The request coroutine absorbs the cancellation and returns normally: the
+    A2A request handler cancels the producer task again right after
+    AgentExecutor.cancel() and then waits for it, so a producer ending in
+    CancelledError would break the streaming response.
+
+    With a shared `store`, tasks/cancel also reaches tasks running on other
+    workers. The owning worker keeps a "running" key alive for each task
+    it executes and polls a cancel flag every `poll_interval` seconds. A
+    cancel raised elsewhere sets the flag and waits for the owner to answer:
+    "canceled" once it has stopped the task, or "finished" when the task
+    completed before it saw the flag, in which case the cancel is refused
+    instead of being overwritten by the late result.
+    """
+
+    def __init__(self, store: Optional[KeyValueStore] = None, poll_interval: float = 0.5, cancel_timeout: float = 10.0):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.cancel_timeout = cancel_timeout
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancelling: Set[str] = set()
+
+    @classmethod
+    def from_env(cls, store: Optional[KeyValueStore] = None) -> "RunningTasks":
+        return cls(
+            store,
+            poll_interval=float(os.getenv("CANCEL_POLL_SECONDS", "0.5")),
+            cancel_timeout=float(os.getenv("CANCEL_TIMEOUT_SECONDS", "10")),
+        )
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._running
+
+    @asynccontextmanager
+    async def track(self, task_id: str, context_id: str, event_queue: EventQueue) -> AsyncIterator[None]:
+        """Register the current asyncio task as executing `task_id` for the duration of the block"""
+        current = asyncio.current_task()
+        self._running[task_id] = current
+        watcher = asyncio.create_task(self._watch(task_id, current)) if self.store is not None else None
+        canceled = False
+        try:
+            yield
+        except asyncio.CancelledError:
+            if task_id not in self._cancelling:
+                raise
+            # Our own cancel() (and the request handler's, coalesced with it):
+            # end the request normally with a canceled status
+            while current.uncancel():
+                pass
+            canceled = True
+            await TaskUpdater(event_queue, task_id, context_id).update_status(
+                TaskState.canceled,
+                new_agent_text_message(CANCELED_MESSAGE, context_id, task_id),
+                final=True,
+            )
+        finally:
+            self._running.pop(task_id, None)
+            self._cancelling.discard(task_id)
+            if watcher is not None:
+                watcher.cancel()
+                await self._settle(task_id, canceled)
+
+    async def _watch(self, task_id: str, current: asyncio.Task) -> None:
+        """Keep the task's running key alive and stop the task when another worker flags it"""
+        try:
+            while True:
+                if await self.store.get(f"cancel|{task_id}") == CANCEL_REQUESTED:
+                    self._cancelling.add(task_id)
+                    current.cancel()
+                    return
+                await self.store.set(f"running|{task_id}", b"1", self.poll_interval * 4)
+                await asyncio.sleep(self.poll_interval)
+        except Exception:
+            # The store is unreachable: the task runs on, cancellable from this worker only
+            pass
+
+    async def _settle(self, task_id: str, canceled: bool) -> None:
+        """Answer a pending cancel flag of a task this worker has stopped executing"""
+        if canceled:
+            await self.store.set(f"cancel|{task_id}", CANCEL_DONE, self.cancel_timeout)
+        elif await self.store.get(f"cancel|{task_id}") == CANCEL_REQUESTED:
+            await self.store.set(f"cancel|{task_id}", CANCEL_TOO_LATE, self.cancel_timeout)
+        await self.store.delete(f"running|{task_id}")
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        """Stop the task in `context`, for AgentExecutor.cancel"""
+        task = context.current_task
+        task_id = context.task_id or (task.id if task else None)
+        running = self._running.get(task_id)
+        if running is None:
+            if task is not None and task.status.state in TERMINAL_STATES:
+                raise ServerError(error=TaskNotCancelableError(message=f"Task is already {task.status.state.value}"))
+            if self.store is not None and task is not None and task.status.state in ACTIVE_STATES:
+                await self._cancel_elsewhere(task_id)
+            # Not running here (waiting for user input, or stopped by the worker executing it)
+            context_id = context.context_id or (task.contextId if task else None)
+            await TaskUpdater(event_queue, task_id, context_id).update_status(
+                TaskState.canceled,
+                new_agent_text_message(CANCELED_MESSAGE, context_id, task_id),
+                final=True,
+            )
+            return
+
+        # The canceled status follows on the request's queue, which the caller drains;
+        # waiting for it here would deadlock on the queue closing
+        self._cancelling.add(task_id)
+        running.cancel()
+
+    async def _cancel_elsewhere(self, task_id: str) -> None:
+        """Flag a task for the worker executing it and wait until that worker has stopped it.
+
+        The flag outlives the wait, so a task still queued on its worker is
+        stopped as soon as it starts executing.
+        """
+        await self.store.set(f"cancel|{task_id}", CANCEL_REQUESTED, max(60.0, self.cancel_timeout * 2))
+        deadline = time.monotonic() + self.cancel_timeout
+        while True:
+            # No worker is executing it (the owner went away, or never answers): the canceled status stands
+            owner_gone = await self.store.get(f"running|{task_id}") is None or time.monotonic() > deadline
+            # Read after the running key, as the owner answers before it lets go of that
+            answer = await self.store.get(f"cancel|{task_id}")
+            if answer == CANCEL_TOO_LATE:
+                await self.store.delete(f"cancel|{task_id}")
+                raise ServerError(error=TaskNotCancelableError(message="Task finished before it could be canceled"))
+            if answer == CANCEL_DONE or owner_gone:
+                return
+            await asyncio.sleep(self.poll_interval)
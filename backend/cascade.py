@@ -0,0 +1,182 @@
+import json
+import math
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import CallbackManager
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.constants import TAG_NOSTREAM
+
+from response_cache import BOOKING_INTENT, BOOKING_TOOLS
+from telemetry import metrics
+
+CASCADE_TURNS = metrics.counter(
+    "travel_model_cascade_turns_total",
+    "Model turns by the tier that answered them and why, escalations are the large tier",
+    ("agent", "tier", "reason"),
+)
+
+# Replies that admit the model is out of its depth
+HEDGING = re.compile(
+    r"\b(i'?m not sure|i am not sure|not certain|i don'?t know|i do not know|i can'?t|i cannot|unable to)\b",
+    re.IGNORECASE,
+)
+
+def _latest_user_text(messages: Sequence[BaseMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.content if isinstance(message.content, str) else ""
+    return ""
+
+def _confidence(reply: AIMessage) -> Optional[float]:
+    """Geometric mean token probability of the reply text, None without logprobs"""
+    logprobs = (reply.response_metadata.get("logprobs") or {}).get("content") or []
+    if not logprobs:
+        return None
+    return math.exp(sum(token["logprob"] for token in logprobs) / len(logprobs))
+
+class CascadeChatModel(BaseChatModel):
+    """A small model that hands the turns it is not fit for to a large one.
+
+    Each turn is first answered by `small`, off the token stream, and
+    accepted unless:
+      - the user asks to book, reserve or cancel, or the reply calls a booking tool
+      - a tool call names an unknown tool or has arguments its schema rejects
+      - the reply is empty, hedges, or its mean token probability (when the
+        small model reports logprobs) is below `min_confidence`
+      - the small model fails
+    in which case `large` answers the turn, streamed as it is generated.
+    Accepted replies are emitted in one chunk. Each tier is a model from the
+    registry with its own connection pool and rate limit; the tier and
+    reason of every turn are counted in travel_model_cascade_turns_total.
+    """
+
+    small: Any
+    large: Any
+    agent: str = ""
+    min_confidence: float = 0.0
+    tools: Dict[str, Any] = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "model-cascade"
+
+    def _get_ls_params(self, stop: Optional[List[str]] = None, **kwargs: Any):
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params["ls_model_name"] = "cascade"
+        return params
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "CascadeChatModel":
+        return self.model_copy(update={
+            "small": self.small.bind_tools(tools, **kwargs),
+            "large": self.large.bind_tools(tools, **kwargs),
+            "tools": {t.name: t for t in tools if hasattr(t, "name")},
+        })
+
+    def _invalid_tool_call(self, reply: AIMessage) -> bool:
+        if reply.invalid_tool_calls:
+            return True
+        for call in reply.tool_calls:
+            tool = self.tools.get(call["name"])
+            if tool is None:
+                return True
+            schema = getattr(tool, "tool_call_schema", None)
+            if hasattr(schema, "model_validate"):
+                try:
+                    schema.model_validate(call["args"])
+                except Exception:
+                    return True
+        return False
+
+    def _escalation(self, reply: AIMessage) -> Optional[str]:
+        """Why the small model's reply is not good enough, None to accept it"""
+        if any(call["name"] in BOOKING_TOOLS for call in reply.tool_calls):
+            return "booking_tool"
+        if self._invalid_tool_call(reply):
+            return "invalid_tool_call"
+        if not reply.tool_calls:
+            text = reply.content if isinstance(reply.content, str) else ""
+            confidence = _confidence(reply)
+            if not text.strip() or HEDGING.search(text) or (confidence is not None and confidence < self.min_confidence):
+                return "low_confidence"
+        return None
+
+    def _tier_config(self, run_manager) -> Dict[str, Any]:
+        """Config running a tier as a child of this turn's run, off the token stream.
+
+        The tier's own run reports its tokens, this wrapper's run reports none.
+        LLM run managers have no get_child(), so the child manager is built here.
+        """
+        if run_manager is None:
+            return {"tags": [TAG_NOSTREAM]}
+        callbacks = CallbackManager(handlers=[], parent_run_id=run_manager.run_id)
+        callbacks.set_handlers(run_manager.inheritable_handlers)
+        callbacks.add_tags(run_manager.inheritable_tags)
+        callbacks.add_metadata(run_manager.inheritable_metadata)
+        callbacks.add_tags([TAG_NOSTREAM], inherit=False)
+        return {"callbacks": callbacks}
+
+    def _judge(self, reply: AIMessage) -> Tuple[Optional[AIMessage], str]:
+        reason = self._escalation(reply)
+        return (reply, "accepted") if reason is None else (None, reason)
+
+    async def _try_small(self, messages: List[BaseMessage], run_manager) -> Tuple[Optional[AIMessage], str]:
+        """The small model's reply and "accepted", or None and the reason to escalate"""
+        if BOOKING_INTENT.search(_latest_user_text(messages)):
+            return None, "booking_intent"
+        try:
+            reply = await self.small.ainvoke(messages, config=self._tier_config(run_manager))
+        except Exception:
+            return None, "small_error"
+        return self._judge(reply)
+
+    def _try_small_sync(self, messages: List[BaseMessage], run_manager) -> Tuple[Optional[AIMessage], str]:
+        """_try_small for the synchronous API"""
+        if BOOKING_INTENT.search(_latest_user_text(messages)):
+            return None, "booking_intent"
+        try:
+            reply = self.small.invoke(messages, config=self._tier_config(run_manager))
+        except Exception:
+            return None, "small_error"
+        return self._judge(reply)
+
+    def _result(self, reply: AIMessage, reason: str) -> ChatResult:
+        CASCADE_TURNS.inc(agent=self.agent, tier="small" if reason == "accepted" else "large", reason=reason)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(
+            content=reply.content,
+            tool_calls=reply.tool_calls,
+            invalid_tool_calls=reply.invalid_tool_calls,
+            response_metadata=reply.response_metadata,
+        ))])
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        reply, reason = self._try_small_sync(messages, run_manager)
+        if reply is None:
+            reply = self.large.invoke(messages, config=self._tier_config(run_manager))
+        return self._result(reply, reason)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        reply, reason = await self._try_small(messages, run_manager)
+        if reply is None:
+            reply = await self.large.ainvoke(messages, config=self._tier_config(run_manager))
+        return self._result(reply, reason)
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        reply, reason = await self._try_small(messages, run_manager)
+        CASCADE_TURNS.inc(agent=self.agent, tier="small" if reason == "accepted" else "large", reason=reason)
+        if reply is not None:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=reply.content,
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                    for i, call in enumerate(reply.tool_calls)
+                ],
+                response_metadata=reply.response_metadata,
+            ))
+            return
+        async for chunk in self.large.astream(messages, config=self._tier_config(run_manager)):
+            yield ChatGenerationChunk(message=chunk.model_copy(update={"usage_metadata": None}))
@@ -0,0 +1,333 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+
+from storage import KeyValueStore
+
+class BoundedMemorySaver(MemorySaver):
+    """In-memory checkpointer with bounded growth.
+
+    Drop-in replacement for MemorySaver:
+      - only the latest checkpoint plus `keep_checkpoints` older ones are kept per thread
+      - threads idle for longer than `ttl_seconds` are evicted
+      - at most `max_threads` threads are kept, least recently used go first
+    """
+
+    def __init__(
+        self,
+        max_threads: Optional[int] = 1000,
+        ttl_seconds: Optional[float] = 3600.0,
+        keep_checkpoints: int = 2,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.keep_checkpoints = keep_checkpoints
+        # thread_id -> last access time, least recently used first
+        self._last_access: "OrderedDict[str, float]" = OrderedDict()
+        self.evicted_threads = 0
+        self.pruned_checkpoints = 0
+
+    # -------------------------------------------------------------------------
+    # MemorySaver overrides
+    # -------------------------------------------------------------------------
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        if thread_id not in self.storage:
+            # Avoid the defaultdict creating an empty entry for unknown threads
+            return None
+        if self._expired(thread_id):
+            self._evict(thread_id)
+            return None
+        self._touch(thread_id)
+        return super().get_tuple(config)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = next_config["configurable"]["thread_id"]
+        self._touch(thread_id)
+        self._prune_thread(thread_id, next_config["configurable"]["checkpoint_ns"])
+        self._evict_stale()
+        return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        super().put_writes(config, writes, task_id, task_path)
+        self._touch(config["configurable"]["thread_id"])
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self._last_access.pop(thread_id, None)
+
+    # -------------------------------------------------------------------------
+    # Eviction
+    # -------------------------------------------------------------------------
+
+    def _touch(self, thread_id: str) -> None:
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _expired(self, thread_id: str) -> bool:
+        last_access = self._last_access.get(thread_id)
+        if last_access is None or self.ttl_seconds is None:
+            return False
+        return time.monotonic() - last_access > self.ttl_seconds
+
+    def _evict(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+        self.evicted_threads += 1
+
+    def _evict_stale(self) -> None:
+        """Drop expired threads, then least recently used ones above max_threads"""
+        while self._last_access:
+            thread_id = next(iter(self._last_access))
+            if self._expired(thread_id):
+                self._evict(thread_id)
+            elif self.max_threads is not None and len(self._last_access) > self.max_threads:
+                self._evict(thread_id)
+            else:
+                break
+
+    def _prune_thread(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Keep only the newest checkpoints of a thread and the blobs they reference"""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.keep_checkpoints + 1:
+            return
+        # Checkpoint IDs are time-ordered (uuid6), so sorting gives creation order
+        ordered = sorted(checkpoints)
+        stale, kept = ordered[: -(self.keep_checkpoints + 1)], ordered[-(self.keep_checkpoints + 1):]
+
+        def blob_keys(checkpoint_id: str) -> set:
+            saved_checkpoint = self.serde.loads_typed(checkpoints[checkpoint_id][0])
+            return {
+                (thread_id, checkpoint_ns, channel, version)
+                for channel, version in saved_checkpoint["channel_versions"].items()
+            }
+
+        referenced = set().union(*(blob_keys(checkpoint_id) for checkpoint_id in kept))
+        for checkpoint_id in stale:
+            for key in blob_keys(checkpoint_id) - referenced:
+                self.blobs.pop(key, None)
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        self.pruned_checkpoints += len(stale)
+
+    # -------------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, int]:
+        """Return current size and eviction counters of the checkpointer"""
+        checkpoints = 0
+        size_bytes = 0
+        for namespaces in self.storage.values():
+            for saved in namespaces.values():
+                checkpoints += len(saved)
+                for (_, checkpoint_bytes), (_, metadata_bytes), _ in saved.values():
+                    size_bytes += len(checkpoint_bytes) + len(metadata_bytes)
+        for _, blob in self.blobs.values():
+            size_bytes += len(blob)
+        for writes in self.writes.values():
+            for _, _, (_, value), _ in writes.values():
+                size_bytes += len(value)
+        return {
+            "threads": len(self.storage),
+            "checkpoints": checkpoints,
+            "writes": sum(len(w) for w in self.writes.values()),
+            "blobs": len(self.blobs),
+            "size_bytes": size_bytes,
+            "evicted_threads": self.evicted_threads,
+            "pruned_checkpoints": self.pruned_checkpoints,
+        }
+
+class KeyValueCheckpointSaver(BaseCheckpointSaver):
+    """Async checkpointer on a shared KeyValueStore, so conversations survive
+    being served by a different worker process.
+
+    Like BoundedMemorySaver, only the latest checkpoint plus `keep_checkpoints`
+    older ones are kept per thread, and idle threads expire after `ttl_seconds`.
+    Keys are namespaced per graph: "ckpt|<namespace>|<thread_id>|<checkpoint_ns>|..."
+    """
+
+    def __init__(
+        self,
+        store: KeyValueStore,
+        namespace: str,
+        ttl_seconds: Optional[float] = 3600.0,
+        keep_checkpoints: int = 2,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self.store = store
+        self.prefix = f"ckpt|{namespace}|"
+        self.ttl_seconds = ttl_seconds
+        self.keep_checkpoints = keep_checkpoints
+
+    # -------------------------------------------------------------------------
+    # Keys and serialization
+    # -------------------------------------------------------------------------
+
+    def _base(self, thread_id: str, checkpoint_ns: str) -> str:
+        return f"{self.prefix}{thread_id}|{checkpoint_ns}|"
+
+    def _dump(self, value: Any) -> bytes:
+        type_, data = self.serde.dumps_typed(value)
+        return type_.encode() + b"\n" + data
+
+    def _load(self, data: bytes) -> Any:
+        type_, _, payload = data.partition(b"\n")
+        return self.serde.loads_typed((type_.decode(), payload))
+
+    async def _index(self, thread_id: str, checkpoint_ns: str) -> List[str]:
+        data = await self.store.get(self._base(thread_id, checkpoint_ns) + "i")
+        return json.loads(data) if data else []
+
+    async def _tuple(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> Optional[CheckpointTuple]:
+        base = self._base(thread_id, checkpoint_ns)
+        data = await self.store.get(f"{base}c|{checkpoint_id}")
+        if data is None:
+            return None
+        record = self._load(data)
+        writes = []
+        for key in await self.store.keys(f"{base}w|{checkpoint_id}|"):
+            value = await self.store.get(key)
+            if value is not None:
+                writes.append(self._load(value))
+        parent_id = record["parent_id"]
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=record["checkpoint"],
+            metadata=record["metadata"],
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, value) for task_id, channel, value in writes],
+        )
+
+    # -------------------------------------------------------------------------
+    # BaseCheckpointSaver async API
+    # -------------------------------------------------------------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        if not checkpoint_id:
+            index = await self._index(thread_id, checkpoint_ns)
+            if not index:
+                return None
+            checkpoint_id = index[-1]
+        return await self._tuple(thread_id, checkpoint_ns, checkpoint_id)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        prefix = self.prefix + (f"{config['configurable']['thread_id']}|" if config else "")
+        config_checkpoint_ns = config["configurable"].get("checkpoint_ns") if config else None
+        config_checkpoint_id = get_checkpoint_id(config) if config else None
+        before_checkpoint_id = get_checkpoint_id(before) if before else None
+        for index_key in [k for k in await self.store.keys(prefix) if k.endswith("|i")]:
+            thread_id, checkpoint_ns = index_key[len(self.prefix):-2].split("|", 1)
+            if config_checkpoint_ns is not None and checkpoint_ns != config_checkpoint_ns:
+                continue
+            for checkpoint_id in reversed(await self._index(thread_id, checkpoint_ns)):
+                if config_checkpoint_id and checkpoint_id != config_checkpoint_id:
+                    continue
+                if before_checkpoint_id and checkpoint_id >= before_checkpoint_id:
+                    continue
+                checkpoint_tuple = await self._tuple(thread_id, checkpoint_ns, checkpoint_id)
+                if checkpoint_tuple is None:
+                    continue
+                if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+                yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        base = self._base(thread_id, checkpoint_ns)
+        record = {
+            "checkpoint": checkpoint,
+            "metadata": get_checkpoint_metadata(config, metadata),
+            "parent_id": config["configurable"].get("checkpoint_id"),
+        }
+        await self.store.set(f"{base}c|{checkpoint['id']}", self._dump(record), self.ttl_seconds)
+
+        index = await self._index(thread_id, checkpoint_ns)
+        if checkpoint["id"] not in index:
+            index = sorted(index + [checkpoint["id"]])
+        stale, index = index[: -(self.keep_checkpoints + 1)], index[-(self.keep_checkpoints + 1):]
+        await self.store.set(base + "i", json.dumps(index).encode(), self.ttl_seconds)
+        for checkpoint_id in stale:
+            await self.store.delete(
+                f"{base}c|{checkpoint_id}", *await self.store.keys(f"{base}w|{checkpoint_id}|")
+            )
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        base = self._base(thread_id, checkpoint_ns)
+        for idx, (channel, value) in enumerate(writes):
+            write_idx = WRITES_IDX_MAP.get(channel, idx)
+            # One key per write, so parallel tasks never overwrite each other
+            # Padded so keys sort in write order (special writes use negative indexes)
+            key = f"{base}w|{checkpoint_id}|{task_id}|{write_idx + 100:08d}"
+            if write_idx >= 0 and await self.store.get(key) is not None:
+                continue
+            await self.store.set(key, self._dump((task_id, channel, value)), self.ttl_seconds)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        keys = await self.store.keys(f"{self.prefix}{thread_id}|")
+        await self.store.delete(*keys)
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from inventory import inventory_day
+
+def default_script() -> List[Dict[str, Any]]:
+    """Tool calls issued one per model turn, searching a week into the inventory.
+
+    Entries for tools the agent does not have are skipped, so one script
+    serves both specialists.
+    """
+    return [
+        {"name": "get_flights", "args": {"departure": "NYC", "destination": "LAX", "date": inventory_day(7)}},
+        {"name": "get_hotels", "args": {"city": "Los Angeles", "checkin": inventory_day(7), "checkout": inventory_day(9)}},
+    ]
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic stand-in for ChatOpenAI, for benchmarks and offline runs.
+
+    Each turn it issues the next scripted tool call for the tools it is bound
+    to, then answers with a fixed summary of the tool results. `latency` is
+    slept before every reply and `token_delay` between streamed words, to
+    model time-to-first-token and generation speed of the real API.
+    """
+
+    model_name: str = "fake"
+    # None follows default_script()
+    script: Optional[List[Dict[str, Any]]] = None
+    latency: float = 0.0
+    token_delay: float = 0.0
+    tool_names: Optional[List[str]] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "FakeChatModel":
+        names = [getattr(t, "name", None) or getattr(t, "__name__", str(t)) for t in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        # Tool results since the last user message tell how far into the script this turn is
+        results: List[ToolMessage] = []
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                break
+            if isinstance(message, ToolMessage):
+                results.append(message)
+        results.reverse()
+
+        script = self.script if self.script is not None else default_script()
+        calls = [c for c in script if self.tool_names is None or c["name"] in self.tool_names]
+        if len(results) < len(calls):
+            call = calls[len(results)]
+            return AIMessage(
+                content="",
+                tool_calls=[{"name": call["name"], "args": call["args"], "id": f"call_{len(results)}"}],
+            )
+        if results:
+            return AIMessage(content="Here is what I found. " + " ".join(str(r.content) for r in results))
+        return AIMessage(content="How can I help with your trip?")
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._generate(messages)
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        reply = self._reply(messages)
+        # Reported on the last chunk, like ChatOpenAI with stream_usage
+        input_tokens = count_tokens_approximately(messages)
+        output_tokens = count_tokens_approximately([reply])
+        usage = {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+        if reply.tool_calls:
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {"name": tc["name"], "args": json.dumps(tc["args"]), "id": tc["id"], "index": i}
+                        for i, tc in enumerate(reply.tool_calls)
+                    ],
+                    usage_metadata=usage,
+                )
+            )
+            return
+        words = reply.content.split(" ")
+        for i, word in enumerate(words):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            last = i == len(words) - 1
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content=word if last else word + " ", usage_metadata=usage if last else None)
+            )
+
+def fake_model_factory(
+    latency: float = 0.0,
+    token_delay: float = 0.0,
+    script: Optional[List[Dict[str, Any]]] = None,
+) -> Callable[..., FakeChatModel]:
+    """Drop-in for the registry's ChatOpenAI constructor; connection arguments are ignored but rate limits apply"""
+
+    def factory(model: str = "fake", rate_limiter=None, **kwargs: Any) -> FakeChatModel:
+        return FakeChatModel(
+            model_name=model,
+            rate_limiter=rate_limiter,
+            latency=latency,
+            token_delay=token_delay,
+            script=script,
+        )
+
+    return factory
+
+def fake_model_factory_from_env() -> Callable[..., FakeChatModel]:
+    """Fake model configured by FAKE_LLM_LATENCY / FAKE_LLM_TOKEN_DELAY (seconds)"""
+    return fake_model_factory(
+        latency=float(os.getenv("FAKE_LLM_LATENCY", "0.05")),
+        token_delay=float(os.getenv("FAKE_LLM_TOKEN_DELAY", "0.0")),
+    )
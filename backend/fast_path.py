@@ -0,0 +1,98 @@
+import re
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from normalize import CITIES
+from response_cache import BOOKING_INTENT
+from slots import CITY_PATTERN, DATE_PATTERN, NIGHTS_PATTERN, city_mentions, dates_in, extract_flight_slots, extract_hotel_slots
+
+# Words a plain search may contain besides its cities and dates. Anything else
+# (a budget, a time of day, a second leg, a question) is left to the model.
+COMMON_WORDS = {
+    "a", "an", "the", "me", "my", "i", "we", "us", "please", "pls", "can", "could", "you", "would", "like",
+    "want", "need", "looking", "look", "for", "find", "search", "show", "get", "list", "give", "what",
+    "which", "are", "is", "there", "any", "available", "options", "some", "all", "on", "from", "to", "in",
+    "at", "and", "of", "hi", "hello", "hey", "thanks", "cheapest", "cheap", "best",
+}
+FLIGHT_WORDS = COMMON_WORDS | {
+    "flight", "flights", "fly", "flying", "plane", "ticket", "tickets", "departing", "leaving", "going",
+    "direct", "nonstop", "fastest", "shortest", "quickest",
+}
+HOTEL_WORDS = COMMON_WORDS | {
+    "hotel", "hotels", "room", "rooms", "stay", "staying", "accommodation", "accommodations", "place",
+    "check", "checking", "checkin", "out", "checkout", "until", "till", "through", "between",
+    "suite", "suites", "standard",
+}
+FASTEST = re.compile(r"\b(fastest|shortest|quickest)\b", re.IGNORECASE)
+SUITE = re.compile(r"\bsuites?\b", re.IGNORECASE)
+WORD = re.compile(r"[a-z']+|\d|\$")
+
+def _only_search_words(query: str, vocabulary: set) -> bool:
+    """True if nothing but cities, dates, stay lengths and `vocabulary` words is left in the query"""
+    rest = NIGHTS_PATTERN.sub(" ", DATE_PATTERN.sub(" ", CITY_PATTERN.sub(" ", query)))
+    return all(word in vocabulary for word in WORD.findall(rest.lower().replace("-", " ")))
+
+def plan_flight_search(query: str, today: Optional[date] = None) -> Optional[Dict[str, str]]:
+    """get_flights arguments for a query that is a plain one-way flight search, else None"""
+    if BOOKING_INTENT.search(query) or len(city_mentions(query)) != 2 or len(dates_in(query, today)) != 1:
+        return None
+    if not _only_search_words(query, FLIGHT_WORDS):
+        return None
+    args = extract_flight_slots(query, today)
+    if args is None:
+        return None
+    args["sort_by"] = "duration" if FASTEST.search(query) else "price"
+    return args
+
+def plan_hotel_search(query: str, today: Optional[date] = None) -> Optional[Dict[str, str]]:
+    """get_hotels arguments for a query that is a plain hotel search in one city, else None"""
+    if BOOKING_INTENT.search(query) or len(city_mentions(query)) != 1:
+        return None
+    if not _only_search_words(query, HOTEL_WORDS):
+        return None
+    args = extract_hotel_slots(query, today)
+    if args is None:
+        return None
+    args["room_type"] = "suite" if SUITE.search(query) else "standard"
+    return args
+
+# =============================================================================
+# ANSWER TEMPLATES
+# =============================================================================
+
+def _city(code: str) -> str:
+    return f"{CITIES[code][0]} ({code})" if code in CITIES else code
+
+def _duration(minutes: int) -> str:
+    return f"{minutes // 60}h {minutes % 60:02d}m"
+
+def render_flights(args: Dict[str, str], flights: List[Dict[str, Any]]) -> str:
+    route = f"from {_city(args['departure'])} to {_city(args['destination'])} on {args['date']}"
+    if not flights:
+        return (
+            f"I couldn't find any direct flights {route}. "
+            "I can look at other dates or connecting itineraries if you like."
+        )
+    order = "fastest" if args.get("sort_by") == "duration" else "cheapest"
+    lines = [f"Here are the {order} flights {route}:", ""]
+    for i, flight in enumerate(flights, 1):
+        lines.append(
+            f"{i}. {flight['flight_number']}, departs {flight['departure_time']}, "
+            f"{_duration(flight['duration_minutes'])}, ${flight['price']:.2f}"
+        )
+    lines += ["", "Tell me which flight to book and the passenger's name."]
+    return "\n".join(lines)
+
+def render_hotels(args: Dict[str, str], hotels: List[Dict[str, Any]]) -> str:
+    rooms = "suites" if args.get("room_type") == "suite" else "rooms"
+    stay = f"in {args['city']} from {args['checkin']} to {args['checkout']}"
+    if not hotels:
+        return f"I couldn't find any hotels with {rooms} free {stay}. I can try other dates if you like."
+    lines = [f"Here are the cheapest hotels with {rooms} free {stay}:", ""]
+    for i, hotel in enumerate(hotels, 1):
+        lines.append(
+            f"{i}. {hotel['name']} ({hotel['stars']}★), ${hotel['price_per_night']:.2f} per night, "
+            f"${hotel['total_price']:.2f} in total, {hotel['rooms_available']} left"
+        )
+    lines += ["", "Tell me which hotel to book and the guest's name."]
+    return "\n".join(lines)
@@ -0,0 +1,83 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+SUMMARY_NAME = "conversation_summary"
+
+SUMMARY_INSTRUCTION = """Summarize the earlier part of this travel booking conversation in a few sentences.
+Keep every detail needed to continue it: cities, dates, flight numbers, hotel names, prices, passenger and guest names, and confirmations."""
+
+class HistoryCompactor:
+    """Pre-model hook that keeps the prompt for each model call within a token budget.
+
+    Only the most recent turns that fit in `max_tokens` are sent to the model. With a
+    `summary_model`, the turns that no longer fit are folded into a running summary
+    message stored in the thread, so both the prompt and the checkpointed state stay bounded.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        summary_model: Optional[BaseChatModel] = None,
+        token_counter: Callable[[Sequence[BaseMessage]], int] = count_tokens_approximately,
+    ):
+        self.max_tokens = max_tokens
+        self.summary_model = summary_model
+        self.token_counter = token_counter
+
+    async def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        messages = state["messages"]
+        if self.token_counter(messages) <= self.max_tokens:
+            return {"llm_input_messages": messages}
+
+        summary = None
+        if messages and isinstance(messages[0], SystemMessage) and messages[0].name == SUMMARY_NAME:
+            summary, messages = messages[0], messages[1:]
+        budget = self.max_tokens - (self.token_counter([summary]) if summary else 0)
+        kept = self._recent(messages, budget)
+
+        dropped = messages[: len(messages) - len(kept)]
+        if self.summary_model is None or not dropped:
+            return {"llm_input_messages": ([summary] if summary else []) + kept}
+
+        summary = await self._summarize(summary, dropped)
+        return {
+            "messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), summary, *kept],
+            "llm_input_messages": [summary, *kept],
+        }
+
+    def _recent(self, messages: List[BaseMessage], budget: int) -> List[BaseMessage]:
+        """Return the longest suffix of whole turns that fits in the budget"""
+        kept = trim_messages(
+            messages,
+            max_tokens=max(budget, 0),
+            token_counter=self.token_counter,
+            strategy="last",
+            start_on="human",
+            end_on=("human", "tool"),
+        )
+        if kept:
+            return kept
+        # Even the current turn is over budget, it still has to be sent whole
+        for i in range(len(messages) - 1, -1, -1):
+            if isinstance(messages[i], HumanMessage):
+                return messages[i:]
+        return messages
+
+    async def _summarize(self, summary: Optional[SystemMessage], dropped: List[BaseMessage]) -> SystemMessage:
+        previous = [summary] if summary else []
+        response = await self.summary_model.ainvoke(
+            [SystemMessage(content=SUMMARY_INSTRUCTION), *previous, *dropped]
+        )
+        return SystemMessage(
+            content=f"Summary of the earlier conversation: {response.content}",
+            name=SUMMARY_NAME,
+        )
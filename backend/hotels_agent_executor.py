@@ -1,23 +1,8 @@
-from a2a.server.agent_execution import AgentExecutor, RequestContext
-from a2a.server.events import EventQueue
-from a2a.utils import new_agent_text_message
 from agents import HotelsAgent
+from specialist_agent_executor import SpecialistAgentExecutor
 
-class HotelsAgentExecutor(AgentExecutor):
-    """Test AgentProxy Implementation."""
+class HotelsAgentExecutor(SpecialistAgentExecutor):
+    """A2A executor for the hotels agent"""
 
-    def __init__(self):
-        self.agent = HotelsAgent()
-
-    async def execute(
-        self,
-        context: RequestContext,
-        event_queue: EventQueue,
-    ) -> None:
-        result = await self.agent.invoke()
-        await event_queue.enqueue_event(new_agent_text_message(result))
-
-    async def cancel(
-        self, context: RequestContext, event_queue: EventQueue
-    ) -> None:
-        raise Exception('cancel not supported')
+    name = "hotels"
+    agent_class = HotelsAgent
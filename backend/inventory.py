@@ -0,0 +1,510 @@
+import argparse
+import heapq
+import json
+import mmap
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from normalize import CITIES
+from records import Flight, Hotel
+
+FORMAT_VERSION = 2
+
+# Column typecodes per table (array module / memoryview.cast codes)
+FLIGHT_COLUMNS = {"key": "q", "airline": "h", "number": "i", "departure_minute": "h", "duration": "h", "price_cents": "i"}
+HOTEL_COLUMNS = {"city": "i", "name": "i", "stars": "b", "standard_rooms": "h", "suite_rooms": "h"}
+RATE_COLUMNS = {"key": "q", "hotel": "i", "price_cents": "i"}
+TABLES = {"flights": FLIGHT_COLUMNS, "hotels": HOTEL_COLUMNS, "rates": RATE_COLUMNS}
+
+# Room types, with their price relative to the hotel's nightly rate
+ROOM_TYPES = {"standard": 1.0, "suite": 2.5}
+
+AIRLINES = ["AA", "UA", "DL", "BA", "AF", "LH", "EK", "SQ", "JL", "CX", "QF", "AC", "KL", "IB", "AI"]
+HOTEL_BRANDS = ["Marriott", "Hilton", "Hyatt", "Holiday Inn", "Sheraton", "Westin", "Radisson", "Ibis", "Novotel", "Best Western"]
+HOTEL_AREAS = ["Downtown", "Airport", "Central", "Riverside", "Old Town", "Harbour", "Park", "Station", "Garden", "Plaza"]
+
+# Days are counted from 1970-01-01 and fit in the low 20 bits of a key
+EPOCH = date(1970, 1, 1).toordinal()
+DAY_BITS = 20
+
+def day_number(day: date) -> int:
+    return day.toordinal() - EPOCH
+
+def parse_day(text: str) -> Optional[date]:
+    """The date of a normalized (ISO 8601) date argument, None if it is not one"""
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        return None
+
+def normalize_room_type(text: str) -> str:
+    """A known room type for a tool argument, "standard" for anything else"""
+    value = (text or "").strip().lower()
+    return value if value in ROOM_TYPES else "standard"
+
+def flight_key(origin: int, destination: int, day: int) -> int:
+    return (((origin << DAY_BITS) | destination) << DAY_BITS) | day
+
+def rate_key(city: int, day: int) -> int:
+    return (city << DAY_BITS) | day
+
+def dollars(cents: int) -> float:
+    return cents // 100 if cents % 100 == 0 else cents / 100
+
+# =============================================================================
+# INVENTORY
+# =============================================================================
+
+class Inventory:
+    """Flight and hotel inventory held as typed columns.
+
+    Flights are sorted by (origin, destination, day) packed into one integer
+    key column, then by price, and nightly hotel rates by (city, day), so each
+    index is the key column itself: a lookup is two binary searches for the
+    row range, with no per-row filtering and nothing to build at load time.
+    Columns are `array`s when generated in memory and memory-mapped files when
+    loaded from disk, so a large inventory opens instantly and is paged in on
+    demand.
+    """
+
+    def __init__(
+        self,
+        airports: List[str],
+        airlines: List[str],
+        cities: List[str],
+        hotel_names: List[str],
+        tables: Dict[str, Dict[str, Sequence[int]]],
+        start: date,
+        days: int,
+    ):
+        self.start = start
+        self.days = days
+        self.airports = airports
+        self.airlines = airlines
+        self.cities = cities
+        self.hotel_names = hotel_names
+        self.flights = tables["flights"]
+        self.hotels = tables["hotels"]
+        self.rates = tables["rates"]
+        self._airport_ids = {code: i for i, code in enumerate(airports)}
+        self._city_ids = {name: i for i, name in enumerate(cities)}
+        self._routes: Dict[str, List[str]] = {}
+        self._hotel_ids: Optional[Dict[str, int]] = None
+        self._maps: List[mmap.mmap] = []
+
+    @property
+    def flight_count(self) -> int:
+        return len(self.flights["key"])
+
+    @property
+    def rate_count(self) -> int:
+        return len(self.rates["key"])
+
+    def routes_from(self, departure: str) -> List[str]:
+        """Airports with flights from `departure` on any day, computed once per origin.
+
+        Keys of one origin are contiguous and grouped by destination, so each
+        destination is found with one binary search past the previous one.
+        """
+        routes = self._routes.get(departure)
+        if routes is None:
+            routes = []
+            origin = self._airport_ids.get(departure)
+            if origin is not None:
+                keys = self.flights["key"]
+                position = bisect_left(keys, flight_key(origin, 0, 0))
+                end = bisect_left(keys, flight_key(origin + 1, 0, 0), position)
+                while position < end:
+                    destination = (keys[position] >> DAY_BITS) & ((1 << DAY_BITS) - 1)
+                    routes.append(self.airports[destination])
+                    position = bisect_left(keys, flight_key(origin, destination + 1, 0), position, end)
+            self._routes[departure] = routes
+        return routes
+
+    def search_flights(
+        self, departure: str, destination: str, day: date, sort_by: str = "price", limit: int = 5
+    ) -> List[Flight]:
+        """The `limit` best flights on a route and day, by "price" or "duration" """
+        origin, dest = self._airport_ids.get(departure), self._airport_ids.get(destination)
+        if origin is None or dest is None:
+            return []
+        keys = self.flights["key"]
+        key = flight_key(origin, dest, day_number(day))
+        start, end = bisect_left(keys, key), bisect_right(keys, key)
+        if sort_by == "duration":
+            durations, prices = self.flights["duration"], self.flights["price_cents"]
+            rows = heapq.nsmallest(limit, range(start, end), key=lambda i: (durations[i], prices[i]))
+        else:
+            # Rows within a key are already in price order
+            rows = range(start, min(end, start + limit))
+        return [self._flight(i, departure, destination, day) for i in rows]
+
+    def _flight(self, row: int, departure: str, destination: str, day: date) -> Flight:
+        columns = self.flights
+        minute = columns["departure_minute"][row]
+        return Flight(
+            flight_number=f"{self.airlines[columns['airline'][row]]}{columns['number'][row]}",
+            departure=departure,
+            destination=destination,
+            date=day.isoformat(),
+            departure_time=f"{minute // 60:02d}:{minute % 60:02d}",
+            duration_minutes=columns["duration"][row],
+            price=dollars(columns["price_cents"][row]),
+        )
+
+    def hotels_in(self, city: str) -> range:
+        """Ids of a city's hotels, which are stored grouped by city"""
+        city_id = self._city_ids.get(city)
+        if city_id is None:
+            return range(0)
+        cities = self.hotels["city"]
+        return range(bisect_left(cities, city_id), bisect_right(cities, city_id))
+
+    def hotel_id(self, name: str) -> Optional[int]:
+        if self._hotel_ids is None:
+            names = self.hotels["name"]
+            self._hotel_ids = {self.hotel_names[names[i]].casefold(): i for i in range(len(names))}
+        return self._hotel_ids.get(name.strip().casefold())
+
+    def rooms(self, hotel: int, room_type: str) -> int:
+        return self.hotels[f"{room_type}_rooms"][hotel]
+
+    def search_hotels(
+        self,
+        city: str,
+        checkin: date,
+        checkout: date,
+        room_type: str = "standard",
+        rooms_left: Optional[Dict[int, int]] = None,
+        limit: Optional[int] = 5,
+    ) -> List[Hotel]:
+        """The `limit` (or all) cheapest hotels in a city with a rate for every night of the stay.
+
+        With `rooms_left` (rooms free per hotel id, from the availability
+        calendar) only those hotels are considered. A stay whose checkout is
+        not after its checkin has no nights and finds nothing.
+        """
+        city_id = self._city_ids.get(city)
+        first = day_number(checkin)
+        nights = day_number(checkout) - first
+        if city_id is None or nights <= 0:
+            return []
+        factor = ROOM_TYPES[room_type]
+        keys, hotel_ids, prices = self.rates["key"], self.rates["hotel"], self.rates["price_cents"]
+        totals: Dict[int, int] = {}
+        for night in range(nights):
+            key = rate_key(city_id, first + night)
+            start, end = bisect_left(keys, key), bisect_right(keys, key)
+            if night == 0:
+                totals = {hotel_ids[i]: prices[i] for i in range(start, end)}
+                if rooms_left is not None:
+                    totals = {hotel: total for hotel, total in totals.items() if hotel in rooms_left}
+                continue
+            priced = {hotel_ids[i]: prices[i] for i in range(start, end)}
+            totals = {hotel: total + priced[hotel] for hotel, total in totals.items() if hotel in priced}
+            if not totals:
+                break
+        by_price = lambda item: (item[1], item[0])
+        best = heapq.nsmallest(limit, totals.items(), key=by_price) if limit else sorted(totals.items(), key=by_price)
+        return [
+            Hotel(
+                name=self.hotel_names[self.hotels["name"][hotel]],
+                city=city,
+                stars=self.hotels["stars"][hotel],
+                room_type=room_type,
+                checkin=checkin.isoformat(),
+                checkout=checkout.isoformat(),
+                price_per_night=dollars(round(total * factor / nights)),
+                total_price=dollars(round(total * factor)),
+                rooms_available=rooms_left[hotel] if rooms_left is not None else self.rooms(hotel, room_type),
+            )
+            for hotel, total in best
+        ]
+
+    # -------------------------------------------------------------------------
+    # Files: inventory.json with dictionaries and row counts, one raw file per column
+    # -------------------------------------------------------------------------
+
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        tables = {}
+        for table, columns in TABLES.items():
+            data = getattr(self, table)
+            for column, typecode in columns.items():
+                values = data[column]
+                with open(os.path.join(path, f"{table}.{column}.bin"), "wb") as f:
+                    f.write(values.tobytes() if isinstance(values, array) else bytes(values))
+            tables[table] = {"rows": len(data[next(iter(columns))]), "columns": columns}
+        with open(os.path.join(path, "inventory.json"), "w") as f:
+            json.dump(
+                {
+                    "format": FORMAT_VERSION,
+                    "byteorder": sys.byteorder,
+                    "start": self.start.isoformat(),
+                    "days": self.days,
+                    "airports": self.airports,
+                    "airlines": self.airlines,
+                    "cities": self.cities,
+                    "hotel_names": self.hotel_names,
+                    "tables": tables,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "Inventory":
+        """Open an inventory written by save(), memory-mapping its columns"""
+        with open(os.path.join(path, "inventory.json")) as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_VERSION or meta.get("byteorder") != sys.byteorder:
+            raise ValueError(f"Unsupported inventory format in {path}")
+        maps = []
+        tables = {}
+        for table, spec in meta["tables"].items():
+            tables[table] = {}
+            for column, typecode in spec["columns"].items():
+                if spec["rows"] == 0:
+                    tables[table][column] = array(typecode)
+                    continue
+                with open(os.path.join(path, f"{table}.{column}.bin"), "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                maps.append(mapped)
+                tables[table][column] = memoryview(mapped).cast(typecode)
+        inventory = cls(
+            meta["airports"],
+            meta["airlines"],
+            meta["cities"],
+            meta["hotel_names"],
+            tables,
+            date.fromisoformat(meta["start"]),
+            meta["days"],
+        )
+        inventory._maps = maps
+        return inventory
+
+# =============================================================================
+# SYNTHETIC DATA
+# =============================================================================
+
+def generate(
+    start: date,
+    days: int = 120,
+    airports: Optional[int] = None,
+    hubs: int = 8,
+    route_density: float = 0.25,
+    flights_per_route: int = 6,
+    hotels_per_city: int = 40,
+    seed: int = 7,
+) -> Inventory:
+    """Deterministic synthetic inventory for development and benchmarks.
+
+    The first airports are the gazetteer's cities, extra ones get synthetic
+    codes. Hubs are connected to every airport, other pairs to each other with
+    probability `route_density`, and every route has between half of and
+    `flights_per_route` flights a day. Every airport's city has `hotels_per_city` hotels with a
+    rate for every night.
+    """
+    rng = random.Random(seed)
+    known = [(code, name) for code, (name, _) in CITIES.items()]
+    count = airports or len(known)
+    places = known[:count] + [(f"X{i}", f"City {i}") for i in range(len(known), count)]
+    # Hubs first, so itineraries through them are the common case
+    hub_codes = {"NYC", "LON", "PAR", "DXB", "SIN", "TYO", "LAX", "HKG"}
+    places.sort(key=lambda place: place[0] not in hub_codes)
+    codes = [code for code, _ in places]
+    cities = [name for _, name in places]
+    hub_count = min(hubs, len(codes))
+    first_day = day_number(start)
+
+    flight_columns = {column: array(typecode) for column, typecode in FLIGHT_COLUMNS.items()}
+    for origin in range(len(codes)):
+        for dest in range(len(codes)):
+            if origin == dest:
+                continue
+            if origin >= hub_count and dest >= hub_count and rng.random() >= route_density:
+                continue
+            base_duration = rng.randint(60, 900)
+            base_price = 40 + base_duration // 3
+            carriers = rng.sample(range(len(AIRLINES)), 3)
+            for day in range(first_day, first_day + days):
+                key = flight_key(origin, dest, day)
+                flights = []
+                for _ in range(rng.randint(max(1, flights_per_route // 2), flights_per_route)):
+                    airline = rng.choice(carriers)
+                    duration = base_duration + rng.choice((0, 0, 15, 30, 45, 90))
+                    price = int(base_price * rng.uniform(0.7, 1.8)) * 100
+                    flights.append((price, duration, airline, rng.randint(100, 9999), rng.randrange(0, 24 * 60, 5)))
+                flights.sort()
+                for price, duration, airline, number, minute in flights:
+                    flight_columns["key"].append(key)
+                    flight_columns["airline"].append(airline)
+                    flight_columns["number"].append(number)
+                    flight_columns["departure_minute"].append(minute)
+                    flight_columns["duration"].append(duration)
+                    flight_columns["price_cents"].append(price)
+
+    hotel_columns = {column: array(typecode) for column, typecode in HOTEL_COLUMNS.items()}
+    rate_columns = {column: array(typecode) for column, typecode in RATE_COLUMNS.items()}
+    hotel_names: List[str] = []
+    for city_id, city in enumerate(cities):
+        first_hotel = len(hotel_names)
+        base_rates = []
+        for n in range(hotels_per_city):
+            stars = rng.randint(2, 5)
+            brand = HOTEL_BRANDS[n % len(HOTEL_BRANDS)]
+            area = HOTEL_AREAS[(n // len(HOTEL_BRANDS)) % len(HOTEL_AREAS)]
+            suffix = f" {n // (len(HOTEL_BRANDS) * len(HOTEL_AREAS)) + 1}" if n >= len(HOTEL_BRANDS) * len(HOTEL_AREAS) else ""
+            hotel_columns["city"].append(city_id)
+            hotel_columns["name"].append(len(hotel_names))
+            hotel_columns["stars"].append(stars)
+            hotel_columns["standard_rooms"].append(rng.randint(5, 40))
+            hotel_columns["suite_rooms"].append(rng.randint(1, 5))
+            hotel_names.append(f"{brand} {area} {city}{suffix}")
+            base_rates.append(stars * rng.randint(30, 60))
+        for day in range(first_day, first_day + days):
+            weekend = 1.25 if date.fromordinal(day + EPOCH).weekday() >= 4 else 1.0
+            key = rate_key(city_id, day)
+            for n, base in enumerate(base_rates):
+                rate_columns["key"].append(key)
+                rate_columns["hotel"].append(first_hotel + n)
+                rate_columns["price_cents"].append(int(base * weekend * rng.uniform(0.9, 1.1)) * 100)
+
+    return Inventory(
+        codes,
+        list(AIRLINES),
+        cities,
+        hotel_names,
+        {"flights": flight_columns, "hotels": hotel_columns, "rates": rate_columns},
+        start,
+        days,
+    )
+
+# =============================================================================
+# PROCESS-WIDE INVENTORY
+# =============================================================================
+
+_inventory: Optional[Inventory] = None
+_inventory_lock = threading.Lock()
+
+def get_inventory() -> Inventory:
+    """The inventory the tools search, loaded on first use.
+
+    INVENTORY_PATH names a directory written by `python inventory.py generate`.
+    Without it a small synthetic inventory is generated in memory, covering
+    INVENTORY_DAYS days (default 120) from INVENTORY_START_DATE (default today).
+    """
+    global _inventory
+    if _inventory is None:
+        with _inventory_lock:
+            if _inventory is None:
+                path = os.getenv("INVENTORY_PATH")
+                if path:
+                    _inventory = Inventory.load(path)
+                else:
+                    _inventory = generate(inventory_start(), days=int(os.getenv("INVENTORY_DAYS", "120")))
+    return _inventory
+
+def inventory_start() -> date:
+    """First day get_inventory() covers, read without loading it"""
+    if _inventory is not None:
+        return _inventory.start
+    path = os.getenv("INVENTORY_PATH")
+    if path:
+        with open(os.path.join(path, "inventory.json")) as f:
+            return date.fromisoformat(json.load(f)["start"])
+    start = os.getenv("INVENTORY_START_DATE")
+    return date.fromisoformat(start) if start else date.today()
+
+def inventory_day(offset: int) -> str:
+    """The date `offset` days into the inventory, for scripted searches that have to find something"""
+    return (inventory_start() + timedelta(days=offset)).isoformat()
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+def benchmark(inventory: Inventory, lookups: int, seed: int = 1) -> Dict[str, Dict[str, float]]:
+    """Time random flight and hotel lookups, returning throughput and latency percentiles in microseconds"""
+    rng = random.Random(seed)
+    results = {}
+    for kind in ("flights", "flights_by_duration", "hotels"):
+        latencies = []
+        found = 0
+        for _ in range(lookups):
+            day = inventory.start + timedelta(days=rng.randrange(inventory.days))
+            began = time.perf_counter()
+            if kind == "hotels":
+                city = rng.choice(inventory.cities)
+                rows = inventory.search_hotels(city, day, day + timedelta(days=rng.randint(1, 7)))
+            else:
+                departure, destination = rng.sample(inventory.airports, 2)
+                rows = inventory.search_flights(
+                    departure, destination, day, sort_by="duration" if kind == "flights_by_duration" else "price"
+                )
+            latencies.append((time.perf_counter() - began) * 1e6)
+            found += bool(rows)
+        latencies.sort()
+        results[kind] = {
+            "lookups_per_sec": round(lookups / (sum(latencies) / 1e6), 1),
+            "p50_us": round(statistics.median(latencies), 1),
+            "p99_us": round(latencies[int(len(latencies) * 0.99) - 1], 1),
+            "hit_rate": round(found / lookups, 3),
+        }
+    return results
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate and benchmark the flight/hotel inventory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="Write a synthetic inventory to a directory")
+    gen.add_argument("path")
+    gen.add_argument("--start", default=date.today().isoformat())
+    gen.add_argument("--days", type=int, default=365)
+    gen.add_argument("--airports", type=int, default=None, help="Airports, beyond the gazetteer's get synthetic codes")
+    gen.add_argument("--route-density", type=float, default=0.25)
+    gen.add_argument("--flights-per-route", type=int, default=6)
+    gen.add_argument("--hotels-per-city", type=int, default=40)
+    gen.add_argument("--seed", type=int, default=7)
+
+    bench = commands.add_parser("bench", help="Time lookups against an inventory directory")
+    bench.add_argument("path")
+    bench.add_argument("--lookups", type=int, default=10000)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        start = date.fromisoformat(args.start)
+        began = time.perf_counter()
+        inventory = generate(
+            start,
+            days=args.days,
+            airports=args.airports,
+            route_density=args.route_density,
+            flights_per_route=args.flights_per_route,
+            hotels_per_city=args.hotels_per_city,
+            seed=args.seed,
+        )
+        inventory.save(args.path)
+        print(
+            f"Wrote {inventory.flight_count:,} flights and {inventory.rate_count:,} hotel rates "
+            f"for {len(inventory.airports)} airports to {args.path} in {time.perf_counter() - began:.1f}s"
+        )
+    else:
+        began = time.perf_counter()
+        inventory = Inventory.load(args.path)
+        print(f"Loaded {inventory.flight_count:,} flights and {inventory.rate_count:,} hotel rates in {(time.perf_counter() - began) * 1000:.1f} ms")
+        for kind, stats in benchmark(inventory, args.lookups).items():
+            print(
+                f"{kind:>20}: {stats['lookups_per_sec']:,.0f} lookups/s, p50 {stats['p50_us']} us, "
+                f"p99 {stats['p99_us']} us, {stats['hit_rate']:.0%} found"
+            )
+
+if __name__ == "__main__":
+    main()
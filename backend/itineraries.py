@@ -0,0 +1,88 @@
+import heapq
+import itertools
+from datetime import date, timedelta
+from typing import List, Tuple
+
+from inventory import EPOCH, Inventory, day_number
+from records import Flight, Itinerary
+
+MINUTES_PER_DAY = 24 * 60
+# Upper bound on the flights of one route and day considered for a connection
+MAX_FLIGHTS_PER_DAY = 64
+
+def _departs_at(flight: Flight) -> int:
+    """Minutes since the epoch, times being local to a single synthetic clock"""
+    hours, minutes = flight.departure_time.split(":")
+    return day_number(date.fromisoformat(flight.date)) * MINUTES_PER_DAY + int(hours) * 60 + int(minutes)
+
+def _arrives_at(flight: Flight) -> int:
+    return _departs_at(flight) + flight.duration_minutes
+
+def search_itineraries(
+    inventory: Inventory,
+    departure: str,
+    destination: str,
+    day: date,
+    flexible_days: int = 0,
+    max_stops: int = 1,
+    sort_by: str = "price",
+    limit: int = 5,
+    min_layover: int = 60,
+    max_layover: int = 12 * 60,
+    flights_per_route: int = 3,
+) -> List[Itinerary]:
+    """The `limit` best itineraries departing within `flexible_days` of `day`.
+
+    A best-first search over flights as edges, ordered by total price or by
+    elapsed time from the first departure ("duration"). Connections need
+    between `min_layover` and `max_layover` minutes on the ground, no airport
+    is visited twice, and from each airport only the `flights_per_route`
+    cheapest flights to each next airport on a day are followed. Each airport
+    is expanded at most `limit` times, the k-shortest-paths bound: the k best
+    itineraries cannot need more than k partial paths through any airport.
+    """
+    if departure == destination:
+        return []
+    by_duration = sort_by == "duration"
+
+    def cost(legs: Tuple[Flight, ...]) -> float:
+        if by_duration:
+            return _arrives_at(legs[-1]) - _departs_at(legs[0])
+        return sum(leg.price for leg in legs)
+
+    order = itertools.count()
+    frontier: List[Tuple[float, int, Tuple[Flight, ...]]] = []
+    first_day = day - timedelta(days=flexible_days)
+    for offset in range(2 * flexible_days + 1):
+        for next_stop in inventory.routes_from(departure):
+            if max_stops == 0 and next_stop != destination:
+                continue
+            for flight in inventory.search_flights(departure, next_stop, first_day + timedelta(days=offset), limit=flights_per_route):
+                heapq.heappush(frontier, (cost((flight,)), next(order), (flight,)))
+
+    results: List[Itinerary] = []
+    expanded = {}
+    while frontier and len(results) < limit:
+        total, _, legs = heapq.heappop(frontier)
+        airport = legs[-1].destination
+        if airport == destination:
+            results.append(Itinerary.from_legs(legs))
+            continue
+        expanded[airport] = expanded.get(airport, 0) + 1
+        if expanded[airport] > limit:
+            continue
+
+        visited = {departure, *(leg.destination for leg in legs)}
+        last_stop = len(legs) == max_stops
+        earliest = _arrives_at(legs[-1]) + min_layover
+        latest = _arrives_at(legs[-1]) + max_layover
+        for next_stop in inventory.routes_from(airport):
+            if next_stop in visited or (last_stop and next_stop != destination):
+                continue
+            for days in range(earliest // MINUTES_PER_DAY, latest // MINUTES_PER_DAY + 1):
+                flights = inventory.search_flights(airport, next_stop, date.fromordinal(days + EPOCH), limit=MAX_FLIGHTS_PER_DAY)
+                connecting = [flight for flight in flights if earliest <= _departs_at(flight) <= latest]
+                for flight in connecting[:flights_per_route]:
+                    path = legs + (flight,)
+                    heapq.heappush(frontier, (cost(path), next(order), path))
+    return results
@@ -4,71 +4,360 @@ Main server file for Travel Booking Agent using A2A Protocol
 Integrates flights and hotels agents with Google's Agent 2 Agent framework
 """
 
+import argparse
+import asyncio
+import importlib
 import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+from uuid import uuid4
+
 import uvicorn
 from dotenv import load_dotenv
-from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
-from a2a.server.tasks import InMemoryTaskStore
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.types import ASGIApp, Receive, Scope, Send
+from a2a.types import AgentCard, Message, MessageSendParams, Part, Role, TextPart
 from a2a_flights import flights_agent_card
+from a2a_hotels import hotels_agent_card
+from a2a_travel import travel_agent_card
+from batch import BatchError, BatchRunner, ndjson_lines, parse_batch, sse_events
+from telemetry import metrics, metrics_endpoint
+
+PORT = int(os.getenv("PORT", "9999"))
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", f"http://localhost:{PORT}")
+
+# Agents hosted by this server: name -> (agent card, executor class as "module.Class").
+# Each one is mounted at /agents/<name>/ with its own request handler and task store.
+# Executors are imported when the agent is built, the cards are all that is needed up front.
+AGENTS = {
+    "travel": (travel_agent_card, "travel_agent_executor.TravelAgentExecutor"),
+    "flights": (flights_agent_card, "flights_agent_executor.FlightsAgentExecutor"),
+    "hotels": (hotels_agent_card, "hotels_agent_executor.HotelsAgentExecutor"),
+}
+
+# Most queries one batch request may hold, and how many of them run at once unless it asks for fewer
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+# Agent whose card is also served at the server root
+DEFAULT_AGENT = "travel"
+
+# Comma-separated subset of AGENTS to host, so flights and hotels can run as their own
+# services and the travel agent can delegate to them (see FLIGHTS_AGENT_URL/HOTELS_AGENT_URL)
+HOSTED_AGENTS = [name.strip() for name in os.getenv("HOSTED_AGENTS", "").split(",") if name.strip()] or list(AGENTS)
 
-# Import our custom components
-# from agents import public_agent_card, specific_extended_agent_card
-from flights_agent_executor import FlightsAgentExecutor
-# from agent_executor import TravelAgentExecutor
+# "lazy" serves cards and probes right away and builds the agents in the background,
+# "eager" builds every agent before create_server returns
+STARTUP_MODE = os.getenv("STARTUP_MODE", "lazy").lower()
 
-def create_server():
+def create_agent_app(agent_card, agent_executor, task_store=None):
     """
-    Create and configure the A2A Starlette application server
+    Create the A2A application for a single agent
     """
-    # Initialize the request handler with our custom agent executor
+    from a2a.server.apps import A2AStarletteApplication
+    from a2a.server.request_handlers import DefaultRequestHandler
+    from a2a.server.tasks import InMemoryTaskStore
+
     request_handler = DefaultRequestHandler(
-        agent_executor=FlightsAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        agent_executor=agent_executor,
+        task_store=task_store or InMemoryTaskStore(),
     )
-
-    # Create the A2A Starlette application
-    server = A2AStarletteApplication(
-        agent_card=flights_agent_card,
+    return A2AStarletteApplication(
+        agent_card=agent_card,
         http_handler=request_handler,
-        # extended_agent_card=specific_extended_agent_card,
     )
-    
-    return server
+
+# Agents are built one at a time, they share the model/graph registry
+_build_lock = threading.Lock()
+_state_configured = False
+_state_store = None
+
+def configure_state():
+    """Select the state backend and point the shared components at it, once per process"""
+    global _state_configured, _state_store
+    if _state_configured:
+        return _state_store
+    from agents import flight_bookings, hotel_bookings, registry, response_cache, search_cache
+    from availability import get_availability
+    from checkpointer import KeyValueCheckpointSaver
+    from inventory import get_inventory
+    from storage import state_store_from_env
+
+    # With a shared state backend, tasks and conversation checkpoints live outside
+    # the process so every worker can serve every conversation
+    state_store = state_store_from_env()
+    if state_store is not None:
+        registry.configure(
+            checkpointer_factory=lambda name: KeyValueCheckpointSaver(
+                state_store,
+                namespace=name,
+                ttl_seconds=float(os.getenv("CHECKPOINT_TTL_SECONDS", "3600")),
+                keep_checkpoints=int(os.getenv("CHECKPOINT_KEEP", "2")),
+            )
+        )
+        # A retry landing on another worker still finds the original booking
+        flight_bookings.configure(store=state_store)
+        hotel_bookings.configure(store=state_store)
+        # Rooms held by one worker are taken for all of them
+        get_availability().configure(store=state_store)
+
+    # Cache hit rates are read from the caches' own counters at scrape time
+    metrics.add_cache("tool", search_cache.stats)
+    if response_cache is not None:
+        metrics.add_cache("response", response_cache.stats)
+
+    # Generated or mapped now rather than by the first search
+    get_inventory()
+
+    _state_store, _state_configured = state_store, True
+    return state_store
+
+def build_agent_app(name: str, card: AgentCard) -> Tuple[ASGIApp, Any]:
+    """Import and construct one hosted agent: executor, admission control, task store and A2A app.
+
+    Returns the ASGI app and its A2A request handler, which batches call directly.
+    """
+    with _build_lock:
+        from admission import AdmissionControlledExecutor, AdmissionController
+        from storage import KeyValueTaskStore
+
+        state_store = configure_state()
+        module, class_name = AGENTS[name][1].rsplit(".", 1)
+        executor_class = getattr(importlib.import_module(module), class_name)
+        task_store = KeyValueTaskStore(state_store, namespace=name) if state_store is not None else None
+        # Bounded concurrency and queueing per agent, overload is rejected instead of timing out
+        executor = AdmissionControlledExecutor(executor_class(), AdmissionController.from_env(name))
+        agent_app = create_agent_app(card, executor, task_store)
+        return agent_app.build(), agent_app.handler.request_handler
+
+class AgentMount:
+    """ASGI app for one hosted agent that is built on first use or by the startup warm-up.
+
+    Until the agent is built its card is answered from the card alone, and
+    other requests wait for the build, which runs in a thread so the event
+    loop keeps serving cards and probes meanwhile. A failed build is retried
+    by the next request.
+    """
+
+    def __init__(self, name: str, card: AgentCard, build: Callable[[str, AgentCard], Tuple[ASGIApp, Any]] = build_agent_app):
+        self.name = name
+        self.card = card
+        self._build = build
+        self.app: Optional[ASGIApp] = None
+        self.handler = None
+        self.error: Optional[BaseException] = None
+        self._building: Optional[asyncio.Future] = None
+
+    @property
+    def state(self) -> str:
+        if self.app is not None:
+            return "ready"
+        if self._building is not None:
+            return "building"
+        return "failed" if self.error is not None else "pending"
+
+    def build_now(self) -> None:
+        self.app, self.handler = self._build(self.name, self.card)
+
+    async def ensure_built(self) -> ASGIApp:
+        if self.app is not None:
+            return self.app
+        if self._building is None:
+            self._building = asyncio.ensure_future(asyncio.to_thread(self._build, self.name, self.card))
+        building = self._building
+        try:
+            app, handler = await asyncio.shield(building)
+        except Exception as e:
+            self.error = e
+            if self._building is building:
+                self._building = None
+            raise
+        self.app, self.handler, self.error = app, handler, None
+        return app
+
+    async def send(self, query: str, context_id: Optional[str] = None):
+        """Run one query to completion through the agent's request handler, as message/send would"""
+        await self.ensure_built()
+        message = Message(role=Role.user, parts=[Part(root=TextPart(text=query))], messageId=uuid4().hex, contextId=context_id)
+        return await self.handler.on_message_send(MessageSendParams(message=message))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.app is None and scope["type"] == "http" and scope["path"].endswith("/.well-known/agent.json"):
+            await JSONResponse(self.card.model_dump(mode="json", exclude_none=True))(scope, receive, send)
+            return
+        try:
+            app = await self.ensure_built()
+        except Exception as e:
+            await JSONResponse({"error": f"Agent {self.name} is not available: {e}"}, status_code=503)(scope, receive, send)
+            return
+        await app(scope, receive, send)
+
+def create_server(
+    base_url: str = PUBLIC_BASE_URL,
+    startup_mode: str = STARTUP_MODE,
+    agents: Optional[Sequence[str]] = None,
+    close_clients: bool = True,
+) -> Starlette:
+    """
+    Create the ASGI application hosting the agents (all of HOSTED_AGENTS by default) on one server
+
+    The process-wide pooled HTTP clients are closed when the server shuts
+    down, unless `close_clients` is off because another server in the same
+    process keeps using them.
+    """
+    cards: Dict[str, AgentCard] = {}
+    mounts: Dict[str, AgentMount] = {}
+    routes = []
+    for name in agents or HOSTED_AGENTS:
+        agent_card = AGENTS[name][0]
+        # Point the card at the path the agent is actually served from
+        cards[name] = agent_card.model_copy(update={"url": f"{base_url}/agents/{name}/"})
+        mounts[name] = AgentMount(name, cards[name])
+        if startup_mode == "eager":
+            mounts[name].build_now()
+        routes.append(Mount(f"/agents/{name}", app=mounts[name]))
+
+    async def discover(request: Request) -> JSONResponse:
+        """List the hosted agents and where to reach them"""
+        return JSONResponse({
+            "agents": [
+                {
+                    "name": name,
+                    "url": card.url,
+                    "agent_card_url": f"{card.url}.well-known/agent.json",
+                    "card": card.model_dump(mode="json", exclude_none=True),
+                }
+                for name, card in cards.items()
+            ]
+        })
+
+    root_agent = DEFAULT_AGENT if DEFAULT_AGENT in cards else next(iter(cards))
+
+    async def default_agent_card(request: Request) -> JSONResponse:
+        return JSONResponse(cards[root_agent].model_dump(mode="json", exclude_none=True))
+
+    batches = BatchRunner.from_env(lambda agent, query, context_id: mounts[agent].send(query, context_id))
+
+    async def batch(request: Request):
+        """Run many queries in one request, streaming each result as NDJSON (or SSE) as it finishes"""
+        try:
+            items, concurrency = parse_batch(await request.json(), list(mounts), root_agent, BATCH_MAX_ITEMS)
+        except (BatchError, ValueError) as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        results = batches.run(items, min(concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+        if "text/event-stream" in request.headers.get("accept", ""):
+            return StreamingResponse(sse_events(results), media_type="text/event-stream")
+        return StreamingResponse(ndjson_lines(results), media_type="application/x-ndjson")
+
+    async def liveness(request: Request) -> JSONResponse:
+        """The process is up and serving; restart it if this stops answering"""
+        return JSONResponse({"status": "alive"})
+
+    async def readiness(request: Request) -> JSONResponse:
+        """Every agent is built; send traffic only once this returns 200"""
+        states = {name: mount.state for name, mount in mounts.items()}
+        errors = {name: str(mount.error) for name, mount in mounts.items() if mount.error is not None}
+        ready = all(state == "ready" for state in states.values())
+        body = {"status": "ready" if ready else "starting", "agents": states}
+        if errors:
+            body["errors"] = errors
+        return JSONResponse(body, status_code=200 if ready else 503)
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        async def warm_up() -> None:
+            for mount in mounts.values():
+                try:
+                    await mount.ensure_built()
+                except Exception as e:
+                    print(f"⚠️  Building the {mount.name} agent failed: {e}")
+
+        warming = asyncio.create_task(warm_up())
+        try:
+            yield
+        finally:
+            warming.cancel()
+            # Only an agent build creates pooled clients, there is nothing to close before one
+            if close_clients and _state_configured:
+                from agents import registry
+                from remote_agents import close_remote_agents
+                await registry.aclose()
+                await close_remote_agents()
+
+    routes += [
+        Route("/a2a/discover", discover, methods=["GET"]),
+        Route("/a2a/batch", batch, methods=["POST"]),
+        Route("/.well-known/agent.json", default_agent_card, methods=["GET"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        Route("/healthz", liveness, methods=["GET"]),
+        Route("/readyz", readiness, methods=["GET"]),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan)
 
 def main():
     """
     Main function to start the server
     """
-    
+    parser = argparse.ArgumentParser(description="Travel Booking Agent Server")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="number of worker processes")
+    args = parser.parse_args()
+
     # Validate environment variables
 
     load_dotenv()
     if not os.getenv("OPENAI_API_KEY"):
         print("Warning: OPENAI_API_KEY environment variable not set!")
         print("Please set your OpenAI API key: export OPENAI_API_KEY='your-key-here'")
-    
+
     # if os.getenv("OPENAI_BASE_URL"):
     #     print(f"Using enterprise OpenAI base URL: {os.getenv('OPENAI_BASE_URL')}")
-    
+
     # Create the server
     print("🚀 Starting Travel Booking Agent Server...")
-    print("📍 Server will be available at: http://localhost:9999")
-    print("🔍 Agent discovery endpoint: http://localhost:9999/a2a/discover")
-    print("📋 Available agents: flights, hotels")
-    print("✈️  Flight Agent URL: http://localhost:9999/agents/flights") 
-    print("🏨 Hotel Agent URL: http://localhost:9999/agents/hotels")
+    print(f"📍 Server will be available at: {PUBLIC_BASE_URL}")
+    print(f"🔍 Agent discovery endpoint: {PUBLIC_BASE_URL}/a2a/discover")
+    print(f"📦 Batch endpoint: {PUBLIC_BASE_URL}/a2a/batch")
+    print(f"📈 Metrics endpoint: {PUBLIC_BASE_URL}/metrics")
+    print(f"💓 Liveness / readiness: {PUBLIC_BASE_URL}/healthz, {PUBLIC_BASE_URL}/readyz ({STARTUP_MODE} startup)")
+    print(f"📋 Available agents: {', '.join(HOSTED_AGENTS)}")
+    icons = {"travel": "🧭 Travel", "flights": "✈️  Flight", "hotels": "🏨 Hotel"}
+    for name in HOSTED_AGENTS:
+        print(f"{icons[name]} Agent URL: {PUBLIC_BASE_URL}/agents/{name}/")
+    for name in ("flights", "hotels"):
+        if os.getenv(f"{name.upper()}_AGENT_URL"):
+            print(f"🔗 Travel agent delegates {name} to: {os.getenv(f'{name.upper()}_AGENT_URL')}")
+
+    if args.workers > 1:
+        # Workers are separate processes, in-process state would not be shared
+        if os.getenv("STATE_BACKEND", "memory").lower() == "memory":
+            os.environ["STATE_BACKEND"] = "sqlite"
+        print(f"👷 Workers: {args.workers} (shared state: {os.environ['STATE_BACKEND']})")
+        print()
+        uvicorn.run(
+            "main:create_server",
+            factory=True,
+            workers=args.workers,
+            host='0.0.0.0',
+            port=PORT,
+            log_level="info"
+        )
+        return
     print()
-    
+
     server = create_server()
-    
+
     # Start the server
     uvicorn.run(
-        server.build(), 
-        host='0.0.0.0', 
-        port=9999,
+        server,
+        host='0.0.0.0',
+        port=PORT,
         log_level="info"
     )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,92 @@
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+# =============================================================================
+# CITY GAZETTEER
+# =============================================================================
+
+# City code -> (display name, aliases). Codes are IATA metropolitan/city codes.
+CITIES = {
+    "NYC": ("New York", ["new york", "new york city", "newyork", "nyc", "ny", "manhattan", "jfk", "lga", "ewr"]),
+    "LAX": ("Los Angeles", ["los angeles", "la", "l.a.", "lax"]),
+    "SFO": ("San Francisco", ["san francisco", "sf", "sfo"]),
+    "CHI": ("Chicago", ["chicago", "chi", "ord", "mdw"]),
+    "MIA": ("Miami", ["miami", "mia"]),
+    "BOS": ("Boston", ["boston", "bos"]),
+    "SEA": ("Seattle", ["seattle", "sea"]),
+    "LAS": ("Las Vegas", ["las vegas", "vegas", "las"]),
+    "WAS": ("Washington", ["washington", "washington dc", "dc", "was", "iad", "dca"]),
+    "LON": ("London", ["london", "lon", "lhr", "lgw"]),
+    "PAR": ("Paris", ["paris", "par", "cdg", "ory"]),
+    "TYO": ("Tokyo", ["tokyo", "tyo", "hnd", "nrt"]),
+    "ROM": ("Rome", ["rome", "rom", "fco"]),
+    "BER": ("Berlin", ["berlin", "ber"]),
+    "AMS": ("Amsterdam", ["amsterdam", "ams"]),
+    "MAD": ("Madrid", ["madrid", "mad"]),
+    "DXB": ("Dubai", ["dubai", "dxb"]),
+    "SIN": ("Singapore", ["singapore", "sin"]),
+    "HKG": ("Hong Kong", ["hong kong", "hkg"]),
+    "SYD": ("Sydney", ["sydney", "syd"]),
+    "YTO": ("Toronto", ["toronto", "yto", "yyz"]),
+    "BOM": ("Mumbai", ["mumbai", "bombay", "bom"]),
+    "DEL": ("Delhi", ["delhi", "new delhi", "del"]),
+}
+
+CITY_ALIASES: Dict[str, str] = {
+    alias: code for code, (_, aliases) in CITIES.items() for alias in aliases
+}
+
+def _alias_key(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().lower())
+
+def city_code(text: str) -> Optional[str]:
+    """Return the city code for a city name, alias or airport code, or None if unknown"""
+    return CITY_ALIASES.get(_alias_key(text))
+
+def normalize_city_code(text: str) -> str:
+    """Canonical city code for flight lookups, unknown places are upper-cased"""
+    return city_code(text) or _alias_key(text).upper()
+
+def normalize_city_name(text: str) -> str:
+    """Canonical city name for hotel lookups, unknown places are title-cased"""
+    code = city_code(text)
+    return CITIES[code][0] if code else _alias_key(text).title()
+
+# =============================================================================
+# DATES
+# =============================================================================
+
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+    "%B %d %Y",
+    "%b %d %Y",
+    "%d %B %Y",
+    "%d %b %Y",
+]
+
+def parse_date(text: str, today: Optional[date] = None) -> Optional[date]:
+    """Parse an absolute or simple relative date, or return None if it is not understood"""
+    today = today or date.today()
+    value = _alias_key(text)
+    if value == "today":
+        return today
+    if value == "tomorrow":
+        return today + timedelta(days=1)
+    # "July 1st, 2024" -> "july 1 2024"
+    value = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", value).replace(",", " ")
+    value = re.sub(r"\s+", " ", value)
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+def normalize_date(text: str) -> str:
+    """ISO 8601 form of a date, dates that cannot be parsed are returned stripped"""
+    parsed = parse_date(text)
+    return parsed.isoformat() if parsed else text.strip()
@@ -0,0 +1,92 @@
+import csv
+import io
+from dataclasses import asdict, dataclass, fields, is_dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Sequence, Tuple
+
+@dataclass(frozen=True, slots=True)
+class Flight:
+    flight_number: str
+    departure: str
+    destination: str
+    date: str
+    departure_time: str
+    duration_minutes: int
+    price: float
+
+@dataclass(frozen=True, slots=True)
+class Itinerary:
+    departure: str
+    destination: str
+    departure_date: str
+    stops: int
+    duration_minutes: int
+    price: float
+    legs: Tuple[Flight, ...]
+
+    @classmethod
+    def from_legs(cls, legs: Sequence[Flight]) -> "Itinerary":
+        first, last = legs[0], legs[-1]
+        start = datetime.fromisoformat(f"{first.date}T{first.departure_time}")
+        end = datetime.fromisoformat(f"{last.date}T{last.departure_time}") + timedelta(minutes=last.duration_minutes)
+        return cls(
+            departure=first.departure,
+            destination=last.destination,
+            departure_date=first.date,
+            stops=len(legs) - 1,
+            duration_minutes=int((end - start).total_seconds() // 60),
+            price=round(sum(leg.price for leg in legs), 2),
+            legs=tuple(legs),
+        )
+
+@dataclass(frozen=True, slots=True)
+class Hotel:
+    name: str
+    city: str
+    stars: int
+    room_type: str
+    checkin: str
+    checkout: str
+    price_per_night: float
+    total_price: float
+    rooms_available: int
+
+def _values(record: Any) -> Tuple[Any, ...]:
+    return tuple(getattr(record, f.name) for f in fields(record))
+
+def _cell(value: Any) -> Any:
+    # Nested records (the legs of an itinerary) are written inline, "/" between fields and ";" between records
+    if isinstance(value, tuple) and value and is_dataclass(value[0]):
+        return ";".join("/".join(str(v) for v in _values(item)) for item in value)
+    return value
+
+def _header(name: str, value: Any) -> str:
+    if isinstance(value, tuple) and value and is_dataclass(value[0]):
+        return f"{name}({'/'.join(f.name for f in fields(value[0]))})"
+    return name
+
+def compact(kind: str, records: Sequence[Any]) -> str:
+    """Serialize records for the model as a small CSV table.
+
+    Fields with the same value in every record (the route, the dates) are
+    stated once on the first line, the rest go in one row per record with
+    the header written once. Prices stay plain numbers. This is a fraction
+    of the prompt tokens of prose or of JSON repeating every field name.
+    """
+    if not records:
+        return f"{kind}: none found"
+    names = [f.name for f in fields(records[0])]
+    rows = [_values(r) for r in records]
+    shared = [i for i in range(len(names)) if len(rows) > 1 and all(row[i] == rows[0][i] for row in rows)]
+    varying = [i for i in range(len(names)) if i not in shared]
+
+    out = io.StringIO()
+    out.write(kind + ":" + "".join(f" {names[i]}={_cell(rows[0][i])}," for i in shared).rstrip(",") + "\n")
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow([_header(names[i], rows[0][i]) for i in varying])
+    writer.writerows([[_cell(row[i]) for i in varying] for row in rows])
+    return out.getvalue().rstrip("\n")
+
+def as_data(kind: str, records: Sequence[Any]) -> Dict[str, Any]:
+    """Records as the payload of an A2A DataPart, one object per record for clients"""
+    return {kind: [asdict(r) for r in records]}
@@ -0,0 +1,268 @@
+import asyncio
+import importlib.util
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import uuid4
+
+import httpx
+from a2a.client import A2ACardResolver, A2AClient, A2AClientError
+from a2a.types import (
+    AgentCard,
+    CancelTaskRequest,
+    DataPart,
+    JSONRPCErrorResponse,
+    Message,
+    MessageSendParams,
+    SendStreamingMessageRequest,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskState,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+from telemetry import metrics, span
+
+FAILED_STATES = {TaskState.failed, TaskState.canceled, TaskState.rejected, TaskState.unknown}
+
+CARD_FETCHES = metrics.counter(
+    "travel_remote_card_fetches_total", "Agent card fetches from remote agents, by outcome", ("agent", "outcome")
+)
+
+class RemoteAgentError(Exception):
+    """The remote agent failed the task or could not be reached"""
+
+class CardCache:
+    """Agent cards of remote agents by base URL, fetched again after `ttl_seconds`.
+
+    Concurrent lookups of an expired card share one fetch. If a refresh
+    fails, the expired card keeps being served until the agent answers
+    again, so a brief outage of the card endpoint does not fail requests.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0):
+        self.ttl_seconds = ttl_seconds
+        self._cards: Dict[str, Tuple[float, AgentCard]] = {}
+        self._fetching: Dict[str, asyncio.Future] = {}
+
+    async def get(self, base_url: str, http_client: httpx.AsyncClient, agent: str = "") -> AgentCard:
+        entry = self._cards.get(base_url)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        fetch = self._fetching.get(base_url)
+        if fetch is None:
+            fetch = asyncio.ensure_future(A2ACardResolver(httpx_client=http_client, base_url=base_url).get_agent_card())
+            self._fetching[base_url] = fetch
+            fetch.add_done_callback(lambda _: self._fetching.pop(base_url, None))
+        try:
+            card = await asyncio.shield(fetch)
+        except Exception:
+            CARD_FETCHES.inc(agent=agent, outcome="error")
+            if entry is not None:
+                return entry[1]
+            raise
+        CARD_FETCHES.inc(agent=agent, outcome="ok")
+        self._cards[base_url] = (time.monotonic() + self.ttl_seconds, card)
+        return card
+
+    def invalidate(self, base_url: str) -> None:
+        self._cards.pop(base_url, None)
+
+card_cache = CardCache(ttl_seconds=float(os.getenv("REMOTE_AGENT_CARD_TTL_SECONDS", "300")))
+
+def _text(parts) -> str:
+    return "".join(part.root.text for part in parts or [] if isinstance(part.root, TextPart))
+
+class RemoteAgent:
+    """A specialist agent served by another A2A server, used like FlightsAgent/HotelsAgent.
+
+    The agent is found through its card at `base_url` (cached, see CardCache)
+    and sub-queries are sent with message/stream over one long-lived pooled
+    HTTP client, so delegating costs neither a connection nor a card fetch
+    per request. The remote events are translated into the event dicts of
+    agents.stream_agent as they arrive. The coordinator's conversation id is
+    sent as the context id, so follow-up questions continue the remote
+    conversation, and a remote task abandoned mid-stream (timeout, cancel)
+    is cancelled on the remote server as well.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        card: Optional[AgentCard] = None,
+        cards: CardCache = card_cache,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.cards = cards
+        # Until the remote card is resolved, routing uses the card shipped with this server
+        self.agent_card = card
+        self.http = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+        self._cancels: Set[asyncio.Task] = set()
+
+    def get_agent_card(self) -> Optional[AgentCard]:
+        return self.agent_card
+
+    async def stream(self, query: str, thread_id: str, task_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Send the query to the remote agent, yielding its progress as it happens"""
+        with span("remote_card", agent=self.name):
+            try:
+                self.agent_card = await self.cards.get(self.base_url, self.http, agent=self.name)
+            except (A2AClientError, httpx.HTTPError, OSError) as e:
+                raise RemoteAgentError(f"{self.name} agent card unavailable: {e}") from e
+        client = A2AClient(httpx_client=self.http, agent_card=self.agent_card)
+        request = SendStreamingMessageRequest(
+            id=uuid4().hex,
+            params=MessageSendParams(
+                message=Message(
+                    role="user",
+                    parts=[TextPart(text=query)],
+                    messageId=uuid4().hex,
+                    contextId=thread_id,
+                )
+            ),
+        )
+
+        text: List[str] = []
+        remote_task: Optional[str] = None
+        finished = False
+        try:
+            async for response in client.send_message_streaming(request):
+                result = response.root
+                if isinstance(result, JSONRPCErrorResponse):
+                    raise RemoteAgentError(f"{self.name} agent: {result.error.message}")
+                event = result.result
+                if isinstance(event, Task):
+                    remote_task = event.id
+                elif isinstance(event, TaskArtifactUpdateEvent):
+                    remote_task = event.taskId
+                    for part in event.artifact.parts:
+                        if isinstance(part.root, DataPart):
+                            tool = (event.artifact.metadata or {}).get("tool", event.artifact.name)
+                            yield {"type": "tool_result", "name": tool, "content": "", "data": part.root.data}
+                        elif isinstance(part.root, TextPart) and part.root.text:
+                            text.append(part.root.text)
+                            yield {"type": "token", "content": part.root.text}
+                elif isinstance(event, TaskStatusUpdateEvent):
+                    remote_task = event.taskId
+                    message = _text(event.status.message.parts) if event.status.message else ""
+                    if event.status.state in FAILED_STATES:
+                        finished = True
+                        raise RemoteAgentError(message or f"{self.name} agent task {event.status.state.value}")
+                    if event.final:
+                        finished = True
+                        # Questions back to the user and partial-result notes are part of the answer
+                        if message:
+                            text.append(message)
+                            yield {"type": "token", "content": message}
+                    elif message:
+                        yield {"type": "status", "content": message}
+                elif isinstance(event, Message):
+                    finished = True
+                    text.append(_text(event.parts))
+                    yield {"type": "token", "content": text[-1]}
+        except (A2AClientError, httpx.HTTPError, OSError) as e:
+            # The agent may have moved, look it up again next time
+            self.cards.invalidate(self.base_url)
+            raise RemoteAgentError(f"{self.name} agent unreachable: {e}") from e
+        finally:
+            if remote_task is not None and not finished:
+                self._cancel_remote(client, remote_task)
+        yield {"type": "done", "content": "".join(text)}
+
+    def _cancel_remote(self, client: A2AClient, task_id: str) -> None:
+        """Cancel an abandoned remote task in the background, best effort"""
+        async def cancel() -> None:
+            try:
+                await client.cancel_task(
+                    CancelTaskRequest(id=uuid4().hex, params=TaskIdParams(id=task_id)),
+                    http_kwargs={"timeout": 5.0},
+                )
+            except Exception:
+                pass
+
+        task = asyncio.get_running_loop().create_task(cancel())
+        self._cancels.add(task)
+        task.add_done_callback(self._cancels.discard)
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client, once the remote cancels in progress are sent"""
+        if self._cancels:
+            await asyncio.gather(*self._cancels, return_exceptions=True)
+        await self.http.aclose()
+
+_remote_agents: Dict[Tuple[str, str], RemoteAgent] = {}
+
+def remote_agent(name: str, base_url: str, card: Optional[AgentCard] = None) -> RemoteAgent:
+    """The process-wide RemoteAgent for an agent URL, so its connection pool is shared"""
+    key = (name, base_url.rstrip("/"))
+    if key not in _remote_agents:
+        _remote_agents[key] = RemoteAgent(
+            name,
+            base_url,
+            card,
+            max_connections=int(os.getenv("REMOTE_AGENT_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("REMOTE_AGENT_MAX_KEEPALIVE_CONNECTIONS", "20")),
+            keepalive_expiry=float(os.getenv("REMOTE_AGENT_KEEPALIVE_EXPIRY", "30")),
+        )
+    return _remote_agents[key]
+
+async def close_remote_agents() -> None:
+    """Close the pooled clients of every process-wide RemoteAgent, at shutdown"""
+    agents = list(_remote_agents.values())
+    _remote_agents.clear()
+    await asyncio.gather(*(agent.aclose() for agent in agents))
+
+def remote_agent_urls(names: Sequence[str]) -> Dict[str, str]:
+    """Base URLs of the agents configured as remote, from <NAME>_AGENT_URL"""
+    urls = {name: os.getenv(f"{name.upper()}_AGENT_URL", "") for name in names}
+    return {name: url for name, url in urls.items() if url}
+
+# =============================================================================
+# STAND-IN SERVERS
+# =============================================================================
+
+@asynccontextmanager
+async def stand_in_server(agents: Sequence[str] = ("flights", "hotels")) -> AsyncIterator[Dict[str, str]]:
+    """Serve some agents from this process on a free local port, as a separately
+    deployed service would, and yield their base URLs by name.
+
+    For exercising remote delegation in tests and benchmarks without
+    starting other processes; the agents use the process-wide model registry
+    and remote agent clients, which are left open when the stand-in stops.
+    """
+    import uvicorn
+    from main import create_server
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    server = uvicorn.Server(uvicorn.Config(
+        create_server(base_url, startup_mode="eager", agents=agents, close_clients=False), host="127.0.0.1", port=port, log_level="warning"
+    ))
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        if serve.done():
+            serve.result()
+        await asyncio.sleep(0.01)
+    try:
+        yield {name: f"{base_url}/agents/{name}" for name in agents}
+    finally:
+        server.should_exit = True
+        await serve
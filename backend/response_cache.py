@@ -0,0 +1,210 @@
+import hashlib
+import math
+import re
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from normalize import city_code
+
+# Queries with these intents change state and must always reach the agent
+BOOKING_INTENT = re.compile(r"\b(book|booking|reserve|reservation|confirm|cancel|pay)\w*\b", re.IGNORECASE)
+
+# Tools whose use makes a response unsafe to replay
+BOOKING_TOOLS = {"book_flight", "book_hotel"}
+
+SparseVector = Dict[int, float]
+
+# =============================================================================
+# TEXT NORMALIZATION
+# =============================================================================
+
+def normalize_query(query: str) -> str:
+    """Lower-case, strip punctuation and collapse whitespace"""
+    text = re.sub(r"[^\w\s:/-]", " ", query.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+def entity_signature(query: str) -> Tuple:
+    """Places (in order), numbers and relative date words mentioned in a query.
+
+    Two queries can only share a response if these match exactly, so that
+    "London to New York" never answers "New York to London".
+    """
+    words = normalize_query(query).split()
+    places: List[str] = []
+    i = 0
+    while i < len(words):
+        # Longest gazetteer match first ("new york city" before "new york")
+        for size in (3, 2, 1):
+            code = city_code(" ".join(words[i:i + size]))
+            if code:
+                places.append(code)
+                i += size
+                break
+        else:
+            i += 1
+    numbers = tuple(w for w in words if any(c.isdigit() for c in w))
+    relative = tuple(w for w in words if w in ("today", "tomorrow", "tonight", "weekend", "next", "this"))
+    return tuple(places), numbers, relative
+
+# =============================================================================
+# LOCAL EMBEDDER AND VECTOR INDEX
+# =============================================================================
+
+def hashing_embedder(text: str, dimensions: int = 1 << 18) -> SparseVector:
+    """Deterministic bag of word unigrams and bigrams, hashed and L2 normalized"""
+    words = normalize_query(text).split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    vector: SparseVector = defaultdict(float)
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        vector[int.from_bytes(digest, "little") % dimensions] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+    return {i: v / norm for i, v in vector.items()}
+
+class VectorIndex:
+    """Cosine similarity search over sparse, normalized vectors using an inverted index"""
+
+    def __init__(self):
+        self._vectors: Dict[Hashable, SparseVector] = {}
+        self._postings: Dict[int, Set[Hashable]] = defaultdict(set)
+
+    def add(self, key: Hashable, vector: SparseVector) -> None:
+        self.remove(key)
+        self._vectors[key] = vector
+        for i in vector:
+            self._postings[i].add(key)
+
+    def remove(self, key: Hashable) -> None:
+        vector = self._vectors.pop(key, None)
+        for i in vector or ():
+            self._postings[i].discard(key)
+            if not self._postings[i]:
+                del self._postings[i]
+
+    def search(self, vector: SparseVector, min_score: float) -> List[Tuple[float, Hashable]]:
+        """Return (score, key) pairs scoring at least min_score, best first"""
+        scores: Dict[Hashable, float] = defaultdict(float)
+        for i, weight in vector.items():
+            for key in self._postings.get(i, ()):
+                scores[key] += weight * self._vectors[key][i]
+        return sorted(((s, k) for k, s in scores.items() if s >= min_score), reverse=True)
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+# =============================================================================
+# RESPONSE CACHE
+# =============================================================================
+
+@dataclass
+class CachedResponse:
+    content: str
+    entities: Tuple
+    expires_at: float
+
+class ResponseCache:
+    """Two-tier cache of final agent answers.
+
+    Entries are scoped by namespace (which agent) and a fingerprint of the
+    conversation so far. The exact tier matches normalized query text; the
+    semantic tier matches by embedding similarity, but only between queries
+    that mention the same places, numbers and relative dates.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 512,
+        ttl_seconds: Optional[float] = 600.0,
+        similarity_threshold: float = 0.9,
+        embedder: Callable[[str], SparseVector] = hashing_embedder,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder
+        # (namespace, state_key, normalized query) -> response, least recently used first
+        self._entries: "OrderedDict[Tuple[str, str, str], CachedResponse]" = OrderedDict()
+        self._indexes: Dict[Tuple[str, str], VectorIndex] = defaultdict(VectorIndex)
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+    @staticmethod
+    def is_cacheable(query: str) -> bool:
+        return not BOOKING_INTENT.search(query)
+
+    def lookup(self, namespace: str, query: str, state_key: str = "") -> Optional[str]:
+        """Return a cached answer for the query, or None"""
+        if not self.is_cacheable(query):
+            self.bypassed += 1
+            return None
+        key = (namespace, state_key, normalize_query(query))
+        entry = self._live(key)
+        if entry is not None:
+            self.exact_hits += 1
+            return entry.content
+
+        index = self._indexes.get((namespace, state_key))
+        if index:
+            entities = entity_signature(query)
+            for _, candidate in index.search(self.embedder(query), self.similarity_threshold):
+                entry = self._live(candidate)
+                if entry is not None and entry.entities == entities:
+                    self.semantic_hits += 1
+                    return entry.content
+        self.misses += 1
+        return None
+
+    def store(self, namespace: str, query: str, content: str, state_key: str = "") -> None:
+        if not content or not self.is_cacheable(query):
+            return
+        key = (namespace, state_key, normalize_query(query))
+        ttl = self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        self._entries[key] = CachedResponse(content, entity_signature(query), time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        self._indexes[(namespace, state_key)].add(key, self.embedder(query))
+        while len(self._entries) > self.max_size:
+            self._drop(next(iter(self._entries)))
+
+    def _live(self, key: Tuple[str, str, str]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _drop(self, key: Tuple[str, str, str]) -> None:
+        del self._entries[key]
+        index_key = key[:2]
+        index = self._indexes.get(index_key)
+        if index is not None:
+            index.remove(key)
+            if not index:
+                del self._indexes[index_key]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+        }
+
+def thread_fingerprint(messages: List[Any]) -> str:
+    """Stable digest of the conversation so far, "" for a new conversation"""
+    if not messages:
+        return ""
+    digest = hashlib.sha1()
+    for message in messages:
+        digest.update(message.type.encode())
+        digest.update(str(message.content).encode())
+    return digest.hexdigest()
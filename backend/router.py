@@ -0,0 +1,156 @@
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from a2a.types import AgentCard
+from storage import KeyValueStore
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "for", "from", "help", "in", "into",
+    "is", "it", "of", "on", "or", "the", "their", "to", "with", "after", "based", "various",
+    "specific", "available", "provide", "provides", "generates", "handles", "manages", "services",
+    "specialized", "complete", "details", "information", "numbers", "users", "find",
+}
+
+# Weight of a term by where it came from; tags and hand-picked keywords are strong evidence
+TAG_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.5
+
+def stem(token: str) -> str:
+    """Very small plural stemmer so "flights"/"rooms" match "flight"/"room" """
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    return [stem(t) for t in TOKEN_PATTERN.findall(text.lower())]
+
+def _terms(text: str) -> Iterable[str]:
+    """Words and adjacent word pairs of a text, without stopwords"""
+    tokens = tokenize(text)
+    for token in tokens:
+        if token not in STOPWORDS:
+            yield token
+    for a, b in zip(tokens, tokens[1:]):
+        yield f"{a} {b}"
+
+@dataclass
+class RouteResult:
+    agent: str
+    """Best agent, "both" when several agents are clearly involved, "unclear" when none is"""
+    confidence: float
+    agents: List[str] = field(default_factory=list)
+    """All agents with enough evidence, best first"""
+    scores: Dict[str, float] = field(default_factory=dict)
+
+class IntentRouter:
+    """Routes queries to agents with a precomputed term index.
+
+    The vocabulary of each agent comes from its AgentCard (skill tags, names and
+    descriptions) plus optional extra keywords. Terms that belong to more than one
+    agent ("travel", "booking") carry no weight. Routing a query is one dict
+    lookup per word and word pair, with no model call.
+    """
+
+    def __init__(self, index: Dict[str, Dict[str, float]], agents: List[str], min_evidence: float = 1.0):
+        self.index = index
+        self.agents = agents
+        self.min_evidence = min_evidence
+
+    @classmethod
+    def from_cards(
+        cls,
+        cards: Mapping[str, AgentCard],
+        extra_vocabulary: Optional[Mapping[str, Iterable[str]]] = None,
+        min_evidence: float = 1.0,
+    ) -> "IntentRouter":
+        # term -> agent -> weight, before removing shared terms
+        weights: Dict[str, Dict[str, float]] = {}
+
+        def add(agent: str, text: str, weight: float) -> None:
+            for term in _terms(text.replace("-", " ")):
+                per_agent = weights.setdefault(term, {})
+                per_agent[agent] = max(per_agent.get(agent, 0.0), weight)
+
+        for agent, card in cards.items():
+            add(agent, card.description, DESCRIPTION_WEIGHT)
+            for skill in card.skills:
+                add(agent, skill.description, DESCRIPTION_WEIGHT)
+                add(agent, skill.name, TAG_WEIGHT)
+                for tag in skill.tags or []:
+                    add(agent, tag, TAG_WEIGHT)
+        for agent, keywords in (extra_vocabulary or {}).items():
+            for keyword in keywords:
+                add(agent, keyword, TAG_WEIGHT)
+
+        index = {term: per_agent for term, per_agent in weights.items() if len(per_agent) == 1}
+        return cls(index, list(cards), min_evidence=min_evidence)
+
+    def score(self, query: str) -> Dict[str, float]:
+        scores = dict.fromkeys(self.agents, 0.0)
+        seen = set()
+        for term in _terms(query.replace("-", " ")):
+            if term in seen:
+                continue
+            seen.add(term)
+            for agent, weight in self.index.get(term, {}).items():
+                scores[agent] += weight
+        return scores
+
+    def route(self, query: str) -> RouteResult:
+        scores = self.score(query)
+        ranked: List[Tuple[str, float]] = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        total = sum(scores.values())
+        best, best_score = ranked[0]
+        if best_score == 0:
+            return RouteResult("unclear", 0.0, [], scores)
+
+        active = [agent for agent, s in ranked if s >= self.min_evidence]
+        # Share of the evidence, damped when there is little evidence at all
+        confidence = (best_score / total) * (1 - math.exp(-2 * best_score))
+        if len(active) > 1:
+            return RouteResult("both", 1 - math.exp(-2 * scores[active[1]]), active, scores)
+        return RouteResult(best, confidence, active or [best], scores)
+
+class ConversationRoutes:
+    """The agent each conversation was last routed to, by A2A context id.
+
+    Follow-ups such as "book it for Jane" carry no routing terms and stay
+    with the agent the conversation is already talking to. Entries expire
+    after `ttl_seconds` and at most `max_size` are kept, least recently
+    used go first; with a shared `store` they are also written there, so a
+    follow-up served by another worker finds them.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: Optional[float] = 3600.0, store: Optional[KeyValueStore] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        # context id -> (expires_at, agent), least recently used first
+        self._routes: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    async def get(self, context_id: str) -> Optional[str]:
+        entry = self._routes.get(context_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._routes.move_to_end(context_id)
+            return entry[1]
+        self._routes.pop(context_id, None)
+        if self.store is not None:
+            data = await self.store.get(f"route|{context_id}")
+            if data is not None:
+                return data.decode()
+        return None
+
+    async def set(self, context_id: str, agent: str) -> None:
+        ttl = self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        self._routes[context_id] = (time.monotonic() + ttl, agent)
+        self._routes.move_to_end(context_id)
+        while len(self._routes) > self.max_size:
+            self._routes.popitem(last=False)
+        if self.store is not None:
+            await self.store.set(f"route|{context_id}", agent.encode(), self.ttl_seconds)
@@ -0,0 +1,103 @@
+import re
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from normalize import CITIES, CITY_ALIASES, parse_date
+
+# Short aliases that are also English words ("was", "sea", "mad") only count when
+# written in capitals, as airport codes are; these are safe in any case
+LOWERCASE_SHORT_ALIASES = {"nyc", "la", "sf", "dc"}
+
+CITY_PATTERN = re.compile(
+    r"(?<![\w.])(" + "|".join(re.escape(a) for a in sorted(CITY_ALIASES, key=len, reverse=True)) + r")(?![\w])",
+    re.IGNORECASE,
+)
+
+MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+DAY = r"\d{1,2}(?:st|nd|rd|th)?"
+DATE_PATTERN = re.compile(
+    r"\b(?:"
+    r"\d{4}-\d{1,2}-\d{1,2}"
+    r"|\d{1,2}/\d{1,2}/\d{4}"
+    rf"|{MONTH}\s+{DAY}(?:,?\s+\d{{4}})?"
+    rf"|{DAY}\s+(?:of\s+)?{MONTH}(?:,?\s+\d{{4}})?"
+    r"|today|tomorrow"
+    r")\b",
+    re.IGNORECASE,
+)
+NIGHTS_PATTERN = re.compile(r"\b(\d{1,2})\s+nights?\b", re.IGNORECASE)
+
+@dataclass
+class Mention:
+    code: str
+    role: Optional[str]
+    """"from", "to" or "in", from the word before the city"""
+
+def city_mentions(query: str) -> List[Mention]:
+    """Cities named in a query, in order, each once"""
+    mentions: List[Mention] = []
+    for match in CITY_PATTERN.finditer(query):
+        text = match.group(1)
+        if len(text) <= 3 and text.lower() not in LOWERCASE_SHORT_ALIASES and not text.isupper():
+            continue
+        code = CITY_ALIASES[text.lower()]
+        if any(m.code == code for m in mentions):
+            continue
+        before = query[:match.start()].lower().split()
+        role = before[-1] if before and before[-1] in ("from", "to", "in", "at") else None
+        mentions.append(Mention(code, "in" if role == "at" else role))
+    return mentions
+
+def dates_in(query: str, today: Optional[date] = None) -> List[date]:
+    """Dates in a query, in order; dates without a year are the next such day"""
+    today = today or date.today()
+    found = []
+    for match in DATE_PATTERN.finditer(query):
+        text = re.sub(r"\.|\bof\b", " ", match.group(0))
+        parsed = parse_date(text, today)
+        if parsed is None and not re.search(r"\d{4}", text):
+            parsed = parse_date(f"{text} {today.year}", today)
+            if parsed is not None and parsed < today:
+                parsed = parsed.replace(year=today.year + 1)
+        if parsed is not None:
+            found.append(parsed)
+    return found
+
+def extract_flight_slots(query: str, today: Optional[date] = None) -> Optional[Dict[str, str]]:
+    """get_flights arguments a query clearly asks for, or None if any is missing"""
+    mentions = city_mentions(query)
+    departure = next((m.code for m in mentions if m.role == "from"), None)
+    destination = next((m.code for m in mentions if m.role == "to"), None)
+    unassigned = [m.code for m in mentions if m.code not in (departure, destination)]
+    if departure is None and unassigned:
+        departure = unassigned.pop(0)
+    if destination is None and unassigned:
+        destination = unassigned.pop(0)
+    dates = dates_in(query, today)
+    if departure is None or destination is None or not dates:
+        return None
+    return {"departure": departure, "destination": destination, "date": dates[0].isoformat()}
+
+def extract_hotel_slots(query: str, today: Optional[date] = None) -> Optional[Dict[str, str]]:
+    """get_hotels arguments a query clearly asks for, or None if any is missing.
+
+    The city is the one named after "in"/"at", else the destination, else the
+    only one named. The stay is two dates, or a date and a number of nights.
+    """
+    mentions = city_mentions(query)
+    city = next((m.code for m in mentions if m.role == "in"), None)
+    city = city or next((m.code for m in mentions if m.role == "to"), None)
+    if city is None and len(mentions) == 1:
+        city = mentions[0].code
+    dates = dates_in(query, today)
+    nights = NIGHTS_PATTERN.search(query)
+    if city is None or not dates:
+        return None
+    if len(dates) >= 2 and dates[1] > dates[0]:
+        checkout = dates[1]
+    elif nights:
+        checkout = dates[0] + timedelta(days=int(nights.group(1)))
+    else:
+        return None
+    return {"city": CITIES[city][0], "checkin": dates[0].isoformat(), "checkout": checkout.isoformat()}
@@ -0,0 +1,67 @@
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.utils import new_agent_text_message, new_task
+from artifact_stream import ArtifactStreamer, relay_agent_stream
+from cancellation import RunningTasks
+from storage import state_store_from_env
+from telemetry import span, track_request
+import os
+from dotenv import load_dotenv
+
+class SpecialistAgentExecutor(AgentExecutor):
+    """A2A executor serving a single specialist agent.
+
+    Subclasses set `name` ("flights" or "hotels"), which labels the request
+    metrics and the streamed artifact, and `agent_class`, the agent built from
+    the OpenAI settings in the environment.
+    """
+
+    name: str
+    agent_class: type
+
+    def __init__(self):
+        load_dotenv()
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        openai_base_url = os.getenv("OPENAI_BASE_URL")
+        self.agent = self.agent_class(openai_api_key, openai_base_url)
+        self.running = RunningTasks.from_env(state_store_from_env())
+
+    async def execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
+        # tasks/cancel stops this coroutine, see cancel()
+        async with self.running.track(context.task_id, context.context_id, event_queue):
+            task = context.current_task
+            if not task:
+                task = new_task(context.message)
+                await event_queue.enqueue_event(task)
+
+            with track_request(self.name) as request:
+                with span("extract_input"):
+                    query = context.get_user_input()
+
+                updater = TaskUpdater(event_queue, task.id, task.contextId)
+                streamer = ArtifactStreamer(event_queue, task.id, task.contextId, name=f"{self.name}_response")
+
+                try:
+                    # One LangGraph thread per A2A conversation
+                    await relay_agent_stream(
+                        self.agent.stream(query, thread_id=task.contextId or task.id, task_id=task.id), updater, streamer
+                    )
+                except Exception as e:
+                    request.outcome = "failed"
+                    await updater.failed(
+                        new_agent_text_message(f"Error processing query: {str(e)}", task.contextId, task.id)
+                    )
+                    return
+
+                await updater.complete()
+
+    async def cancel(
+        self, context: RequestContext, event_queue: EventQueue
+    ) -> None:
+        """Stop the running request, its model and tool calls, and publish a canceled status"""
+        await self.running.cancel(context, event_queue)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the A2A server
+
+Measures how long `import main` takes in a fresh interpreter, then starts
+`python main.py` as a subprocess with the scripted fake chat model and polls
+it until it serves, timing from process start: the root agent card, the
+liveness and readiness probes, and the first successful message/send to an
+agent. Each startup mode is run several times and the medians are reported
+and saved as JSON:
+
+    python startup_benchmark.py --runs 5
+    python startup_benchmark.py --modes lazy --agent hotels
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+
+from benchmark import DEFAULT_QUERIES, default_query, free_port
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+MILESTONES = ("agent_card", "liveness", "readiness", "first_request")
+
+def server_env(mode: str, port: int) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "PORT": str(port),
+        "STARTUP_MODE": mode,
+        "LLM_BACKEND": "fake",
+        "OPENAI_API_KEY": env.get("OPENAI_API_KEY", "sk-benchmark"),
+    })
+    return env
+
+def import_seconds(mode: str) -> float:
+    """Wall time of `import main` in a fresh interpreter, minus the interpreter's own startup"""
+    def timed(code: str) -> float:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=server_env(mode, 0), check=True)
+        return time.perf_counter() - start
+
+    return max(0.0, timed("import main") - timed("pass"))
+
+def first_request_ok(http: httpx.Client, url: str, query: str) -> bool:
+    payload = {
+        "jsonrpc": "2.0",
+        "id": uuid4().hex,
+        "method": "message/send",
+        "params": {"message": {"role": "user", "parts": [{"kind": "text", "text": query}], "messageId": uuid4().hex}},
+    }
+    response = http.post(url, json=payload)
+    if response.status_code != 200:
+        return False
+    result = response.json().get("result") or {}
+    return result.get("status", {}).get("state") == "completed"
+
+def measure_startup(mode: str, agent: str, query: str, timeout: float) -> Dict[str, Optional[float]]:
+    """Seconds from spawning the server until each milestone is first reached"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    checks = {
+        "agent_card": lambda http: http.get(f"{base_url}/.well-known/agent.json").status_code == 200,
+        "liveness": lambda http: http.get(f"{base_url}/healthz").status_code == 200,
+        "readiness": lambda http: http.get(f"{base_url}/readyz").status_code == 200,
+        "first_request": lambda http: first_request_ok(http, f"{base_url}/agents/{agent}/", query),
+    }
+    reached: Dict[str, Optional[float]] = {name: None for name in MILESTONES}
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "main.py"],
+        cwd=BACKEND_DIR,
+        env=server_env(mode, port),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=httpx.Timeout(30.0)) as http:
+            # Probes are polled in order: a client waiting on readiness would not send before it
+            for name in MILESTONES:
+                while time.perf_counter() - start < timeout:
+                    if process.poll() is not None:
+                        raise RuntimeError(f"Server exited with code {process.returncode} during {mode} startup")
+                    try:
+                        if checks[name](http):
+                            reached[name] = time.perf_counter() - start
+                            break
+                    except httpx.TransportError:
+                        pass
+                    time.sleep(0.005)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return reached
+
+def summarize(runs: List[Dict[str, Optional[float]]], imports: List[float]) -> Dict[str, Any]:
+    ms = lambda v: round(v * 1000, 1)
+    summary: Dict[str, Any] = {"import_ms": ms(statistics.median(imports))}
+    for name in MILESTONES:
+        values = [run[name] for run in runs if run[name] is not None]
+        summary[f"{name}_ms"] = ms(statistics.median(values)) if values else None
+        summary[f"{name}_failures"] = len(runs) - len(values)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup-time benchmark for the Travel Booking Agent Server")
+    parser.add_argument("--modes", nargs="+", choices=["lazy", "eager"], default=["lazy", "eager"], help="startup modes to compare")
+    parser.add_argument("--agent", choices=sorted(DEFAULT_QUERIES), default="flights", help="agent for the first request")
+    parser.add_argument("--query", help="message to send (defaults to a search for the agent)")
+    parser.add_argument("--runs", type=int, default=3, help="server starts per mode")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for each start")
+    parser.add_argument("--output", default="startup_results.json", help="where to write the JSON report")
+    args = parser.parse_args()
+
+    query = args.query or default_query(args.agent)
+    results = {}
+    for mode in args.modes:
+        imports = [import_seconds(mode) for _ in range(args.runs)]
+        runs = [measure_startup(mode, args.agent, query, args.timeout) for _ in range(args.runs)]
+        results[mode] = summarize(runs, imports)
+        summary = results[mode]
+        print(
+            f"{mode:>5}: import {summary['import_ms']} ms, agent card {summary['agent_card_ms']} ms, "
+            f"liveness {summary['liveness_ms']} ms, readiness {summary['readiness_ms']} ms, "
+            f"first request {summary['first_request_ms']} ms"
+        )
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {"agent": args.agent, "query": query, "runs": args.runs},
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from a2a.server.tasks import TaskStore
+from a2a.types import Task
+
+# =============================================================================
+# KEY-VALUE STORES
+# =============================================================================
+
+class KeyValueStore(ABC):
+    """Minimal async key-value interface for state shared between worker processes.
+
+    Keys are strings, values are bytes. Anything offering get/set-with-expiry/
+    set-if-absent/delete/prefix-scan (SQLite, Redis, ...) can back it.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return the value of a key, or None if it is missing or expired"""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Store a value, expiring after `ttl` seconds if given"""
+
+    @abstractmethod
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        """Store a value only if the key is missing or expired, atomically; False if it exists"""
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Delete keys, missing ones are ignored"""
+
+    @abstractmethod
+    async def keys(self, prefix: str) -> List[str]:
+        """Return all live keys starting with prefix, sorted"""
+
+class InMemoryKeyValueStore(KeyValueStore):
+    """Process-local stand-in with the same semantics, for tests and single-worker runs"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._live(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self._data[key] = (value, time.time() + ttl if ttl is not None else None)
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        if self._live(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def keys(self, prefix: str) -> List[str]:
+        return sorted(k for k in list(self._data) if k.startswith(prefix) and self._live(k) is not None)
+
+class SQLiteKeyValueStore(KeyValueStore):
+    """SQLite store in WAL mode, safe to share between worker processes on one host.
+
+    Calls run in a worker thread so the event loop never blocks on disk I/O.
+    """
+
+    # Expired rows are purged every this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL) WITHOUT ROWID"
+        )
+
+    def _execute(self, sql: str, params: Tuple = ()) -> List[Tuple[Any, ...]]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _changes(self, sql: str, params: Tuple = ()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    async def get(self, key: str) -> Optional[bytes]:
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        )
+        return rows[0][0] if rows else None
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires_at = time.time() + ttl if ttl is not None else None
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, value, expires_at),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            await asyncio.to_thread(self._execute, "DELETE FROM kv WHERE expires_at <= ?", (time.time(),))
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        now = time.time()
+        # One statement, so atomic between processes: an expired row is taken over, a live one kept
+        changed = await asyncio.to_thread(
+            self._changes,
+            "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE kv.expires_at IS NOT NULL AND kv.expires_at <= ?",
+            (key, value, now + ttl if ttl is not None else None, now),
+        )
+        return changed > 0
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            placeholders = ", ".join("?" for _ in keys)
+            await asyncio.to_thread(self._execute, f"DELETE FROM kv WHERE key IN ({placeholders})", keys)
+
+    async def keys(self, prefix: str) -> List[str]:
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT key FROM kv WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at > ?) ORDER BY key",
+            (prefix, prefix + "\U0010ffff", time.time()),
+        )
+        return [row[0] for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+class RedisKeyValueStore(KeyValueStore):
+    """Adapter for a redis.asyncio-compatible client (get/set/delete/scan_iter), for multi-host setups"""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000) if ttl is not None else None)
+
+    async def add(self, key: str, value: bytes, ttl: Optional[float] = None) -> bool:
+        return bool(await self.client.set(key, value, px=int(ttl * 1000) if ttl is not None else None, nx=True))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def keys(self, prefix: str) -> List[str]:
+        # Escape glob characters so the prefix is matched literally
+        pattern = "".join(f"\\{c}" if c in "*?[]\\" else c for c in prefix) + "*"
+        found = [k.decode() if isinstance(k, bytes) else k async for k in self.client.scan_iter(match=pattern)]
+        return sorted(found)
+
+@asynccontextmanager
+async def store_lock(store: KeyValueStore, name: str, ttl: float = 5.0, poll_interval: float = 0.005) -> AsyncIterator[None]:
+    """Mutual exclusion between workers sharing `store`, for short read-modify-write sections.
+
+    The lock expires after `ttl` seconds, so a worker dying while holding it
+    blocks the others for at most that long.
+    """
+    key, token = f"lock|{name}", uuid.uuid4().bytes
+    while not await store.add(key, token, ttl):
+        await asyncio.sleep(poll_interval)
+    try:
+        yield
+    finally:
+        if await store.get(key) == token:
+            await store.delete(key)
+
+# =============================================================================
+# TASK STORE
+# =============================================================================
+
+class KeyValueTaskStore(TaskStore):
+    """A2A task store on a shared KeyValueStore, so any worker can serve tasks/get and follow-ups"""
+
+    def __init__(self, store: KeyValueStore, namespace: str, ttl_seconds: Optional[float] = 86400.0):
+        self.store = store
+        self.prefix = f"task|{namespace}|"
+        self.ttl_seconds = ttl_seconds
+
+    async def save(self, task: Task) -> None:
+        await self.store.set(self.prefix + task.id, task.model_dump_json(exclude_none=True).encode(), self.ttl_seconds)
+
+    async def get(self, task_id: str) -> Optional[Task]:
+        data = await self.store.get(self.prefix + task_id)
+        return Task.model_validate_json(data) if data is not None else None
+
+    async def delete(self, task_id: str) -> None:
+        await self.store.delete(self.prefix + task_id)
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+_state_store: Optional[KeyValueStore] = None
+
+def state_store_from_env() -> Optional[KeyValueStore]:
+    """Shared state store selected by STATE_BACKEND.
+
+    "memory" keeps everything in-process, "sqlite" shares state between the
+    workers of one host (STATE_SQLITE_PATH) and "redis" between hosts
+    (STATE_REDIS_URL, needs the redis package).
+    """
+    global _state_store
+    backend = os.getenv("STATE_BACKEND", "memory").lower()
+    if backend == "memory":
+        return None
+    if _state_store is None:
+        if backend == "sqlite":
+            _state_store = SQLiteKeyValueStore(os.getenv("STATE_SQLITE_PATH", "travel_state.db"))
+        elif backend == "redis":
+            try:
+                from redis.asyncio import Redis
+            except ImportError as e:
+                raise ValueError("STATE_BACKEND=redis needs the redis package (pip install redis)") from e
+            _state_store = RedisKeyValueStore(Redis.from_url(os.getenv("STATE_REDIS_URL", "redis://localhost:6379/0")))
+        else:
+            raise ValueError(f"Unknown STATE_BACKEND: {backend}")
+    return _state_store
@@ -0,0 +1,480 @@
+import asyncio
+import bisect
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace as otel_trace
+except ImportError:  # tracing is optional, metrics work without it
+    otel_context = None
+    otel_trace = None
+
+# TELEMETRY_ENABLED=false turns every span and metric call into a no-op
+ENABLED = os.getenv("TELEMETRY_ENABLED", "true").lower() == "true"
+
+# Spans are exported through OpenTelemetry when it is installed; without a
+# configured SDK the OpenTelemetry API itself does nothing
+_tracer = otel_trace.get_tracer("travel-assistant") if otel_trace is not None and ENABLED else None
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# =============================================================================
+# METRICS
+# =============================================================================
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple:
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in list(self._values.items())
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._values: Dict[Tuple, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in list(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                bucket_labels = _format_labels(self.labelnames, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+# Series read from each checkpointer's stats(): (name, type, help, stats key)
+CHECKPOINT_SERIES = (
+    ("travel_checkpoint_threads", "gauge", "Conversation threads held by the checkpointer", "threads"),
+    ("travel_checkpoint_checkpoints", "gauge", "Checkpoints held by the checkpointer", "checkpoints"),
+    ("travel_checkpoint_size_bytes", "gauge", "Serialized size of the held checkpoints, writes and channel values", "size_bytes"),
+    ("travel_checkpoint_evicted_threads_total", "counter", "Threads evicted for being idle or least recently used", "evicted_threads"),
+    ("travel_checkpoint_pruned_total", "counter", "Old checkpoints pruned from their threads", "pruned_checkpoints"),
+)
+
+class MetricsRegistry:
+    """Metrics of this process in the Prometheus text format.
+
+    Collectors are callables returning a stats() dict, read at scrape time so
+    components like caches and checkpointers keep their own counters and
+    cost nothing per request.
+    """
+
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+        self.collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self.checkpointers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def add_cache(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        """Expose a cache's stats() as travel_cache_* series labelled cache=<name>"""
+        self.collectors[name] = stats
+
+    def add_checkpointer(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        """Expose a checkpointer's stats() as travel_checkpoint_* series labelled graph=<name>"""
+        self.checkpointers[name] = stats
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines += metric.render()
+
+        cache_stats = {name: stats() for name, stats in self.collectors.items()}
+        if cache_stats:
+            lines += ["# HELP travel_cache_hit_rate Share of lookups served from the cache", "# TYPE travel_cache_hit_rate gauge"]
+            lines += [f'travel_cache_hit_rate{{cache="{name}"}} {_format_value(s.get("hit_rate", 0.0))}' for name, s in cache_stats.items()]
+            lines += ["# HELP travel_cache_size Entries currently in the cache", "# TYPE travel_cache_size gauge"]
+            lines += [f'travel_cache_size{{cache="{name}"}} {_format_value(s.get("size", 0))}' for name, s in cache_stats.items()]
+            lines += ["# HELP travel_cache_events_total Cache lookups by outcome", "# TYPE travel_cache_events_total counter"]
+            for name, s in cache_stats.items():
+                for event, value in s.items():
+                    if event not in ("hit_rate", "size") and isinstance(value, (int, float)):
+                        lines.append(f'travel_cache_events_total{{cache="{name}",event="{event}"}} {_format_value(value)}')
+
+        checkpoint_stats = {name: stats() for name, stats in self.checkpointers.items()}
+        if checkpoint_stats:
+            for series, kind, help, key in CHECKPOINT_SERIES:
+                lines += [f"# HELP {series} {help}", f"# TYPE {series} {kind}"]
+                lines += [f'{series}{{graph="{_escape(name)}"}} {_format_value(s.get(key, 0))}' for name, s in checkpoint_stats.items()]
+        return "\n".join(lines) + "\n"
+
+metrics = MetricsRegistry()
+
+REQUEST_SECONDS = metrics.histogram(
+    "travel_request_duration_seconds", "Time to execute an A2A request", ("agent", "outcome")
+)
+REQUESTS_IN_FLIGHT = metrics.gauge("travel_requests_in_flight", "A2A requests being executed", ("agent",))
+STAGE_SECONDS = metrics.histogram(
+    "travel_stage_duration_seconds", "Time spent per stage of a request", ("stage",),
+    buckets=(0.0001, 0.0005, 0.001) + DEFAULT_BUCKETS,
+)
+LLM_SECONDS = metrics.histogram("travel_llm_duration_seconds", "Duration of model calls", ("model",))
+LLM_TOKENS = metrics.counter("travel_llm_tokens_total", "Tokens used by model calls", ("model", "type"))
+TOOL_SECONDS = metrics.histogram("travel_tool_duration_seconds", "Duration of tool calls", ("tool", "outcome"))
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """GET /metrics in the Prometheus text exposition format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+# =============================================================================
+# SPANS
+# =============================================================================
+
+class Span:
+    """Times one stage into travel_stage_duration_seconds and mirrors it as an OpenTelemetry span.
+
+    Used as a context manager around code in one coroutine, or with explicit
+    start/end for callbacks that open and close it from different places.
+    """
+
+    __slots__ = ("name", "start", "otel", "outcome", "_token")
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None, parent: Optional["Span"] = None):
+        self.name = name
+        self.outcome = "ok"
+        self._token = None
+        self.otel = None
+        if _tracer is not None:
+            context = otel_trace.set_span_in_context(parent.otel) if parent is not None and parent.otel is not None else None
+            self.otel = _tracer.start_span(name, context=context, attributes=attributes)
+        self.start = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.otel is not None:
+            self.otel.set_attribute(key, value)
+
+    def end(self, error: Optional[BaseException] = None) -> float:
+        duration = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(duration, stage=self.name)
+        canceled = isinstance(error, asyncio.CancelledError)
+        if error is not None:
+            self.outcome = "canceled" if canceled else "error"
+        if self.otel is not None:
+            if canceled:
+                self.otel.set_attribute("status", "canceled")
+            elif error is not None:
+                self.otel.record_exception(error)
+                self.otel.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, str(error)))
+            self.otel.end()
+        return duration
+
+    def __enter__(self) -> "Span":
+        if self.otel is not None:
+            self._token = otel_context.attach(otel_trace.set_span_in_context(self.otel))
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self._token is not None:
+            otel_context.detach(self._token)
+        self.end(exc)
+
+class _NoopSpan:
+    """Shared stand-in returned by span() when telemetry is disabled"""
+
+    outcome = "ok"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def end(self, error: Optional[BaseException] = None) -> float:
+        return 0.0
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+def span(name: str, **attributes: Any):
+    """Span around a block: `with span("extract_input"): ...`"""
+    if not ENABLED:
+        return NOOP_SPAN
+    return Span(name, attributes or None)
+
+class track_request:
+    """Executor-level span that also keeps the in-flight gauge and request histogram.
+
+    Set `.outcome` on the returned span ("completed", "failed", ...) to label
+    the request; an escaping exception labels it "error", cancellation "canceled".
+    """
+
+    __slots__ = ("agent", "span")
+
+    def __init__(self, agent: str):
+        self.agent = agent
+        self.span = None
+
+    def __enter__(self):
+        if not ENABLED:
+            return NOOP_SPAN
+        REQUESTS_IN_FLIGHT.inc(agent=self.agent)
+        self.span = Span("executor", {"agent": self.agent}).__enter__()
+        self.span.outcome = "completed"
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.span is None:
+            return
+        if exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+            self.span.__exit__(None, None, None)
+            self.span.outcome = "canceled"
+        else:
+            self.span.__exit__(exc_type, exc, tb)
+        REQUESTS_IN_FLIGHT.dec(agent=self.agent)
+        REQUEST_SECONDS.observe(time.perf_counter() - self.span.start, agent=self.agent, outcome=self.span.outcome)
+
+class timed:
+    """Histogram-only timer for very frequent stages (per-token enqueueing), no trace span"""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> None:
+        if ENABLED:
+            self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if ENABLED:
+            STAGE_SECONDS.observe(time.perf_counter() - self.start, stage=self.stage)
+
+# =============================================================================
+# LANGCHAIN CALLBACKS
+# =============================================================================
+
+# Graph nodes that make up one ReAct step
+REACT_NODES = ("agent", "tools")
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """Spans for ReAct steps, model calls (with token usage) and tool calls of a LangGraph run.
+
+    Runs inline on the event loop; each callback is a dict operation and a
+    clock read. Spans are keyed by LangChain run id and parented on the
+    enclosing run, so model and tool calls nest under their ReAct step.
+
+    A cancelled run only reports the error on its chains, not on the model or
+    tool call it was awaiting, so when a root run ends every span still open
+    under it is ended as canceled. Use one handler per request
+    (langchain_callbacks() builds it).
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._spans: Dict[UUID, Tuple[Span, str]] = {}
+        # Runs without a span of their own (inner runnables of a node) -> nearest enclosing span
+        self._enclosing: Dict[UUID, Span] = {}
+        # Every run seen -> the root run it belongs to
+        self._roots: Dict[UUID, UUID] = {}
+
+    def _parent(self, parent_run_id: Optional[UUID]) -> Optional[Span]:
+        if parent_run_id is None:
+            return None
+        entry = self._spans.get(parent_run_id)
+        return entry[0] if entry is not None else self._enclosing.get(parent_run_id)
+
+    def _track(self, run_id: UUID, parent_run_id: Optional[UUID]) -> None:
+        self._roots[run_id] = self._roots.get(parent_run_id, run_id) if parent_run_id is not None else run_id
+
+    def _start(self, kind: str, label: str, run_id: UUID, parent_run_id: Optional[UUID], attributes: Dict[str, Any]) -> None:
+        self._track(run_id, parent_run_id)
+        self._spans[run_id] = (Span(kind, attributes, self._parent(parent_run_id)), label)
+
+    def _finish(self, run_id: UUID, error: Optional[BaseException] = None, **attributes: Any) -> Optional[Tuple[str, float]]:
+        entry = self._spans.pop(run_id, None)
+        if entry is None:
+            return None
+        span, label = entry
+        for key, value in attributes.items():
+            span.set_attribute(key, value)
+        return label, span.end(error)
+
+    def _end_root(self, run_id: UUID) -> None:
+        """End the spans left open under a root run that has finished, as canceled"""
+        if self._roots.get(run_id) != run_id:
+            return
+        runs = [run for run, root in self._roots.items() if root == run_id]
+        for run in runs:
+            del self._roots[run]
+            self._enclosing.pop(run, None)
+            entry = self._spans.get(run)
+            if entry is None:
+                continue
+            kind = entry[0].name
+            label, duration = self._finish(run, asyncio.CancelledError())
+            if kind == "llm":
+                LLM_SECONDS.observe(duration, model=label)
+            elif kind == "tool":
+                TOOL_SECONDS.observe(duration, tool=label, outcome="canceled")
+
+    # ReAct steps: the "agent" (model) and "tools" nodes of the graph
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, parent_run_id: Optional[UUID] = None, metadata=None, **kwargs) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        if node in REACT_NODES and kwargs.get("name") == node:
+            self._start("react_step", node, run_id, parent_run_id, {"node": node, "step": (metadata or {}).get("langgraph_step", 0)})
+            return
+        self._track(run_id, parent_run_id)
+        parent = self._parent(parent_run_id)
+        if parent is not None:
+            self._enclosing[run_id] = parent
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs) -> None:
+        if self._enclosing.pop(run_id, None) is None:
+            self._finish(run_id)
+        self._end_root(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        if self._enclosing.pop(run_id, None) is None:
+            self._finish(run_id, error)
+        self._end_root(run_id)
+
+    # Model calls
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, parent_run_id: Optional[UUID] = None, metadata=None, **kwargs) -> None:
+        model = (metadata or {}).get("ls_model_name") or kwargs.get("invocation_params", {}).get("model") or "unknown"
+        self._start("llm", model, run_id, parent_run_id, {"model": model})
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        usage = _token_usage(response)
+        finished = self._finish(run_id, **{f"llm.tokens.{kind}": count for kind, count in usage.items()})
+        if finished is None:
+            return
+        model, duration = finished
+        LLM_SECONDS.observe(duration, model=model)
+        for kind, count in usage.items():
+            LLM_TOKENS.inc(count, model=model, type=kind)
+        self._end_root(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        finished = self._finish(run_id, error)
+        if finished is not None:
+            LLM_SECONDS.observe(finished[1], model=finished[0])
+        self._end_root(run_id)
+
+    # Tool calls
+    def on_tool_start(self, serialized, input_str, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs) -> None:
+        tool = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        self._start("tool", tool, run_id, parent_run_id, {"tool": tool})
+
+    def on_tool_end(self, output, *, run_id: UUID, **kwargs) -> None:
+        finished = self._finish(run_id)
+        if finished is not None:
+            TOOL_SECONDS.observe(finished[1], tool=finished[0], outcome="ok")
+        self._end_root(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        finished = self._finish(run_id, error)
+        if finished is not None:
+            TOOL_SECONDS.observe(finished[1], tool=finished[0], outcome="error")
+        self._end_root(run_id)
+
+def _token_usage(response) -> Dict[str, int]:
+    """Input/output token counts of an LLMResult, from usage_metadata or the OpenAI token_usage"""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return {"input": usage.get("input_tokens", 0), "output": usage.get("output_tokens", 0)}
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    if token_usage:
+        return {"input": token_usage.get("prompt_tokens", 0), "output": token_usage.get("completion_tokens", 0)}
+    return {}
+
+def langchain_callbacks() -> List[BaseCallbackHandler]:
+    """Callbacks to pass in a graph's run config (fresh for each run), empty when telemetry is disabled"""
+    return [TelemetryCallbackHandler()] if ENABLED else []
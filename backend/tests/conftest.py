@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+# Agents are built on the scripted fake model, so no test needs an API key or the network
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("STATE_BACKEND", "memory")
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Each shared state store adapter that runs without a server"""
+    from storage import InMemoryKeyValueStore, SQLiteKeyValueStore
+
+    if request.param == "memory":
+        yield InMemoryKeyValueStore()
+    else:
+        store = SQLiteKeyValueStore(str(tmp_path / "state.db"))
+        yield store
+        store.close()
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import MessageSendParams, TaskState
+from a2a.utils import new_agent_text_message
+
+from admission import (
+    PRIORITY_BOOKING,
+    PRIORITY_SEARCH,
+    AdmissionControlledExecutor,
+    AdmissionController,
+    AdmissionRejected,
+    TokenBucket,
+    request_priority,
+)
+
+def test_bookings_overtake_queued_searches():
+    controller = AdmissionController("test", max_concurrent=1)
+    order = []
+
+    async def request(name: str, priority: int):
+        await controller.acquire(priority)
+        order.append(name)
+        await asyncio.sleep(0)
+        controller.release()
+
+    async def main():
+        await controller.acquire()
+        waiters = [
+            asyncio.create_task(request("search 1", PRIORITY_SEARCH)),
+            asyncio.create_task(request("search 2", PRIORITY_SEARCH)),
+            asyncio.create_task(request("booking", PRIORITY_BOOKING)),
+        ]
+        await asyncio.sleep(0)
+        controller.release()
+        await asyncio.gather(*waiters)
+
+    asyncio.run(main())
+    assert order == ["booking", "search 1", "search 2"]
+    assert controller.active == 0
+
+def test_rejects_when_the_queue_is_full():
+    controller = AdmissionController("test", max_concurrent=1, max_queue=1)
+
+    async def main():
+        await controller.acquire()
+        queued = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        queued.cancel()
+        return rejected.value.reason
+
+    assert asyncio.run(main()) == "queue_full"
+
+def test_rejects_when_the_expected_wait_is_too_long():
+    controller = AdmissionController("test", max_concurrent=1, max_wait=1.0)
+    controller.observe(5.0)
+
+    async def main():
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        return rejected.value.reason
+
+    assert asyncio.run(main()) == "deadline"
+
+def test_waiters_time_out_and_cancelled_waiters_give_their_place_up():
+    controller = AdmissionController("test", max_concurrent=1, max_wait=0.05)
+
+    async def main():
+        await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        abandoned = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        await asyncio.sleep(0)
+        controller.release()
+        return rejected.value.reason
+
+    assert asyncio.run(main()) == "timeout"
+    assert controller.active == 0
+    assert controller.queued == 0
+
+def test_executor_rejects_with_a_final_status():
+    controller = AdmissionController("test", max_concurrent=1, max_queue=0)
+    executor = AdmissionControlledExecutor(None, controller)
+    queue = EventQueue()
+
+    async def main():
+        await controller.acquire()
+        message = new_agent_text_message("Find flights to Boston")
+        await executor.execute(RequestContext(MessageSendParams(message=message)), queue)
+        events = []
+        while not queue.queue.empty():
+            events.append(queue.queue.get_nowait())
+        return events[-1]
+
+    status = asyncio.run(main())
+    assert status.status.state == TaskState.rejected
+    assert status.final
+
+def test_request_priority_by_intent():
+    assert request_priority("Book flight AA100 for Jane") == PRIORITY_BOOKING
+    assert request_priority("Find flights to Boston") == PRIORITY_SEARCH
+
+def test_token_bucket_paces_after_the_burst():
+    bucket = TokenBucket(rate=100, capacity=2)
+    assert bucket.acquire(blocking=False) and bucket.acquire(blocking=False)
+    assert not bucket.acquire(blocking=False)
+
+    start = time.monotonic()
+    assert bucket.acquire()
+    assert time.monotonic() - start >= 0.005
+
+def test_token_bucket_refunds_abandoned_reservations():
+    bucket = TokenBucket(rate=1, capacity=1)
+
+    async def main():
+        await bucket.aacquire()
+        waiting = asyncio.create_task(bucket.aacquire())
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(main())
+    # The cancelled reservation was given back: one second of refill covers the next token
+    assert bucket.tokens >= 0
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from availability import AvailabilityStore, RangeMaxTree
+from inventory import get_inventory
+from storage import InMemoryKeyValueStore
+
+def test_range_max_tree_matches_a_plain_calendar():
+    rng = random.Random(7)
+    tree, calendar = RangeMaxTree(50), [0] * 50
+    for _ in range(500):
+        lo = rng.randrange(50)
+        hi = rng.randint(lo + 1, 50)
+        if rng.random() < 0.5:
+            # Releases need not match earlier ranges
+            delta = -1 if min(calendar[lo:hi]) > 0 and rng.random() < 0.5 else 1
+            tree.update(lo, hi, delta)
+            for day in range(lo, hi):
+                calendar[day] += delta
+        else:
+            assert tree.query(lo, hi) == max(calendar[lo:hi])
+
+@pytest.fixture
+def stay():
+    inventory = get_inventory()
+    hotel = inventory.hotels_in("Los Angeles")[0]
+    checkin = inventory.start + timedelta(days=3)
+    return hotel, inventory.rooms(hotel, "suite"), checkin, checkin + timedelta(days=2)
+
+def test_reservations_use_up_rooms_and_release_them(stay):
+    hotel, rooms, checkin, checkout = stay
+    availability = AvailabilityStore(get_inventory())
+
+    async def main():
+        held = [await availability.reserve(f"key {i}", hotel, "suite", checkin, checkout) for i in range(rooms + 1)]
+        # A retried booking keeps the room it holds
+        assert await availability.reserve("key 0", hotel, "suite", checkin, checkout)
+        assert await availability.rooms_left(hotel, "suite", checkin, checkout) == 0
+        # The night after the stay is untouched
+        assert await availability.rooms_left(hotel, "suite", checkout, checkout + timedelta(days=1)) == rooms
+        assert await availability.release("key 0")
+        assert not await availability.release("key 0")
+        return held, await availability.rooms_left(hotel, "suite", checkin, checkout)
+
+    held, left = asyncio.run(main())
+    assert held == [True] * rooms + [False]
+    assert left == 1
+
+def test_workers_sharing_a_store_never_overbook(stay):
+    hotel, rooms, checkin, checkout = stay
+    store = InMemoryKeyValueStore()
+    first, second = AvailabilityStore(get_inventory(), store), AvailabilityStore(get_inventory(), store)
+
+    async def main():
+        held = await asyncio.gather(*(
+            (first if i % 2 else second).reserve(f"key {i}", hotel, "suite", checkin, checkout)
+            for i in range(rooms + 4)
+        ))
+        assert await first.rooms_left(hotel, "suite", checkin, checkout) == 0
+        assert hotel not in await second.city_availability("Los Angeles", "suite", checkin, checkout)
+        # A hold taken by one worker is released by the other
+        assert await first.release(f"key {held.index(True)}")
+        return held, await second.rooms_left(hotel, "suite", checkin, checkout)
+
+    held, left = asyncio.run(main())
+    assert sum(held) == rooms
+    assert left == 1
+
+def test_shared_holds_drop_ended_stays_and_expire(stay, monkeypatch):
+    import availability as module
+
+    hotel, _, _, _ = stay
+    inventory = get_inventory()
+    store = InMemoryKeyValueStore()
+    shared = AvailabilityStore(inventory, store, retention_seconds=60.0)
+    holds_key = f"holds|{hotel}|suite"
+
+    class Later(date):
+        @classmethod
+        def today(cls):
+            return inventory.start + timedelta(days=5)
+
+    monkeypatch.setattr(module, "date", Later)
+
+    async def main():
+        await store.set(holds_key, json.dumps({"ended": [1, 3], "staying": [4, 6]}).encode())
+        checkin = inventory.start + timedelta(days=6)
+        assert await shared.reserve("new", hotel, "suite", checkin, checkin + timedelta(days=1))
+        return json.loads(await store.get(holds_key))
+
+    assert asyncio.run(main()) == {"staying": [4, 6], "new": [6, 7]}
+    assert store._data["hold|new"][1] is not None
+
+def test_a_retried_hotel_booking_does_not_hold_another_room(stay, monkeypatch):
+    from agents import book_hotel
+    from availability import get_availability
+
+    hotel, _, checkin, checkout = stay
+    inventory = get_inventory()
+    name = inventory.hotel_names[inventory.hotels["name"][hotel]]
+    config = {"configurable": {"task_id": "retried"}}
+    booked = asyncio.run(book_hotel(name, checkin.isoformat(), checkout.isoformat(), config=config))
+
+    async def no_rooms(*args):
+        return False
+
+    # The retry lands where the hotel looks full: the recorded booking answers it
+    monkeypatch.setattr(get_availability(), "reserve", no_rooms)
+    assert asyncio.run(book_hotel(name, checkin.isoformat(), checkout.isoformat(), config=config)) == booked
+    assert "Confirmation" in booked
+
+def test_stays_must_end_after_they_start(stay):
+    hotel, _, checkin, _ = stay
+    availability = AvailabilityStore(get_inventory())
+
+    async def main():
+        return [
+            await availability.reserve("key", hotel, "suite", checkin, checkout)
+            for checkout in (checkin, checkin - timedelta(days=1))
+        ] + [await availability.city_availability("Los Angeles", "suite", checkin, checkin)]
+
+    assert asyncio.run(main()) == [False, False, {}]
+
+def test_hotel_tools_refuse_reversed_stays(stay):
+    from agents import book_hotel, get_hotels
+
+    hotel, _, checkin, _ = stay
+    inventory = get_inventory()
+    name = inventory.hotel_names[inventory.hotels["name"][hotel]]
+    dates = {"checkin": checkin.isoformat(), "checkout": (checkin - timedelta(days=2)).isoformat()}
+
+    async def main():
+        return (
+            await get_hotels.ainvoke({"city": "Los Angeles", **dates}),
+            await book_hotel(name, **dates, config={"configurable": {"task_id": "reversed"}}),
+        )
+
+    for answer in asyncio.run(main()):
+        assert "checkout date must be after the checkin date" in answer
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from a2a.types import Artifact, Part, Task, TaskState, TaskStatus, TextPart
+
+from batch import BatchError, BatchRunner, parse_batch
+
+AGENTS = ["flights", "hotels", "travel"]
+
+def task(state: TaskState, text: str = "") -> Task:
+    return Task(
+        id="task",
+        contextId="ctx",
+        status=TaskStatus(state=state),
+        artifacts=[Artifact(artifactId="a", parts=[Part(root=TextPart(text=text))])] if text else None,
+    )
+
+def run(runner: BatchRunner, items, concurrency: int = 4):
+    async def main():
+        return [result async for result in runner.run(items, concurrency)]
+
+    return asyncio.run(main())
+
+def test_parse_batch_reads_items_and_concurrency():
+    items, concurrency = parse_batch(
+        {"queries": ["flights to LA", {"query": "hotels in Paris", "agent": "hotels", "id": "q2"}], "concurrency": 2},
+        AGENTS, "travel", 10,
+    )
+    assert [(i.index, i.agent, i.id) for i in items] == [(0, "travel", None), (1, "hotels", "q2")]
+    assert concurrency == 2
+
+@pytest.mark.parametrize("body", [
+    [],
+    {"queries": []},
+    {"queries": "flights"},
+    {"queries": [""]},
+    {"queries": [{"query": "x", "agent": "trains"}]},
+    {"queries": ["x"] * 11},
+    {"queries": ["x"], "concurrency": 0},
+    {"queries": ["x"], "concurrency": 2.5},
+    {"queries": ["x"], "concurrency": True},
+    {"queries": ["x"], "concurrency": False},
+])
+def test_parse_batch_rejects_malformed_bodies(body):
+    with pytest.raises(BatchError):
+        parse_batch(body, AGENTS, "travel", 10)
+
+def test_identical_queries_run_once():
+    calls = []
+
+    async def send(agent, query, context_id):
+        calls.append(query)
+        return task(TaskState.completed, f"answer to {query}")
+
+    results = run(BatchRunner(send), parse_batch({"queries": ["Flights to LA", "flights  to la", "hotels"]}, AGENTS, "travel", 10)[0])
+    assert sorted(calls) == ["Flights to LA", "hotels"]
+    duplicate = next(r for r in results if r.get("duplicate_of") is not None)
+    assert duplicate["index"] == 1 and duplicate["duplicate_of"] == 0
+    assert duplicate["text"] == "answer to Flights to LA"
+    summary = results[-1]
+    assert summary["done"] and (summary["items"], summary["unique"]) == (3, 2)
+    assert summary["statuses"] == {"completed": 3}
+
+def test_a_failed_item_does_not_fail_the_batch():
+    async def send(agent, query, context_id):
+        if query == "bad":
+            raise RuntimeError("agent crashed")
+        return task(TaskState.completed, "ok")
+
+    results = run(BatchRunner(send), parse_batch({"queries": ["bad", "good"]}, AGENTS, "travel", 10)[0])
+    by_query = {r["query"]: r for r in results[:-1]}
+    assert by_query["bad"]["status"] == "error" and by_query["bad"]["error"] == "agent crashed"
+    assert by_query["good"]["status"] == "completed"
+    assert results[-1]["statuses"] == {"error": 1, "completed": 1}
+
+def test_rejected_items_are_retried():
+    attempts = []
+
+    async def send(agent, query, context_id):
+        attempts.append(query)
+        return task(TaskState.rejected if len(attempts) < 3 else TaskState.completed)
+
+    runner = BatchRunner(send, max_attempts=3, retry_delay=0.001)
+    results = run(runner, parse_batch({"queries": ["busy"]}, AGENTS, "travel", 10)[0])
+    assert results[0]["status"] == "completed" and results[0]["attempts"] == 3
+
+    attempts.clear()
+    runner.max_attempts = 2
+    results = run(runner, parse_batch({"queries": ["busy"]}, AGENTS, "travel", 10)[0])
+    assert results[0]["status"] == "rejected" and results[0]["attempts"] == 2
+
+def test_batches_respect_their_own_and_the_global_limit():
+    running, peak = [0], [0]
+
+    async def send(agent, query, context_id):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return task(TaskState.completed)
+
+    def items(n):
+        return parse_batch({"queries": [f"q{i}" for i in range(n)]}, AGENTS, "travel", 100)[0]
+
+    run(BatchRunner(send, max_running=10), items(8), concurrency=3)
+    assert peak[0] == 3
+
+    peak[0] = 0
+    runner = BatchRunner(send, max_running=4)
+
+    async def two_batches():
+        async def drain(batch):
+            return [result async for result in runner.run(batch, 10)]
+
+        await asyncio.gather(drain(items(8)), drain(items(8)))
+
+    asyncio.run(two_batches())
+    assert peak[0] == 4
+
+@pytest.mark.parametrize("body", [b"not json", b'{"queries": []}', b'{"queries": ["x"], "concurrency": true}'])
+def test_endpoint_answers_malformed_batches_with_400(body):
+    from starlette.testclient import TestClient
+
+    from main import create_server
+
+    client = TestClient(create_server("http://testserver", startup_mode="lazy"))
+    response = client.post("/a2a/batch", content=body)
+    assert response.status_code == 400
+    assert "error" in response.json()
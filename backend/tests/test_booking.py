@@ -0,0 +1,91 @@
+import asyncio
+
+from booking import BookingError, BookingPipeline, BookingRequest, FakeSupplier, idempotency_key
+from storage import InMemoryKeyValueStore
+
+def request(guest: str, scope: str = "task") -> BookingRequest:
+    details = {"flight_number": "AA100", "passenger_name": guest}
+    return BookingRequest(idempotency_key(scope, "book_flight", details), details)
+
+def supplier() -> FakeSupplier:
+    return FakeSupplier("airline", "FL", latency=0.01, per_item_latency=0)
+
+def test_idempotency_key_ignores_case_and_spacing():
+    assert request("Jane Doe").idempotency_key == request(" jane doe").idempotency_key
+    assert request("Jane Doe").idempotency_key != request("Jane Doe", scope="other").idempotency_key
+
+def test_concurrent_bookings_share_one_supplier_call():
+    pipeline = BookingPipeline(supplier(), max_batch=10)
+
+    async def main():
+        return await asyncio.gather(*(pipeline.book(request(f"guest {i}")) for i in range(5)))
+
+    results = asyncio.run(main())
+    assert pipeline.supplier.calls == [5]
+    assert len({result.confirmation for result in results}) == 5
+
+def test_full_batches_are_sent_without_waiting():
+    pipeline = BookingPipeline(supplier(), max_batch=2, max_delay=10)
+
+    async def main():
+        return await asyncio.gather(*(pipeline.book(request(f"guest {i}")) for i in range(4)))
+
+    assert all(result.ok for result in asyncio.run(main()))
+    assert pipeline.supplier.calls == [2, 2]
+
+def test_a_repeated_key_books_once():
+    pipeline = BookingPipeline(supplier())
+
+    async def main():
+        concurrent = await asyncio.gather(pipeline.book(request("Jane")), pipeline.book(request("Jane")))
+        return concurrent + [await pipeline.book(request("Jane"))]
+
+    results = asyncio.run(main())
+    assert len({result.confirmation for result in results}) == 1
+    assert pipeline.supplier.calls == [1]
+
+def test_bookings_are_replayed_from_the_shared_store():
+    store = InMemoryKeyValueStore()
+    first, second = BookingPipeline(supplier(), store=store), BookingPipeline(supplier(), store=store)
+
+    async def main():
+        return await first.book(request("Jane")), await second.book(request("Jane"))
+
+    booked, replayed = asyncio.run(main())
+    assert replayed == booked
+    assert second.supplier.calls == []
+
+def test_supplier_failures_reach_every_caller_and_are_retried():
+    class FailingOnce(FakeSupplier):
+        async def book_many(self, requests):
+            if not self.calls:
+                self.calls.append(len(requests))
+                raise ConnectionError("supplier down")
+            return await super().book_many(requests)
+
+    pipeline = BookingPipeline(FailingOnce("airline", "FL", latency=0))
+
+    async def main():
+        failed = await asyncio.gather(pipeline.book(request("Jane")), pipeline.book(request("Bob")), return_exceptions=True)
+        assert all(isinstance(result, BookingError) for result in failed)
+        return await pipeline.book(request("Jane"))
+
+    assert asyncio.run(main()).ok
+    assert not pipeline._in_flight
+
+def test_a_failing_store_fails_the_booking_without_leaking_it():
+    class FailingStore(InMemoryKeyValueStore):
+        async def set(self, key, value, ttl=None):
+            raise ConnectionError("store down")
+
+    pipeline = BookingPipeline(supplier(), store=FailingStore())
+
+    async def main():
+        results = await asyncio.gather(pipeline.book(request("Jane")), pipeline.book(request("Bob")), return_exceptions=True)
+        assert all(isinstance(result, BookingError) for result in results)
+        assert not pipeline._in_flight
+        # This worker still remembers the booking, so a retry does not book twice
+        return await pipeline.book(request("Jane"))
+
+    assert asyncio.run(main()).ok
+    assert pipeline.supplier.calls == [2]
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.types import Task, TaskState, TaskStatus
+from a2a.utils.errors import ServerError
+
+from cancellation import RunningTasks
+from storage import InMemoryKeyValueStore
+
+def workers():
+    store = InMemoryKeyValueStore()
+    return RunningTasks(store, poll_interval=0.01, cancel_timeout=1.0), RunningTasks(store, poll_interval=0.01, cancel_timeout=1.0)
+
+def cancel_request(state: TaskState = TaskState.working) -> RequestContext:
+    task = Task(id="task", contextId="ctx", status=TaskStatus(state=state))
+    return RequestContext(task_id="task", context_id="ctx", task=task)
+
+async def states(queue: EventQueue):
+    found = []
+    while not queue.queue.empty():
+        found.append(queue.queue.get_nowait().status.state)
+    return found
+
+def test_cancel_stops_a_task_running_on_another_worker():
+    owner, other = workers()
+    owner_queue, cancel_queue = EventQueue(), EventQueue()
+    finished = []
+
+    async def execute():
+        async with owner.track("task", "ctx", owner_queue):
+            await asyncio.sleep(10)
+            finished.append(True)
+
+    async def main():
+        running = asyncio.create_task(execute())
+        await asyncio.sleep(0.05)
+        await other.cancel(cancel_request(), cancel_queue)
+        await running
+        return await states(owner_queue), await states(cancel_queue)
+
+    assert asyncio.run(main()) == ([TaskState.canceled], [TaskState.canceled])
+    assert not finished
+
+def test_cancel_is_refused_when_the_task_finishes_first():
+    owner, other = workers()
+    # The owner checks the flag once, before the cancel arrives
+    owner.poll_interval = 10
+
+    async def main():
+        done = asyncio.Event()
+
+        async def execute():
+            async with owner.track("task", "ctx", EventQueue()):
+                await done.wait()
+
+        running = asyncio.create_task(execute())
+        await asyncio.sleep(0.01)
+        cancel = asyncio.create_task(other.cancel(cancel_request(), EventQueue()))
+        await asyncio.sleep(0.03)
+        done.set()
+        await running
+        with pytest.raises(ServerError):
+            await cancel
+
+    asyncio.run(main())
+
+def test_cancel_without_an_owner_marks_the_task_canceled():
+    _, other = workers()
+    queue = EventQueue()
+
+    async def main():
+        await other.cancel(cancel_request(TaskState.submitted), queue)
+        return await states(queue)
+
+    assert asyncio.run(main()) == [TaskState.canceled]
+
+def test_cancel_of_a_finished_task_is_refused():
+    _, other = workers()
+
+    with pytest.raises(ServerError):
+        asyncio.run(other.cancel(cancel_request(TaskState.completed), EventQueue()))
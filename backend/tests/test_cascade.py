@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from cascade import CascadeChatModel
+from fake_llm import FakeChatModel
+
+def flights_call(**args):
+    return [{"name": "get_flights", "args": args}]
+
+def cascade(small_args):
+    from agents import get_flights
+
+    small = FakeChatModel(model_name="small", script=flights_call(**small_args))
+    large = FakeChatModel(model_name="large", script=flights_call(departure="NYC", destination="LAX", date="large"))
+    return CascadeChatModel(small=small, large=large, agent="test").bind_tools([get_flights])
+
+VALID = {"departure": "NYC", "destination": "LAX", "date": "small"}
+
+@pytest.mark.parametrize("small_args, query, tier", [
+    (VALID, "flights to LA", "small"),
+    # The small model's tool call misses required arguments
+    ({"departure": "NYC"}, "flights to LA", "large"),
+    # Bookings always go to the large model
+    (VALID, "book the cheapest flight to LA", "large"),
+])
+def test_sync_and_async_turns_escalate_alike(small_args, query, tier):
+    model = cascade(small_args)
+    messages = [HumanMessage(query)]
+
+    replies = [model.invoke(messages), asyncio.run(model.ainvoke(messages))]
+    assert [reply.tool_calls[0]["args"]["date"] for reply in replies] == [tier, tier]
@@ -0,0 +1,152 @@
+import asyncio
+import operator
+import time
+from typing import Annotated, List, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from checkpointer import BoundedMemorySaver, KeyValueCheckpointSaver
+from fake_llm import FakeChatModel
+from telemetry import metrics
+
+class State(TypedDict):
+    items: Annotated[List[int], operator.add]
+
+def compile_graph(saver):
+    graph = StateGraph(State)
+    graph.add_node("step", lambda state: {"items": [len(state["items"])]})
+    graph.add_edge(START, "step")
+    graph.add_edge("step", END)
+    return graph.compile(checkpointer=saver)
+
+def config(thread_id: str):
+    return {"configurable": {"thread_id": thread_id}}
+
+def test_prunes_old_checkpoints_but_keeps_the_state():
+    saver = BoundedMemorySaver(keep_checkpoints=1)
+    app = compile_graph(saver)
+    for _ in range(4):
+        app.invoke({"items": [0]}, config("t"))
+
+    assert len(saver.storage["t"][""]) == 2
+    assert saver.pruned_checkpoints > 0
+    assert app.get_state(config("t")).values["items"] == [0, 1, 0, 3, 0, 5, 0, 7]
+    # Only blobs referenced by a kept checkpoint remain
+    kept = {
+        ("t", "", channel, version)
+        for saved, _, _ in saver.storage["t"][""].values()
+        for channel, version in saver.serde.loads_typed(saved)["channel_versions"].items()
+    }
+    assert set(saver.blobs) <= kept
+
+def test_evicts_least_recently_used_threads():
+    saver = BoundedMemorySaver(max_threads=2)
+    app = compile_graph(saver)
+    for thread_id in ("a", "b"):
+        app.invoke({"items": [0]}, config(thread_id))
+    app.get_state(config("a"))
+    app.invoke({"items": [0]}, config("c"))
+
+    assert set(saver.storage) == {"a", "c"}
+    assert saver.evicted_threads == 1
+
+def test_expires_idle_threads():
+    saver = BoundedMemorySaver(ttl_seconds=0.01)
+    app = compile_graph(saver)
+    app.invoke({"items": [0]}, config("idle"))
+    time.sleep(0.02)
+
+    assert app.get_state(config("idle")).values == {}
+    assert "idle" not in saver.storage
+
+def test_stats_measure_held_memory():
+    saver = BoundedMemorySaver()
+    assert saver.stats()["size_bytes"] == 0
+    compile_graph(saver).invoke({"items": [0]}, config("t"))
+
+    stats = saver.stats()
+    assert stats["threads"] == 1
+    assert stats["checkpoints"] > 0
+    assert stats["size_bytes"] > 0
+
+def test_registry_reports_graph_checkpointers():
+    from agents import ModelRegistry, get_flights
+
+    registry = ModelRegistry(http2=False)
+    graph = registry.get_graph(FakeChatModel(), [get_flights], "prompt")
+    graph.checkpointer.put(*_checkpoint("t"))
+
+    rendered = metrics.render()
+    assert 'travel_checkpoint_threads{graph="get_flights"} 1' in rendered
+    assert 'travel_checkpoint_size_bytes{graph="get_flights"}' in rendered
+
+def _checkpoint(thread_id: str):
+    from langgraph.checkpoint.base import empty_checkpoint
+
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}, empty_checkpoint(), {}, {}
+
+def test_shared_checkpointer_carries_a_thread_across_turns(store):
+    saver = KeyValueCheckpointSaver(store, "travel", keep_checkpoints=1)
+    app = compile_graph(saver)
+
+    async def main():
+        await app.ainvoke({"items": [0]}, config("t"))
+        # A second saver on the same store is another worker picking the thread up
+        resumed = compile_graph(KeyValueCheckpointSaver(store, "travel", keep_checkpoints=1))
+        await resumed.ainvoke({"items": [0]}, config("t"))
+        latest = await saver.aget_tuple(config("t"))
+        index = await saver._index("t", "")
+        kept = await store.keys("ckpt|travel|t||c|")
+        return (await app.aget_state(config("t"))).values, latest, index, kept
+
+    values, latest, index, kept = asyncio.run(main())
+    assert values["items"] == [0, 1, 0, 3]
+    assert latest.checkpoint["id"] == index[-1]
+    assert latest.parent_config["configurable"]["checkpoint_id"] == index[0]
+    # Only the latest checkpoint and keep_checkpoints older ones remain
+    assert len(index) == 2
+    assert sorted(kept) == [f"ckpt|travel|t||c|{checkpoint_id}" for checkpoint_id in index]
+
+def test_shared_checkpointer_lists_newest_first_with_filters(store):
+    saver = KeyValueCheckpointSaver(store, "travel", keep_checkpoints=10)
+    app = compile_graph(saver)
+
+    async def listed(config=None, **kwargs):
+        return [t.checkpoint["id"] async for t in saver.alist(config, **kwargs)]
+
+    async def main():
+        for thread_id in ("a", "b"):
+            await app.ainvoke({"items": [0]}, config(thread_id))
+        index = await saver._index("a", "")
+        return index, (
+            await listed(config("a")),
+            await listed(config("a"), limit=2),
+            await listed(config("a"), before={"configurable": {"checkpoint_id": index[-1]}}),
+            await listed(config("a"), filter={"source": "input"}),
+            await listed({"configurable": {"thread_id": "a", "checkpoint_ns": "other"}}),
+            len(await listed()),
+        )
+
+    index, (newest_first, limited, before, inputs, other_ns, every) = asyncio.run(main())
+    assert newest_first == index[::-1]
+    assert limited == newest_first[:2]
+    assert before == newest_first[1:]
+    assert inputs == [index[0]]
+    assert other_ns == []
+    assert every == 2 * len(index)
+
+def test_shared_checkpointer_replays_pending_writes(store):
+    saver = KeyValueCheckpointSaver(store, "travel")
+    checkpoint_config, checkpoint, metadata, versions = _checkpoint("t")
+
+    async def main():
+        saved = await saver.aput(checkpoint_config, checkpoint, metadata, versions)
+        await saver.aput_writes(saved, [("items", 1), ("items", 2)], "task-a")
+        await saver.aput_writes(saved, [("items", 3)], "task-b")
+        # A retried task does not overwrite the writes it already made
+        await saver.aput_writes(saved, [("items", 9)], "task-a")
+        return await saver.aget_tuple(config("t"))
+
+    replayed = asyncio.run(main())
+    assert replayed.checkpoint["id"] == checkpoint["id"]
+    assert replayed.pending_writes == [("task-a", "items", 1), ("task-a", "items", 2), ("task-b", "items", 3)]
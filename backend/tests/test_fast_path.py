@@ -0,0 +1,81 @@
+import asyncio
+from datetime import date
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from fast_path import plan_flight_search, plan_hotel_search
+from inventory import inventory_day
+
+TODAY = date(2026, 10, 18)
+
+@pytest.mark.parametrize("query, args", [
+    (
+        "Find flights from New York to Los Angeles on 2026-11-05",
+        {"departure": "NYC", "destination": "LAX", "date": "2026-11-05", "sort_by": "price"},
+    ),
+    (
+        "fastest flights NYC to LAX tomorrow",
+        {"departure": "NYC", "destination": "LAX", "date": "2026-10-19", "sort_by": "duration"},
+    ),
+])
+def test_plain_flight_searches_are_planned(query, args):
+    assert plan_flight_search(query, TODAY) == args
+
+@pytest.mark.parametrize("query, args", [
+    (
+        "Hotels in Paris from 2026-11-05 to 2026-11-08",
+        {"city": "Paris", "checkin": "2026-11-05", "checkout": "2026-11-08", "room_type": "standard"},
+    ),
+    (
+        "suites in Paris on Nov 5 for 3 nights",
+        {"city": "Paris", "checkin": "2026-11-05", "checkout": "2026-11-08", "room_type": "suite"},
+    ),
+])
+def test_plain_hotel_searches_are_planned(query, args):
+    assert plan_hotel_search(query, TODAY) == args
+
+@pytest.mark.parametrize("query", [
+    "Book a flight from NYC to LAX on 2026-11-05",
+    "flights from NYC to LAX on 2026-11-05 under $300",
+    "flights from NYC to LAX on 2026-11-05 or 2026-11-06",
+    "flights from NYC to LAX on 2026-11-05 in the evening",
+    "flights to LAX on 2026-11-05",
+])
+def test_flight_queries_left_to_the_model(query):
+    assert plan_flight_search(query, TODAY) is None
+
+@pytest.mark.parametrize("query", [
+    "Reserve a hotel in Paris from 2026-11-05 to 2026-11-08",
+    "hotels in Paris from 2026-11-05 to 2026-11-08 under $200",
+    "hotels in Paris from 2026-11-05 to 2026-11-08 near the beach",
+    "hotels in Atlantis from 2026-11-05 to 2026-11-08",
+    "hotels in Paris on 2026-11-05",
+])
+def test_hotel_queries_left_to_the_model(query):
+    assert plan_hotel_search(query, TODAY) is None
+
+def test_fast_path_turn_is_in_the_thread_for_follow_ups():
+    from agents import FlightsAgent
+
+    agent = FlightsAgent("sk-test", cache=None)
+    thread_id = uuid4().hex
+
+    async def main():
+        events = [e async for e in agent.stream(f"Find flights from New York to Los Angeles on {inventory_day(7)}", thread_id)]
+        searched = (await agent.agent.aget_state({"configurable": {"thread_id": thread_id}})).values["messages"]
+        follow_up = [e async for e in agent.stream("book the second one for Jane", thread_id)]
+        thread = (await agent.agent.aget_state({"configurable": {"thread_id": thread_id}})).values["messages"]
+        return events, searched, follow_up, thread
+
+    events, searched, follow_up, thread = asyncio.run(main())
+    assert events[-1]["fast_path"]
+    assert [type(m) for m in searched] == [HumanMessage, AIMessage, ToolMessage, AIMessage]
+    assert searched[1].tool_calls[0]["name"] == "get_flights"
+    assert searched[2].tool_call_id == searched[1].tool_calls[0]["id"]
+    assert searched[3].content == events[-1]["content"]
+    # The follow-up went to the model, after the seeded turn
+    assert "fast_path" not in follow_up[-1]
+    assert thread[:4] == searched
+    assert thread[4].content == "book the second one for Jane"
@@ -0,0 +1,93 @@
+import asyncio
+from typing import List
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+
+from fake_llm import FakeChatModel
+from history import SUMMARY_NAME, HistoryCompactor
+
+def count(messages) -> int:
+    """Ten tokens a message, so budgets read as message counts"""
+    return 10 * len(messages)
+
+def turn(n: int) -> list:
+    return [
+        HumanMessage(f"question {n}", id=f"h{n}"),
+        AIMessage("", tool_calls=[{"name": "get_flights", "args": {}, "id": f"call{n}"}], id=f"a{n}"),
+        ToolMessage(f"result {n}", tool_call_id=f"call{n}", id=f"t{n}"),
+        AIMessage(f"answer {n}", id=f"r{n}"),
+    ]
+
+def conversation(turns: int) -> list:
+    return [message for n in range(turns) for message in turn(n)]
+
+class RecordingModel(FakeChatModel):
+    """Summarizes like FakeChatModel answers, keeping every prompt it was sent"""
+
+    prompts: List[list] = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(messages)
+        return super()._generate(messages, stop, run_manager, **kwargs)
+
+# Waiting for the next answer, and halfway through a turn with a tool result to read
+STATES = {
+    "new question": conversation(4) + turn(4)[:1],
+    "tool result": conversation(4) + turn(4)[:3],
+}
+
+def test_history_within_budget_is_sent_unchanged():
+    messages = STATES["new question"]
+    assert asyncio.run(HistoryCompactor(max_tokens=170, token_counter=count)({"messages": messages})) == {
+        "llm_input_messages": messages
+    }
+
+@pytest.mark.parametrize("state", STATES)
+@pytest.mark.parametrize("max_tokens", range(0, 200, 10))
+def test_trimming_keeps_whole_turns_with_their_tool_results(state, max_tokens):
+    messages = STATES[state]
+    kept = asyncio.run(HistoryCompactor(max_tokens=max_tokens, token_counter=count)({"messages": messages}))[
+        "llm_input_messages"
+    ]
+
+    assert kept == messages[len(messages) - len(kept):]
+    assert isinstance(kept[0], HumanMessage)
+    if count(kept) > max_tokens:
+        # Only the current turn is sent over budget
+        assert sum(isinstance(m, HumanMessage) for m in kept) == 1
+    calls = [call["id"] for m in kept if isinstance(m, AIMessage) for call in m.tool_calls]
+    results = [m.tool_call_id for m in kept if isinstance(m, ToolMessage)]
+    assert calls == results
+
+def test_a_turn_over_budget_is_still_sent_whole():
+    messages = STATES["tool result"]
+    update = asyncio.run(HistoryCompactor(max_tokens=20, token_counter=count)({"messages": messages}))
+    assert update == {"llm_input_messages": messages[-3:]}
+
+    # With only that turn there is nothing to fold into a summary
+    model = RecordingModel(script=[], prompts=[])
+    compactor = HistoryCompactor(max_tokens=20, summary_model=model, token_counter=count)
+    assert asyncio.run(compactor({"messages": messages[-3:]})) == {"llm_input_messages": messages[-3:]}
+    assert model.prompts == []
+
+def test_dropped_turns_are_folded_into_a_running_summary():
+    model = RecordingModel(script=[], prompts=[])
+    compactor = HistoryCompactor(max_tokens=50, summary_model=model, token_counter=count)
+    messages = STATES["new question"]
+
+    first = asyncio.run(compactor({"messages": messages}))
+    summary = first["llm_input_messages"][0]
+    assert isinstance(summary, SystemMessage) and summary.name == SUMMARY_NAME
+    assert summary.content == "Summary of the earlier conversation: Here is what I found. result 2"
+    assert first["llm_input_messages"][1:] == messages[-5:]
+    # The thread itself is replaced by the summary and the kept turns
+    assert isinstance(first["messages"][0], RemoveMessage)
+    assert first["messages"][1:] == first["llm_input_messages"]
+    assert model.prompts[0][1:] == messages[:-5]
+
+    # The next compaction extends the summary rather than starting over
+    thread = first["llm_input_messages"] + turn(4)[1:] + turn(5)[:1]
+    second = asyncio.run(compactor({"messages": thread}))
+    assert model.prompts[1][1:] == [summary, *turn(3), *turn(4)]
+    assert second["llm_input_messages"][1:] == turn(5)[:1]
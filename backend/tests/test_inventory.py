@@ -0,0 +1,49 @@
+import asyncio
+from datetime import date, timedelta
+
+from inventory import Inventory, generate, get_inventory, inventory_day, inventory_start
+
+def test_scripted_dates_fall_inside_the_inventory():
+    inventory = get_inventory()
+    assert inventory_start() == inventory.start
+    assert inventory.start < date.fromisoformat(inventory_day(7)) < inventory.start + timedelta(days=inventory.days)
+
+def test_search_tools_have_no_default_dates():
+    from agents import get_flights, get_hotels, search_itineraries
+
+    assert {"departure", "destination", "date"} <= set(get_flights.tool_call_schema.model_json_schema()["required"])
+    assert {"departure", "destination", "date"} <= set(search_itineraries.tool_call_schema.model_json_schema()["required"])
+    assert {"city", "checkin", "checkout"} <= set(get_hotels.tool_call_schema.model_json_schema()["required"])
+
+def test_default_script_finds_flights():
+    from agents import get_flights
+
+    content = asyncio.run(get_flights.ainvoke({"departure": "NYC", "destination": "LAX", "date": inventory_day(7)}))
+    # A header, the column names and at least one flight
+    assert len(content.splitlines()) > 2
+
+def test_hotel_search_needs_at_least_one_night():
+    inventory = get_inventory()
+    checkin = inventory.start + timedelta(days=3)
+
+    assert inventory.search_hotels("Paris", checkin, checkin + timedelta(days=1))
+    assert inventory.search_hotels("Paris", checkin, checkin) == []
+    assert inventory.search_hotels("Paris", checkin, checkin - timedelta(days=1)) == []
+
+def test_saved_inventory_reloads_memory_mapped_with_the_same_results(tmp_path):
+    start = date(2026, 1, 1)
+    inventory = generate(start, days=10)
+    inventory.save(str(tmp_path))
+    loaded = Inventory.load(str(tmp_path))
+
+    assert isinstance(loaded.flights["key"], memoryview)
+    assert (loaded.start, loaded.days, loaded.flight_count, loaded.rate_count) == (
+        inventory.start, inventory.days, inventory.flight_count, inventory.rate_count
+    )
+    day = start + timedelta(days=4)
+    assert inventory.search_flights("NYC", "LAX", day) and inventory.search_hotels("Paris", day, day + timedelta(days=3))
+    for sort_by in ("price", "duration"):
+        assert loaded.search_flights("NYC", "LAX", day, sort_by=sort_by) == inventory.search_flights("NYC", "LAX", day, sort_by=sort_by)
+    assert loaded.routes_from("NYC") == inventory.routes_from("NYC")
+    assert loaded.search_hotels("Paris", day, day + timedelta(days=3), "suite") == inventory.search_hotels("Paris", day, day + timedelta(days=3), "suite")
+    assert loaded.hotel_id(inventory.search_hotels("Paris", day, day + timedelta(days=1))[0].name) is not None
@@ -0,0 +1,102 @@
+from array import array
+from datetime import date, timedelta
+
+from inventory import TABLES, Inventory, day_number, flight_key
+from itineraries import search_itineraries
+
+START = date(2026, 1, 5)
+AIRPORTS = ["AAA", "BBB", "CCC", "HUB"]
+
+def inventory_of(*flights) -> Inventory:
+    """An inventory of (number, origin, destination, day, "HH:MM", minutes, dollars) flights"""
+    ids = {code: i for i, code in enumerate(AIRPORTS)}
+    rows = sorted(
+        (flight_key(ids[origin], ids[destination], day_number(START) + day), price * 100, number, time, minutes)
+        for number, origin, destination, day, time, minutes, price in flights
+    )
+    tables = {table: {column: array(typecode) for column, typecode in columns.items()} for table, columns in TABLES.items()}
+    for key, price_cents, number, time, minutes in rows:
+        hours, mins = time.split(":")
+        for column, value in (
+            ("key", key), ("airline", 0), ("number", number), ("departure_minute", int(hours) * 60 + int(mins)),
+            ("duration", minutes), ("price_cents", price_cents),
+        ):
+            tables["flights"][column].append(value)
+    return Inventory(AIRPORTS, ["AA"], [], [], tables, START, 10)
+
+def numbers(itineraries):
+    return [tuple(int(leg.flight_number[2:]) for leg in itinerary.legs) for itinerary in itineraries]
+
+def test_connections_need_a_layover_between_one_and_twelve_hours():
+    inventory = inventory_of(
+        (1, "AAA", "HUB", 0, "08:00", 60, 100),
+        (2, "HUB", "BBB", 0, "08:30", 60, 10),   # leaves before the first leg lands
+        (3, "HUB", "BBB", 0, "09:30", 60, 20),   # 30 minutes on the ground
+        (4, "HUB", "BBB", 0, "10:00", 60, 200),  # exactly one hour
+        (5, "HUB", "BBB", 0, "21:00", 60, 150),  # exactly twelve hours
+        (6, "HUB", "BBB", 0, "21:05", 60, 30),   # longer than twelve hours
+        (7, "HUB", "BBB", 1, "09:00", 60, 40),   # the next day
+    )
+
+    found = search_itineraries(inventory, "AAA", "BBB", START)
+    assert numbers(found) == [(1, 5), (1, 4)]
+    assert [itinerary.stops for itinerary in found] == [1, 1]
+    # A shorter minimum lets the quick connection through
+    assert numbers(search_itineraries(inventory, "AAA", "BBB", START, min_layover=30)) == [(1, 3), (1, 5), (1, 4)]
+
+def test_max_stops_bounds_the_legs():
+    inventory = inventory_of(
+        (1, "AAA", "CCC", 0, "08:00", 60, 50),
+        (2, "CCC", "HUB", 0, "10:00", 60, 50),
+        (3, "HUB", "BBB", 0, "12:00", 60, 50),
+        (4, "AAA", "BBB", 0, "08:00", 600, 500),
+    )
+
+    assert numbers(search_itineraries(inventory, "AAA", "BBB", START, max_stops=0)) == [(4,)]
+    assert numbers(search_itineraries(inventory, "AAA", "BBB", START, max_stops=1)) == [(4,)]
+    assert numbers(search_itineraries(inventory, "AAA", "BBB", START, max_stops=2)) == [(1, 2, 3), (4,)]
+
+def test_flexible_days_search_a_window_around_the_date():
+    prices = [50, 200, 300, 100, 10]
+    inventory = inventory_of(*((day, "AAA", "BBB", day, "08:00", 120, price) for day, price in enumerate(prices)))
+    day = START + timedelta(days=2)
+
+    assert numbers(search_itineraries(inventory, "AAA", "BBB", day)) == [(2,)]
+    flexible = search_itineraries(inventory, "AAA", "BBB", day, flexible_days=1)
+    assert numbers(flexible) == [(3,), (1,), (2,)]
+    assert [itinerary.departure_date for itinerary in flexible] == [
+        (START + timedelta(days=offset)).isoformat() for offset in (3, 1, 2)
+    ]
+
+def test_ranks_by_price_or_by_duration():
+    inventory = inventory_of(
+        (1, "AAA", "BBB", 0, "08:00", 600, 100),
+        (2, "AAA", "HUB", 0, "08:00", 60, 150),
+        (3, "HUB", "BBB", 0, "10:00", 60, 150),
+    )
+
+    by_price = search_itineraries(inventory, "AAA", "BBB", START)
+    by_duration = search_itineraries(inventory, "AAA", "BBB", START, sort_by="duration")
+    assert numbers(by_price) == [(1,), (2, 3)]
+    assert [(itinerary.price, itinerary.duration_minutes) for itinerary in by_price] == [(100, 600), (300, 180)]
+    assert numbers(by_duration) == [(2, 3), (1,)]
+
+def test_each_airport_is_expanded_at_most_limit_times():
+    # Many ways into the hub and none out of it to the destination
+    inventory = inventory_of(
+        *((number, "AAA", "HUB", 0, f"{number:02d}:00", 60, 100 + number) for number in range(1, 9)),
+        (20, "HUB", "CCC", 0, "22:00", 60, 100),
+        (21, "AAA", "BBB", 0, "08:00", 60, 900),
+    )
+    expansions = []
+    routes_from = inventory.routes_from
+
+    def counting_routes_from(airport):
+        expansions.append(airport)
+        return routes_from(airport)
+
+    inventory.routes_from = counting_routes_from
+    found = search_itineraries(inventory, "AAA", "BBB", START, max_stops=2, limit=2, flights_per_route=10)
+
+    assert numbers(found) == [(21,)]
+    assert expansions.count("HUB") == 2
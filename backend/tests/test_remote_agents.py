@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+import pytest
+from a2a.client import A2AClientError
+
+from a2a_flights import flights_agent_card
+from remote_agents import CardCache, RemoteAgent, RemoteAgentError, close_remote_agents, remote_agent
+
+BASE_URL = "http://flights.test"
+
+def card_server(requests: list, fail: list):
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if fail:
+            raise httpx.ConnectError("connection refused", request=request)
+        if request.url.path == "/.well-known/agent.json":
+            return httpx.Response(200, json=flights_agent_card.model_dump(mode="json", exclude_none=True))
+        return httpx.Response(503)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handle))
+
+def test_card_cache_serves_a_stale_card_while_the_agent_is_down():
+    cache = CardCache(ttl_seconds=0)
+    requests, fail = [], []
+
+    async def main():
+        async with card_server(requests, fail) as http:
+            fresh = await cache.get(BASE_URL, http)
+            fail.append(True)
+            stale = await cache.get(BASE_URL, http)
+            cache.invalidate(BASE_URL)
+            with pytest.raises(A2AClientError):
+                await cache.get(BASE_URL, http)
+            return fresh, stale
+
+    fresh, stale = asyncio.run(main())
+    assert fresh.name == stale.name == flights_agent_card.name
+    assert len(requests) == 3
+
+def test_concurrent_lookups_share_one_fetch():
+    cache = CardCache()
+    requests = []
+
+    async def main():
+        async with card_server(requests, []) as http:
+            return await asyncio.gather(*(cache.get(BASE_URL, http) for _ in range(5)))
+
+    assert len({id(card) for card in asyncio.run(main())}) == 1
+    assert requests == ["/.well-known/agent.json"]
+
+def test_unreachable_agent_raises_remote_agent_error_and_forgets_its_card():
+    agent = RemoteAgent("flights", BASE_URL, flights_agent_card, cards=CardCache())
+    requests = []
+
+    async def main():
+        await agent.http.aclose()
+        agent.http = card_server(requests, [])
+        with pytest.raises(RemoteAgentError):
+            async for _ in agent.stream("flights to Boston", "ctx"):
+                pass
+        await agent.aclose()
+
+    asyncio.run(main())
+    # The card was fetched, the message was refused, and the next request fetches the card again
+    assert requests == ["/.well-known/agent.json", "/"]
+    assert BASE_URL not in agent.cards._cards
+
+def test_close_remote_agents_closes_the_shared_clients():
+    async def main():
+        agent = remote_agent("flights", BASE_URL)
+        await close_remote_agents()
+        return agent, remote_agent("flights", BASE_URL)
+
+    closed, fresh = asyncio.run(main())
+    assert closed.http.is_closed
+    assert fresh is not closed
+    asyncio.run(close_remote_agents())
@@ -0,0 +1,50 @@
+import time
+
+from response_cache import ResponseCache, entity_signature
+
+QUERY = "Find flights from New York to Los Angeles on 2024-07-01"
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = ResponseCache()
+    cache.store("flights", QUERY, "answer")
+
+    assert cache.lookup("flights", "find flights from new york to los angeles on 2024-07-01!") == "answer"
+    assert cache.exact_hits == 1
+
+def test_semantic_hit_needs_the_same_places_and_dates():
+    cache = ResponseCache(similarity_threshold=0.5)
+    cache.store("flights", QUERY, "answer")
+
+    assert cache.lookup("flights", "Please find flights from New York to Los Angeles on 2024-07-01") == "answer"
+    assert cache.lookup("flights", "Find flights from Los Angeles to New York on 2024-07-01") is None
+    assert cache.lookup("flights", "Find flights from New York to Los Angeles on 2024-07-02") is None
+    assert cache.semantic_hits == 1
+
+def test_entries_are_scoped_by_agent_and_conversation():
+    cache = ResponseCache()
+    cache.store("flights", QUERY, "answer", state_key="s1")
+
+    assert cache.lookup("hotels", QUERY, state_key="s1") is None
+    assert cache.lookup("flights", QUERY, state_key="s2") is None
+    assert cache.lookup("flights", QUERY, state_key="s1") == "answer"
+
+def test_bookings_are_never_cached():
+    cache = ResponseCache()
+    cache.store("flights", "Book flight AA100 for Jane", "booked")
+
+    assert cache.lookup("flights", "Book flight AA100 for Jane") is None
+    assert cache.stats()["bypassed"] == 1
+    assert cache.stats()["size"] == 0
+
+def test_expired_and_evicted_entries_leave_the_index():
+    cache = ResponseCache(max_size=1, ttl_seconds=0.01)
+    cache.store("flights", QUERY, "first")
+    cache.store("flights", "Find flights from Boston to Chicago on 2024-07-01", "second")
+
+    assert cache.lookup("flights", QUERY) is None
+    time.sleep(0.02)
+    assert cache.lookup("flights", "Find flights from Boston to Chicago on 2024-07-01") is None
+    assert not cache._entries and not cache._indexes
+
+def test_entity_signature_keeps_place_order():
+    assert entity_signature("New York to London") != entity_signature("London to New York")
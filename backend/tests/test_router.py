@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from router import ConversationRoutes
+from storage import InMemoryKeyValueStore
+from travel_agent_executor import TravelAgentExecutor
+
+@pytest.fixture(scope="module")
+def executor():
+    return TravelAgentExecutor(remote_urls={})
+
+@pytest.mark.parametrize("query, agent", [
+    ("Find flights from NYC to LAX", "flights"),
+    ("Hotels in Paris from 2024-07-01 to 2024-07-03", "hotels"),
+    ("Plan a trip to LA with a flight and a hotel", "both"),
+    ("book it for Jane", "unclear"),
+])
+def test_routes_by_agent_vocabulary(executor, query, agent):
+    assert asyncio.run(executor._determine_agent_type(query)) == agent
+
+def test_follow_ups_stay_with_the_conversation_agent(executor):
+    async def main():
+        await executor.routes.set("ctx-hotels", "hotels")
+        await executor.routes.set("ctx-flights", "flights")
+        return (
+            await executor._determine_agent_type("book it for Jane", "ctx-hotels"),
+            await executor._determine_agent_type("my name is Jane", "ctx-hotels"),
+            # Weak evidence for another agent does not pull the conversation away
+            await executor._determine_agent_type("cheaper options?", "ctx-flights"),
+            # A clear route still wins
+            await executor._determine_agent_type("find flights to Boston", "ctx-hotels"),
+            # Without an earlier route there is nothing to fall back on
+            await executor._determine_agent_type("book it for Jane", "ctx-new"),
+            await executor._determine_agent_type("cheaper options?", "ctx-new"),
+        )
+
+    assert asyncio.run(main()) == ("hotels", "hotels", "flights", "flights", "unclear", "hotels")
+
+def test_conversation_routes_are_shared_through_the_store():
+    store = InMemoryKeyValueStore()
+    first, second = ConversationRoutes(store=store), ConversationRoutes(store=store)
+
+    async def main():
+        await first.set("ctx", "flights")
+        return await second.get("ctx"), await second.get("other")
+
+    assert asyncio.run(main()) == ("flights", None)
+
+def test_conversation_routes_are_bounded():
+    routes = ConversationRoutes(max_size=2)
+
+    async def main():
+        for context_id in ("a", "b", "c"):
+            await routes.set(context_id, "hotels")
+        return [await routes.get(context_id) for context_id in ("a", "b", "c")]
+
+    assert asyncio.run(main()) == [None, "hotels", "hotels"]
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from slots import extract_flight_slots, extract_hotel_slots
+
+TODAY = date(2026, 10, 18)
+
+@pytest.mark.parametrize("when, day", [
+    ("today", "2026-10-18"),
+    ("tomorrow", "2026-10-19"),
+    ("on October 25th", "2026-10-25"),
+    ("on 3rd of November", "2026-11-03"),
+    # A day without a year that has passed this year is next year's
+    ("on Jan 5", "2027-01-05"),
+    ("on 2027-03-01", "2027-03-01"),
+])
+def test_flight_dates_are_resolved_against_today(when, day):
+    assert extract_flight_slots(f"Find flights from New York to Paris {when}", TODAY) == {
+        "departure": "NYC", "destination": "PAR", "date": day,
+    }
+
+@pytest.mark.parametrize("query, stay", [
+    ("Hotels in Paris from Nov 2 to Nov 5", ("2026-11-02", "2026-11-05")),
+    ("Hotel in Paris on Nov 2 for 3 nights", ("2026-11-02", "2026-11-05")),
+    ("A hotel in Tokyo tomorrow, 1 night", ("2026-10-19", "2026-10-20")),
+    # The stay ends on the year's turn
+    ("Hotels in London from Dec 30 for 4 nights", ("2026-12-30", "2027-01-03")),
+])
+def test_hotel_stays_come_from_two_dates_or_a_number_of_nights(query, stay):
+    slots = extract_hotel_slots(query, TODAY)
+    assert (slots["checkin"], slots["checkout"]) == stay
+
+@pytest.mark.parametrize("query", [
+    "Flights from Atlantis to Paris tomorrow",
+    "Flights from New York to Atlantis tomorrow",
+    "Flights to Paris tomorrow",
+    "Flights from New York to Paris",
+])
+def test_flight_slots_need_two_known_cities_and_a_date(query):
+    assert extract_flight_slots(query, TODAY) is None
+
+@pytest.mark.parametrize("query", [
+    "Hotels in Atlantis tomorrow for 2 nights",
+    "Hotels in Paris tomorrow",
+    "Hotels in Paris from Nov 5 to Nov 2",
+    "Hotels for 2 nights",
+])
+def test_hotel_slots_need_a_known_city_and_a_whole_stay(query):
+    assert extract_hotel_slots(query, TODAY) is None
+
+def test_prefetched_searches_are_served_from_the_tool_cache():
+    from agents import _prefetches, get_flights, get_hotels, prefetch_search, search_cache
+    from inventory import inventory_day
+
+    flight = {"departure": "NYC", "destination": "TYO", "date": inventory_day(11)}
+    stay = {"city": "Tokyo", "checkin": inventory_day(11), "checkout": inventory_day(13)}
+
+    async def main():
+        before = search_cache.stats()
+        prefetch_search("flights", f"Flights from New York to Tokyo on {flight['date']}")
+        prefetch_search("hotels", f"Hotels in Tokyo from {stay['checkin']} for 2 nights")
+        # Nothing is started for a query missing an argument
+        prefetch_search("flights", "Flights to Tokyo")
+        assert len(_prefetches) == 2
+        # The model's calls, as they come after its first answer
+        await get_flights.ainvoke(flight)
+        await get_hotels.ainvoke(stay)
+        after = search_cache.stats()
+        return {key: after[key] - before[key] for key in ("misses", "hits", "coalesced")}
+
+    counts = asyncio.run(main())
+    assert counts["misses"] == 2
+    assert counts["hits"] + counts["coalesced"] == 2
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from storage import store_lock
+
+def test_add_only_sets_missing_keys(store):
+    async def main():
+        added = [await store.add("k", b"1", ttl=0.05), await store.add("k", b"2")]
+        value = await store.get("k")
+        time.sleep(0.06)
+        return added, value, await store.add("k", b"3"), await store.get("k")
+
+    assert asyncio.run(main()) == ([True, False], b"1", True, b"3")
+
+def test_store_lock_serializes_read_modify_write(store):
+    async def increment():
+        async with store_lock(store, "counter"):
+            value = int(await store.get("counter") or b"0")
+            await asyncio.sleep(0.001)
+            await store.set("counter", str(value + 1).encode())
+
+    async def main():
+        await asyncio.gather(*(increment() for _ in range(10)))
+        return await store.get("counter"), await store.get("lock|counter")
+
+    assert asyncio.run(main()) == (b"10", None)
+
+def test_task_store_saves_gets_and_deletes_tasks(store):
+    from a2a.types import Task, TaskState, TaskStatus
+
+    from storage import KeyValueTaskStore
+
+    tasks = KeyValueTaskStore(store, "travel")
+    task = Task(id="task-1", contextId="ctx-1", status=TaskStatus(state=TaskState.working))
+
+    async def main():
+        await tasks.save(task)
+        saved = await tasks.get("task-1")
+        # Another namespace is another agent's tasks
+        other = await KeyValueTaskStore(store, "flights").get("task-1")
+        await tasks.delete("task-1")
+        return saved, other, await tasks.get("task-1")
+
+    assert asyncio.run(main()) == (task, None, None)
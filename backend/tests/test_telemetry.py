@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from fake_llm import FakeChatModel
+from telemetry import Span, TelemetryCallbackHandler, langchain_callbacks
+
+def test_cancelled_run_ends_its_open_spans():
+    from agents import ModelRegistry, get_flights
+
+    graph = ModelRegistry(http2=False).get_graph(FakeChatModel(latency=10), [get_flights], "prompt")
+    handler = TelemetryCallbackHandler()
+
+    async def main():
+        config = {"configurable": {"thread_id": "t"}, "callbacks": [handler]}
+        run = asyncio.create_task(graph.ainvoke({"messages": [HumanMessage("flights NYC to LAX")]}, config))
+        await asyncio.sleep(0.1)
+        # Mid-run: the ReAct step and its model call are open
+        assert {span.name for span, _ in handler._spans.values()} == {"react_step", "llm"}
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+
+    asyncio.run(main())
+    assert not handler._spans
+    assert not handler._enclosing
+    assert not handler._roots
+
+def test_cancelled_span_is_labelled_canceled():
+    span = Span("llm")
+    span.end(asyncio.CancelledError())
+    assert span.outcome == "canceled"
+
+def test_each_run_gets_its_own_handler():
+    first, second = langchain_callbacks(), langchain_callbacks()
+    assert first and first[0] is not second[0]
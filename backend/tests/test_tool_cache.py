@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+
+from tool_cache import ToolCache, cached_tool
+
+def test_concurrent_calls_share_one_upstream_call():
+    cache = ToolCache()
+    calls = []
+
+    async def search():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["LAX"]
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_call("key", search) for _ in range(5)))
+
+    assert asyncio.run(main()) == [["LAX"]] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    cache = ToolCache()
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("supplier down")
+
+    async def main():
+        results = await asyncio.gather(*(cache.get_or_call("key", failing) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        assert await cache.get_or_call("key", lambda: "recovered") == "recovered"
+
+    asyncio.run(main())
+    assert len(calls) == 1
+
+def test_waiters_take_over_when_the_leading_call_is_cancelled():
+    cache = ToolCache()
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def main():
+        leader = asyncio.create_task(cache.get_or_call("key", slow))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_call("key", lambda: "own result"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(main()) == "own result"
+    assert not cache._in_flight
+
+def test_evicts_least_recently_used_and_expired_entries():
+    cache = ToolCache(max_size=2, ttl_seconds=0.01)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.evictions == 1
+    time.sleep(0.02)
+    assert cache.get("a") == (False, None)
+
+def test_cached_tool_keys_on_normalized_arguments():
+    cache = ToolCache()
+    calls = []
+
+    @cached_tool(cache, normalize=lambda args: {**args, "city": args["city"].strip().title()})
+    def hotels(city: str, nights: int = 1):
+        calls.append(city)
+        return f"{city} x{nights}"
+
+    async def main():
+        return [await hotels("los angeles "), await hotels(city="Los Angeles", nights=1), await hotels("Los Angeles", 2)]
+
+    assert asyncio.run(main()) == ["Los Angeles x1", "Los Angeles x1", "Los Angeles x2"]
+    assert calls == ["Los Angeles", "Los Angeles"]
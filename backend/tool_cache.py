@@ -0,0 +1,127 @@
+import asyncio
+import functools
+import inspect
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+class ToolCache:
+    """TTL + LRU cache for deterministic tool results.
+
+    Concurrent calls with the same key share one upstream call (single-flight):
+    the first caller runs the tool, the others wait for its result.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = 300.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, value), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for a key, dropping it if it has expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        ttl = self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_call(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        """Return the cached value for key, or compute it once with `call`"""
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+        if key in self._in_flight:
+            self.coalesced += 1
+            future = self._in_flight[key]
+            await asyncio.wait([future])
+            if future.cancelled():
+                # The caller doing the work was cancelled, try again ourselves
+                return await self.get_or_call(key, call)
+            return future.result()
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = call()
+            if inspect.isawaitable(value):
+                value = await value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the error, nobody else needs to retrieve it
+            future.exception()
+            raise
+        else:
+            self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+def cached_tool(cache: ToolCache, normalize: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+    """Decorator that serves a tool function from `cache`.
+
+    Arguments are bound to the function signature (so defaults count), passed
+    through `normalize` and used both as the cache key and as the arguments of
+    the real call. Synchronous tools run in a worker thread. The decorated tool
+    is async and keeps the original signature and docstring, so LangGraph
+    builds the same tool schema from it.
+    """
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            if normalize is not None:
+                arguments = normalize(arguments)
+            key = (fn.__name__, tuple(sorted(arguments.items())))
+
+            def call():
+                if inspect.iscoroutinefunction(fn):
+                    return fn(**arguments)
+                return asyncio.to_thread(fn, **arguments)
+
+            return await cache.get_or_call(key, call)
+
+        return wrapper
+
+    return decorator
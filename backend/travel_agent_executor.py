@@ -1,130 +1,213 @@
-from a2a.agent_executor import AgentExecutor
-from a2a.types import AgentInput, AgentOutput
+from a2a.server.agent_execution import AgentExecutor, RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import TaskState
+from a2a.utils import new_agent_text_message, new_task
+from a2a_flights import flights_agent_card
+from a2a_hotels import hotels_agent_card
 from agents import FlightsAgent, HotelsAgent
+from artifact_stream import ArtifactStreamer, relay_agent_stream
+from cancellation import RunningTasks
+from remote_agents import remote_agent, remote_agent_urls
+from router import ConversationRoutes, IntentRouter
+from storage import state_store_from_env
+from telemetry import span, track_request
 import os
-import json
 import asyncio
-from typing import AsyncGenerator, Dict, Any
+from dotenv import load_dotenv
+from typing import Dict, Any, Optional
+
+# Appended to the full query so each specialist sees the whole trip but only handles its part
+FOCUS_INSTRUCTIONS = {
+    "flights": "Only handle the flight part of this request, another agent takes care of hotels.",
+    "hotels": "Only handle the hotel part of this request, another agent takes care of flights.",
+}
+
+CLARIFICATION_MESSAGE = """I'm a travel booking agent that can help with both flights and hotels.
+
+Could you please specify whether you're looking for:
+- Flight booking (search and book flights between cities)
+- Hotel booking (search and book accommodations)
+- Or if you need help with both, I can assist with a complete travel plan!
+
+Just let me know what you'd like to do."""
 
 class TravelAgentExecutor(AgentExecutor):
     """
     A2A Agent Executor for the Travel Booking System
     Handles both flights and hotels booking requests
     """
-    
-    def __init__(self):
+
+    def __init__(self, branch_timeout: float = None, remote_urls: Dict[str, str] = None):
         # Initialize the individual agents
+        load_dotenv()
         openai_api_key = os.getenv("OPENAI_API_KEY", "your-openai-api-key-here")
         openai_base_url = os.getenv("OPENAI_BASE_URL")
-        
-        self.flights_agent = FlightsAgent(openai_api_key, openai_base_url)
-        self.hotels_agent = HotelsAgent(openai_api_key, openai_base_url)
-        
-        # Keywords to route requests to appropriate agents
+
+        # Specialists with a URL (FLIGHTS_AGENT_URL/HOTELS_AGENT_URL) are delegated to over A2A,
+        # so they can be deployed and scaled as separate services
+        remote_urls = remote_agent_urls(["flights", "hotels"]) if remote_urls is None else remote_urls
+        if "flights" in remote_urls:
+            self.flights_agent = remote_agent("flights", remote_urls["flights"], flights_agent_card)
+        else:
+            self.flights_agent = FlightsAgent(openai_api_key, openai_base_url)
+        if "hotels" in remote_urls:
+            self.hotels_agent = remote_agent("hotels", remote_urls["hotels"], hotels_agent_card)
+        else:
+            self.hotels_agent = HotelsAgent(openai_api_key, openai_base_url)
+        self.agents = {"flights": self.flights_agent, "hotels": self.hotels_agent}
+        self.running = RunningTasks.from_env(state_store_from_env())
+
+        # Seconds each specialist gets when fanning out a combined trip query
+        self.branch_timeout = branch_timeout or float(os.getenv("TRAVEL_BRANCH_TIMEOUT_SECONDS", "60"))
+
+        # Extra keywords on top of the vocabulary taken from the agent cards
         self.flight_keywords = [
-            'flight', 'flights', 'fly', 'airplane', 'airline', 'departure', 
-            'arrival', 'airport', 'boarding', 'ticket', 'aviation'
+            'flight', 'flights', 'fly', 'flying', 'airplane', 'plane', 'airline', 'departure',
+            'arrival', 'airport', 'boarding', 'ticket', 'aviation', 'layover', 'nonstop',
+            'round trip', 'one way', 'passenger'
         ]
-        
+
         self.hotel_keywords = [
-            'hotel', 'hotels', 'accommodation', 'room', 'stay', 'lodge', 
-            'resort', 'inn', 'booking', 'reservation', 'check-in', 'check-out'
+            'hotel', 'hotels', 'accommodation', 'room', 'stay', 'lodge', 'motel', 'hostel',
+            'resort', 'inn', 'suite', 'night', 'check-in', 'check-out', 'checkin', 'checkout', 'guest'
         ]
-    
-    def _determine_agent_type(self, query: str) -> str:
+
+        # Routing is a lookup in a precomputed term index, no LLM call involved
+        self.router = IntentRouter.from_cards(
+            {"flights": self.flights_agent.get_agent_card(), "hotels": self.hotels_agent.get_agent_card()},
+            extra_vocabulary={"flights": self.flight_keywords, "hotels": self.hotel_keywords},
+        )
+        # Routes weaker than this defer to the agent the conversation is already using
+        self.min_route_confidence = float(os.getenv("ROUTE_MIN_CONFIDENCE", "0.7"))
+        self.routes = ConversationRoutes(
+            ttl_seconds=float(os.getenv("CHECKPOINT_TTL_SECONDS", "3600")),
+            store=state_store_from_env(),
+        )
+
+    async def _determine_agent_type(self, query: str, context_id: Optional[str] = None) -> str:
         """
-        Determine which agent should handle the query based on keywords
+        Determine which agent should handle the query: "flights", "hotels",
+        "both" for a combined trip, or "unclear". A query without clear
+        routing terms in an ongoing conversation goes to the agent the
+        conversation was last routed to.
         """
-        query_lower = query.lower()
-        
-        flight_score = sum(1 for keyword in self.flight_keywords if keyword in query_lower)
-        hotel_score = sum(1 for keyword in self.hotel_keywords if keyword in query_lower)
-        
-        if flight_score > hotel_score:
-            return "flights"
-        elif hotel_score > flight_score:
-            return "hotels"
-        else:
-            # If unclear, try to handle both or ask for clarification
-            return "both"
-    
-    async def execute(self, agent_input: AgentInput) -> AsyncGenerator[AgentOutput, None]:
+        route = self.router.route(query)
+        if route.agent == "both" or (route.agent != "unclear" and route.confidence >= self.min_route_confidence):
+            return route.agent
+        previous = await self.routes.get(context_id) if context_id else None
+        return previous or route.agent
+
+    def _split_query(self, query: str, agent_types) -> Dict[str, str]:
+        """
+        Build the sub-query for each specialist of a combined trip request
+        """
+        if len(agent_types) == 1:
+            return {agent_types[0]: query}
+        return {agent_type: f"{query}\n\n{FOCUS_INSTRUCTIONS[agent_type]}" for agent_type in agent_types}
+
+    async def execute(
+        self,
+        context: RequestContext,
+        event_queue: EventQueue,
+    ) -> None:
         """
         Execute the agent based on the input
         """
-        try:
-            # Extract the query from the input
-            if hasattr(agent_input, 'messages') and agent_input.messages:
-                query = agent_input.messages[-1].content
-            elif hasattr(agent_input, 'text'):
-                query = agent_input.text
-            else:
-                query = str(agent_input)
-            
-            # Determine which agent to use
-            agent_type = self._determine_agent_type(query)
-            
-            if agent_type == "flights":
-                result = self.flights_agent.run(query)
-                yield AgentOutput(
-                    text=result,
-                    metadata={
-                        "agent_used": "flights",
-                        "agent_type": "flight-booking",
-                        "skills_used": ["flight-search", "flight-booking"]
-                    }
-                )
-            elif agent_type == "hotels":
-                result = self.hotels_agent.run(query)
-                yield AgentOutput(
-                    text=result,
-                    metadata={
-                        "agent_used": "hotels", 
-                        "agent_type": "hotel-booking",
-                        "skills_used": ["hotel-search", "hotel-booking"]
-                    }
-                )
-            else:
-                # Handle both or ask for clarification
-                response = """I'm a travel booking agent that can help with both flights and hotels. 
-                
-Could you please specify whether you're looking for:
-- Flight booking (search and book flights between cities)
-- Hotel booking (search and book accommodations)
-- Or if you need help with both, I can assist with a complete travel plan!
+        # tasks/cancel stops this coroutine and both branches, see cancel()
+        async with self.running.track(context.task_id, context.context_id, event_queue):
+            task = context.current_task
+            if not task:
+                task = new_task(context.message)
+                await event_queue.enqueue_event(task)
 
-Just let me know what you'd like to do."""
-                
-                yield AgentOutput(
-                    text=response,
-                    metadata={
-                        "agent_used": "coordinator",
-                        "agent_type": "travel-coordinator", 
-                        "skills_available": ["flight-search", "flight-booking", "hotel-search", "hotel-booking"],
-                        "clarification_needed": True
+            with track_request("travel") as request:
+                with span("extract_input"):
+                    query = context.get_user_input()
+                updater = TaskUpdater(event_queue, task.id, task.contextId)
+
+                # Determine which agent to use
+                with span("route") as route_span:
+                    agent_type = await self._determine_agent_type(query, task.contextId)
+                    route_span.set_attribute("route", agent_type)
+                if agent_type == "unclear":
+                    request.outcome = "input_required"
+                    await updater.update_status(
+                        TaskState.input_required,
+                        new_agent_text_message(CLARIFICATION_MESSAGE, task.contextId, task.id),
+                        final=True,
+                    )
+                    return
+                await self.routes.set(task.contextId, agent_type)
+
+                agent_types = ["flights", "hotels"] if agent_type == "both" else [agent_type]
+                sub_queries = self._split_query(query, agent_types)
+
+                # Specialists run concurrently, so a combined trip takes about as long as the slower one
+                async with asyncio.TaskGroup() as group:
+                    branches = {
+                        name: group.create_task(self._run_branch(name, sub_queries[name], task, updater, event_queue))
+                        for name in agent_types
                     }
-                )
-                
-        except Exception as e:
-            error_message = f"Error processing your request: {str(e)}"
-            yield AgentOutput(
-                text=error_message,
-                metadata={
-                    "error": True,
-                    "error_type": "execution_error",
-                    "error_message": str(e)
-                }
-            )
-    
-    async def execute_streaming(self, agent_input: AgentInput) -> AsyncGenerator[AgentOutput, None]:
+                results = {name: branch.result() for name, branch in branches.items()}
+
+                failed = [name for name, ok in results.items() if not ok]
+                if len(failed) == len(results):
+                    request.outcome = "failed"
+                    await updater.failed(
+                        new_agent_text_message(f"Could not complete the {' and '.join(failed)} request.", task.contextId, task.id)
+                    )
+                elif failed:
+                    request.outcome = "partial"
+                    await updater.complete(
+                        new_agent_text_message(
+                            f"Partial result: the {' and '.join(failed)} part could not be completed.", task.contextId, task.id
+                        )
+                    )
+                else:
+                    await updater.complete()
+
+    async def _run_branch(
+        self,
+        name: str,
+        query: str,
+        task,
+        updater: TaskUpdater,
+        event_queue: EventQueue,
+    ) -> bool:
         """
-        Execute with streaming support
+        Stream one specialist into its own artifact. Failures and timeouts are
+        reported in that artifact instead of cancelling the other branch.
         """
-        async for output in self.execute(agent_input):
-            yield output
-            # Add a small delay to simulate streaming
-            await asyncio.sleep(0.1)
-    
+        streamer = ArtifactStreamer(
+            event_queue,
+            task.id,
+            task.contextId,
+            name=f"{name}_response",
+            metadata={"agent_used": name},
+        )
+        try:
+            async with asyncio.timeout(self.branch_timeout):
+                await relay_agent_stream(
+                    self.agents[name].stream(query, thread_id=task.contextId or task.id, task_id=task.id),
+                    updater,
+                    streamer,
+                    label=name,
+                )
+            return True
+        except TimeoutError:
+            await streamer.write(f"\n\nThe {name} agent did not answer within {self.branch_timeout:g} seconds.")
+        except Exception as e:
+            await streamer.write(f"\n\nError processing {name} request: {str(e)}")
+        await streamer.close()
+        return False
+
+    async def cancel(
+        self, context: RequestContext, event_queue: EventQueue
+    ) -> None:
+        """Stop the running request and both specialist branches, and publish a canceled status"""
+        await self.running.cancel(context, event_queue)
+
     def get_capabilities(self) -> Dict[str, Any]:
         """
         Get the capabilities of this agent executor
@@ -138,8 +221,8 @@ Just let me know what you'd like to do."""
             "output_modes": ["text"],
             "skills": [
                 "flight-search",
-                "flight-booking", 
+                "flight-booking",
                 "hotel-search",
                 "hotel-booking"
             ]
-        }
\ No newline at end of file
+        }